@@ -0,0 +1,105 @@
+# coding: utf-8
+'''
+Objetivo: comparar a busca por similaridade (search_similar) original,
+que calcula a distância de Levenshtein completa para cada palavra de cada
+item do catálogo, com a busca atual baseada no SearchIndex e com a busca
+em lote (search_similar_batch).
+
+O script também confere se as buscas retornam exatamente os mesmos
+resultados para todas as palavras-chave testadas.
+
+Uso: python benchmarks/bench_search.py [--packages 2000] [--repeat 3]
+'''
+
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..')))
+from odufrn_downloader.mixins.filters.LevenshteinMixin import \
+    LevenshteinMixin
+from benchmarks.portal import make_catalog
+
+
+def legacy_search_similar(mixin: LevenshteinMixin, keyword: str,
+                          input_list: list, split: bool = True) -> list:
+    """Implementação original de LevenshteinMixin.search_similar, com o
+    break que impede um item de ser incluído mais de uma vez."""
+    str1 = list(keyword)
+    filter_list = []
+
+    for item in input_list:
+        items = item.split('-') if split else [item]
+        for word in items:
+            ratio = mixin.levenshtein(str1, list(word))
+            if ratio > 0.87:
+                filter_list.append(item)
+                break
+
+    return filter_list
+
+
+def keywords() -> list:
+    """Palavras-chave digitadas aos poucos, como numa busca interativa."""
+    words = ['discente', 'docentes', 'graduacao', 'bibliotec', 'licitacao',
+             'patrimonio', 'servidor', 'extensao', 'pesquisas', 'obra']
+    typed = []
+    for word in words:
+        typed += [word[:size] for size in range(3, len(word) + 1)]
+    return typed
+
+
+def timed(fun, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fun()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--packages', type=int, default=2000,
+                        help='tamanho do catálogo sintético')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='repetições de cada medição')
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.packages)['package_list']
+    mixin = LevenshteinMixin()
+    queries = keywords()
+
+    for keyword in queries:
+        expected = legacy_search_similar(mixin, keyword, catalog)
+        assert mixin.search_similar(keyword, catalog) == expected, keyword
+    batch = mixin.search_similar_batch(queries, catalog)
+    for keyword in queries:
+        expected = mixin.search_similar(keyword, catalog)
+        assert [item for item, _ in batch[keyword]] == expected, keyword
+
+    legacy = timed(lambda: [
+        legacy_search_similar(mixin, keyword, catalog) for keyword in queries
+    ], args.repeat)
+    LevenshteinMixin._search_indexes.clear()
+    build = timed(lambda: mixin.search_index(list(catalog)), args.repeat)
+    indexed = timed(lambda: [
+        mixin.search_similar(keyword, catalog) for keyword in queries
+    ], args.repeat)
+    batched = timed(lambda: mixin.search_similar_batch(queries, catalog),
+                    args.repeat)
+
+    print('{} itens, {} buscas (resultados idênticos)'.format(
+        len(catalog), len(queries)
+    ))
+    print('{:<24}{:>14}{:>16}'.format('implementação', 'total (ms)',
+                                      'por busca (ms)'))
+    for label, elapsed in (('original', legacy), ('SearchIndex', indexed),
+                           ('em lote', batched)):
+        print('{:<24}{:>14.1f}{:>16.3f}'.format(
+            label, elapsed * 1000, elapsed * 1000 / len(queries)
+        ))
+    print('{:<24}{:>14.1f}'.format('construção do índice', build * 1000))
+
+
+if __name__ == '__main__':
+    main()
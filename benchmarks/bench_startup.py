@@ -0,0 +1,76 @@
+# coding: utf-8
+'''
+Objetivo: medir o tempo de construção do ODUFRNDownloader e o número de
+requisições feitas até o primeiro download de um pacote conhecido.
+
+O cenário "eager" reproduz o que o construtor fazia antes dos catálogos
+serem carregados sob demanda: consultar package_list, group_list e
+tag_list, e consultar tag_list de novo para a instância de Tag criada
+por Package. O cenário "lazy" é o construtor atual.
+
+Uso: python benchmarks/bench_startup.py [--latency 0.05]
+'''
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                '..')))
+from odufrn_downloader import ODUFRNDownloader
+from odufrn_downloader.modules.Env import Env
+from benchmarks.portal import FakePortalAdapter, make_catalog
+
+
+def build(adapter: FakePortalAdapter, eager: bool) -> ODUFRNDownloader:
+    """Constrói o downloader usando o portal simulado."""
+    Env._catalogs.clear()
+    ufrn_data = ODUFRNDownloader()
+    ufrn_data.session.mount('http://', adapter)
+    if eager:
+        for option in ('package_list', 'group_list', 'tag_list',
+                       'tag_list'):
+            ufrn_data._load_list(option)
+    return ufrn_data
+
+
+def measure(latency: float, eager: bool) -> tuple:
+    """Retorna o tempo de construção e o número de requisições feitas
+    na construção e no primeiro download de um pacote."""
+    adapter = FakePortalAdapter(make_catalog(), latency)
+    start = time.perf_counter()
+    ufrn_data = build(adapter, eager)
+    elapsed = time.perf_counter() - start
+    construction_requests = adapter.count
+
+    with tempfile.TemporaryDirectory() as path:
+        ufrn_data.download_package('discentes', path)
+    return elapsed, construction_requests, adapter.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='latência simulada de cada requisição (s)')
+    args = parser.parse_args()
+
+    sys.stdout = open(os.devnull, 'w')
+    results = [
+        (label, measure(args.latency, eager))
+        for label, eager in (('eager (antes)', True), ('lazy (depois)', False))
+    ]
+    sys.stdout = sys.__stdout__
+
+    print('{:<16}{:>16}{:>22}{:>20}'.format(
+        'cenário', 'construção (ms)', 'requisições (constr.)',
+        'requisições (total)'
+    ))
+    for label, (elapsed, construction, total) in results:
+        print('{:<16}{:>16.1f}{:>22}{:>20}'.format(
+            label, elapsed * 1000, construction, total
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# coding: utf-8
+'''
+Portal de dados abertos simulado, usado pelos benchmarks para medir o
+pacote sem depender da rede. O adaptador é montado na sessão HTTP do
+downloader e responde às rotas da API com dados sintéticos, contando as
+requisições recebidas e simulando a latência da rede.
+'''
+
+import json
+import time
+import requests
+from requests.adapters import BaseAdapter
+from urllib.parse import urlparse
+
+
+def make_catalog(n_packages: int = 300) -> dict:
+    """Cria um catálogo sintético com nomes no formato do portal."""
+    words = ['discentes', 'docentes', 'cursos', 'graduacao', 'pos',
+             'bolsas', 'projetos', 'pesquisa', 'extensao', 'obras',
+             'contratos', 'licitacoes', 'patrimonio', 'biblioteca',
+             'acervo', 'unidades', 'academicas', 'servidores', 'turmas',
+             'estruturas', 'curriculares', 'telefones', 'despesas']
+    packages = []
+    for i in range(n_packages):
+        name = '-'.join(
+            words[(i * k + k) % len(words)] for k in range(1, 2 + i % 3)
+        )
+        packages.append('{}-{}'.format(name, i))
+
+    return {
+        'package_list': packages,
+        'group_list': words[:12],
+        'tag_list': words,
+    }
+
+
+class FakePortalAdapter(BaseAdapter):
+    """Adaptador de transporte que simula a API do portal.
+
+    Atributos
+    ---------
+    latency: float
+        tempo, em segundos, de espera de cada requisição.
+    count: int
+        número de requisições recebidas.
+    """
+
+    def __init__(self, catalog: dict, latency: float = 0.05):
+        super().__init__()
+        self.catalog = catalog
+        self.latency = latency
+        self.count = 0
+
+    def send(self, request, **kwargs):
+        self.count += 1
+        time.sleep(self.latency)
+        path = urlparse(request.url).path
+        option = path.rsplit('/', 1)[-1]
+
+        if option in self.catalog:
+            body = {'result': self.catalog[option]}
+        elif '/api/rest/dataset/' in path:
+            body = {'name': option, 'resources': []}
+        else:
+            body = {}
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode()
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
@@ -0,0 +1,515 @@
+import asyncio
+import hashlib
+import os
+import time
+from .modules.Env import Env
+from .mixins.FilterMixin import FilterMixin
+from .utils.AiohttpClient import AiohttpClient
+from .utils.AsyncTokenBucket import AsyncTokenBucket
+from .utils.DownloadResult import DownloadResult
+from .exceptions import odufrDownloadError
+
+
+class AsyncODUFRNDownloader(Env, FilterMixin):
+    """Versão assíncrona (asyncio) do ODUFRNDownloader.
+
+    Todas as requisições, de metadados e de arquivos, passam pelo mesmo
+    limite de concorrência, e cancelar uma chamada cancela os downloads
+    pendentes e remove os arquivos .part. Se uma das consultas de uma
+    chamada falhar, as demais tarefas da chamada são canceladas antes de
+    o erro chegar a quem a aguardava.
+
+    configure_session, limit_rate, connection_stats, use_cache e
+    use_store funcionam como no ODUFRNDownloader, sem bloquear o laço de
+    eventos: as esperas do limite de taxa usam asyncio.sleep, e a gravação
+    dos arquivos e os acessos ao cache e ao armazenamento rodam no
+    executor padrão do laço.
+
+    > Exemplo:
+        async with AsyncODUFRNDownloader() as ufrn_data:
+            await ufrn_data.download_package('discentes')
+
+    Atributos
+    ---------
+    client: AiohttpClient
+        cliente HTTP assíncrono usado nas requisições.
+    max_concurrency: int
+        número máximo de requisições simultâneas.
+    pool_size: int
+        com um cliente sem o método configure, o número máximo de
+        requisições simultâneas definido por configure_session
+        (por padrão, None).
+    timeout: float
+        com um cliente sem o método configure, o tempo máximo de espera
+        por dados de uma resposta definido por configure_session
+        (por padrão, None).
+    """
+
+    def __init__(self, client=None, max_concurrency: int = 20):
+        super().__init__()
+
+        self.url_package = self.url_base + 'api/rest/dataset/'
+        self.url_group = self.url_base + 'api/rest/group/'
+        self.url_tag = self.url_base + 'api/rest/tag'
+        self.client = client or AiohttpClient()
+        self.session = None
+        self.max_concurrency = max_concurrency
+        self.pool_size = None
+        self.timeout = None
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """Fecha as conexões abertas pelo cliente HTTP."""
+        await self.client.close()
+
+    def configure_session(self, pool_size: int = 100, timeout: float = 30):
+        """Configura o cliente HTTP assíncrono, antes da primeira
+        requisição.
+
+        Se o cliente não tiver o método configure, os limites são
+        aplicados pelo próprio AsyncODUFRNDownloader: pool_size limita as
+        requisições simultâneas e timeout, a espera por cada resposta de
+        metadados e por cada bloco dos downloads.
+
+        > Exemplo: configure_session(pool_size=50, timeout=60)
+
+        Parâmetros
+        ----------
+        pool_size: int
+            número máximo de conexões abertas simultaneamente
+            (por padrão, 100).
+        timeout: float
+            tempo máximo, em segundos, de espera por dados de uma resposta
+            (por padrão, 30).
+        """
+        configure = getattr(self.client, 'configure', None)
+        if configure is not None:
+            configure(pool_size, timeout)
+            return
+
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._semaphore = None
+
+    def limit_rate(self, requests_per_second: float = None,
+                   bytes_per_second: float = None):
+        """Limita a taxa de requisições e de bytes baixados por esta
+        instância, somando todas as tarefas simultâneas; as esperas usam
+        asyncio.sleep.
+
+        > Exemplo: limit_rate(requests_per_second=5, bytes_per_second=2e6)
+
+        Parâmetros
+        ----------
+        requests_per_second: float
+            número máximo de requisições por segundo
+            (por padrão, None, sem limite).
+        bytes_per_second: float
+            número máximo de bytes baixados por segundo
+            (por padrão, None, sem limite).
+        """
+        self.request_limiter = None
+        if requests_per_second:
+            self.request_limiter = AsyncTokenBucket(requests_per_second)
+
+        self.bandwidth_limiter = None
+        if bytes_per_second:
+            self.bandwidth_limiter = AsyncTokenBucket(bytes_per_second)
+
+    def connection_stats(self) -> dict:
+        """Retorna quantas requisições foram feitas, quantas conexões
+        foram abertas e quantas requisições reaproveitaram conexões, de
+        acordo com o cliente HTTP (ver AiohttpClient.stats).
+        """
+        stats = getattr(self.client, 'stats', None)
+        if stats is None:
+            raise NotImplementedError(
+                'O cliente HTTP não informa as estatísticas das conexões'
+            )
+        return stats()
+
+    @property
+    def available_packages(self) -> list:
+        return Env._catalogs.get((self.url_action, 'package_list')) or []
+
+    @property
+    def available_groups(self) -> list:
+        return Env._catalogs.get((self.url_action, 'group_list')) or []
+
+    @property
+    def available_tags(self) -> list:
+        return Env._catalogs.get((self.url_action, 'tag_list')) or []
+
+    def _limit(self) -> asyncio.Semaphore:
+        """Retorna o semáforo que limita as requisições simultâneas no
+        laço de eventos atual."""
+        loop = asyncio.get_event_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            limit = self.max_concurrency
+            if self.pool_size is not None:
+                limit = min(limit, self.pool_size)
+            self._semaphore = asyncio.Semaphore(limit)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _run_blocking(self, function, *args):
+        """Executa a função bloqueante (disco, cache ou armazenamento) no
+        executor padrão do laço de eventos."""
+        return await asyncio.get_event_loop().run_in_executor(
+            None, function, *args
+        )
+
+    async def _throttle_request_async(self):
+        """Aguarda o limite de requisições por segundo, se houver."""
+        if self.request_limiter is not None:
+            await self.request_limiter.acquire()
+
+    async def _throttle_bytes_async(self, size: int):
+        """Aguarda o limite de bytes por segundo, se houver."""
+        if self.bandwidth_limiter is not None:
+            await self.bandwidth_limiter.acquire(size)
+
+    async def _wait_response(self, coroutine, activity: list = None):
+        """Aguarda a requisição, com o timeout de configure_session se o
+        cliente não tiver o seu próprio.
+
+        Parâmetros
+        ----------
+        coroutine: coroutine
+            a requisição.
+        activity: list
+            lista cujo primeiro item é o instante (time.monotonic) do
+            último bloco recebido, a partir do qual o timeout é contado
+            (por padrão, None, o início da espera).
+        """
+        if self.timeout is None:
+            return await coroutine
+
+        task = asyncio.ensure_future(coroutine)
+        activity = activity or [time.monotonic()]
+        try:
+            while True:
+                remaining = activity[0] + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                done, _ = await asyncio.wait([task], timeout=remaining)
+                if done:
+                    return task.result()
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    async def _gather(self, coroutines: list) -> list:
+        """Executa as corrotinas simultaneamente e retorna os seus
+        resultados; se uma delas falhar, cancela e aguarda as demais antes
+        de propagar o erro."""
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _get_json(self, url: str):
+        """Realiza a requisição desejada e retorna a resposta em json,
+        usando o cache em disco se ele estiver ativado."""
+        if self.cache is not None:
+            cached = await self._run_blocking(self.cache.get, url)
+            if cached is not None:
+                return cached
+
+        async with self._limit():
+            await self._throttle_request_async()
+            start = time.monotonic()
+            response = await self._wait_response(self.client.get_json(url))
+            self._emit('on_metadata', url, time.monotonic() - start)
+
+        if self.cache is not None:
+            await self._run_blocking(self.cache.set, url, response)
+        return response
+
+    async def _load_catalog(self, option: str) -> list:
+        """Consulta o catálogo desejado e o guarda para todo o processo."""
+        response = await self._get_json(self.url_action + option)
+        self._set_catalog(option, response['result'])
+        return response['result']
+
+    async def _catalog_async(self, option: str) -> list:
+        """Retorna o catálogo desejado, consultando-o se ainda não foi
+        carregado no processo."""
+        catalog = Env._catalogs.get((self.url_action, option))
+        if catalog is None:
+            catalog = await self._load_catalog(option)
+        return catalog
+
+    async def load_packages(self) -> list:
+        """Atualiza e retorna a lista de pacotes disponíveis."""
+        return await self._load_catalog('package_list')
+
+    async def load_groups(self) -> list:
+        """Atualiza e retorna a lista de grupos disponíveis."""
+        return await self._load_catalog('group_list')
+
+    async def load_tags(self) -> list:
+        """Atualiza e retorna a lista de etiquetas disponíveis."""
+        return await self._load_catalog('tag_list')
+
+    async def download_package(self, name: str, path: str = os.getcwd(),
+                               dictionary: bool = True,
+                               years: list = None) -> dict:
+        """Baixa o pacote de dados em uma pasta com o seu nome.
+
+        > Exemplo: await download_package('acervo-biblioteca')
+
+        Parâmetros
+        ----------
+        name: str
+            nome do pacote.
+        path: str
+            o caminho da pasta onde serão adicionados os arquivos
+            (por padrão, a pasta atual).
+        dictionary: bool
+            flag para baixar o dicionário dos dados (por padrão, True).
+        years: list
+            define os anos dos dados que serão baixados, se existir
+            realiza-se o download; aceita também range ou uma tupla
+            (início, fim), com os dois anos inclusive.
+
+        Retorno
+        ----------
+        dict:
+            resumo do download do pacote, ou None se ele não foi encontrado.
+            Se a consulta ao pacote falhar, o resumo traz a falha em
+            'failed', com o nome do pacote, e um DownloadResult sem
+            recurso em 'results'.
+        """
+        if self.warnings:
+            if name not in await self._catalog_async('package_list'):
+                self._print_not_found(name, 'Pacote')
+                return None
+
+        path = '{}/{}'.format(path, name)
+        summary = {
+            'package': name, 'path': path,
+            'downloaded': [], 'unchanged': [], 'failed': {}, 'results': []
+        }
+        try:
+            response = await self._get_json(self.url_package + name)
+            resources = self.filter_resources(
+                response['resources'], dictionary, years,
+                (self.url_package + name, response.get('metadata_modified'))
+            )
+        except Exception as ex:
+            self._emit('on_error', self.url_package + name, ex)
+            summary['failed'][name] = ex
+            summary['results'].append(
+                DownloadResult(name, None, 'failed', path, exception=ex)
+            )
+            return summary
+
+        self._make_dir(path)
+        results = await asyncio.gather(
+            *[self._download(path, resource) for resource in resources],
+            return_exceptions=True
+        )
+
+        for resource, result in zip(resources, results):
+            if isinstance(result, BaseException):
+                # O erro já foi emitido por _download
+                summary['failed'][resource['name']] = result
+                result = DownloadResult(
+                    name, resource, 'failed', self._file_path(path, resource),
+                    exception=result
+                )
+            else:
+                summary['downloaded'].append(result.path)
+            summary['results'].append(result)
+
+        return summary
+
+    async def download_packages(self, packages: list,
+                                path: str = os.getcwd(),
+                                dictionary: bool = True,
+                                years: list = None) -> list:
+        """Baixa os pacotes de dados desejados simultaneamente.
+
+        > Exemplo: await download_packages(['discentes', 'docentes'])
+
+        Retorno
+        ----------
+        list:
+            lista com o resumo do download de cada pacote.
+        """
+        summaries = await self._gather([
+            self.download_package(package, path, dictionary, years)
+            for package in packages
+        ])
+        return [summary for summary in summaries if summary is not None]
+
+    async def download_all(self, path: str = os.getcwd(),
+                           dictionary: bool = True,
+                           years: list = None) -> list:
+        """Baixa todos os pacotes de dados disponíveis.
+
+        Retorno
+        ----------
+        list:
+            lista com o resumo do download de cada pacote.
+        """
+        packages = await self._catalog_async('package_list')
+        return await self.download_packages(packages, path, dictionary, years)
+
+    async def download_group(self, name: str, path: str = os.getcwd(),
+                             dictionary: bool = True,
+                             years: list = None) -> list:
+        """Baixa os pacotes do grupo em uma pasta com o nome do grupo.
+
+        > Exemplo: await download_group('pessoas')
+
+        Retorno
+        ----------
+        list:
+            lista com o resumo do download de cada pacote do grupo.
+        """
+        if self.warnings:
+            if name not in await self._catalog_async('group_list'):
+                self._print_not_found(name, 'Grupo')
+                return []
+
+        group = await self._get_json(self.url_group + name)
+        path = self._make_dir('{}/{}'.format(path, name))
+        return await self.download_packages(
+            group['packages'], path, dictionary, years
+        )
+
+    async def download_groups(self, groups: list, path: str = os.getcwd(),
+                              dictionary: bool = True,
+                              years: list = None) -> list:
+        """Baixa os grupos de pacotes desejados simultaneamente.
+
+        Retorno
+        ----------
+        list:
+            lista com o resumo do download de cada pacote dos grupos.
+        """
+        results = await self._gather([
+            self.download_group(group, path, dictionary, years)
+            for group in groups
+        ])
+        return [summary for result in results for summary in result]
+
+    async def search_by_tag(self, tag: str) -> list:
+        """Busca pacotes com base em etiqueta, consultando as etiquetas
+        semelhantes simultaneamente.
+
+        Parâmetros
+        ----------
+        tag: str
+            etiqueta desejada
+
+        Retorno
+        ----------
+        list:
+            os pacotes das etiquetas encontradas, sem repetições.
+        """
+        tags = self.search_similar(
+            tag, await self._catalog_async('tag_list'), False
+        )
+        # Imprime exceção se não houver pacotes
+        if not len(tags) and self.warnings:
+            self._print_not_relation(tag, 'Tag')
+
+        responses = await self._gather([
+            self._get_json(self.url_tag + '/' + key) for key in tags
+        ])
+        packages = []
+        for response in responses:
+            for package in response:
+                if package not in packages:
+                    packages.append(package)
+
+        return packages
+
+    async def _download(self, path: str,
+                        resource: dict) -> DownloadResult:
+        """Baixa o recurso para a pasta desejada através de um arquivo
+        .part, removido se o download falhar ou for cancelado.
+
+        Os blocos são gravados no executor padrão do laço de eventos, um
+        de cada vez e na ordem recebida. Com um armazenamento ativado
+        (use_store), o SHA-256 é calculado durante a gravação e o arquivo
+        é entregue ao armazenamento ao terminar.
+
+        Retorno
+        ----------
+        DownloadResult:
+            o resultado do download.
+        """
+        file_path = self._file_path(path, resource)
+        part_path = file_path + '.part'
+
+        async with self._limit():
+            await self._throttle_request_async()
+            self._emit('on_task_start', file_path, resource['url'])
+            start = time.monotonic()
+            received = [0]
+            activity = [start]
+            digest = hashlib.sha256() if self.store is not None else None
+
+            def write_chunk(f, chunk):
+                f.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+
+            try:
+                f = await self._run_blocking(open, part_path, 'wb')
+
+                async def write(chunk):
+                    activity[0] = time.monotonic()
+                    await self._throttle_bytes_async(len(chunk))
+                    await self._run_blocking(write_chunk, f, chunk)
+                    received[0] += len(chunk)
+                    self._emit('on_bytes', file_path, received[0], None)
+
+                try:
+                    headers = await self._wait_response(self.client.download(
+                        resource['url'], write, self.chunk_size,
+                        {'Accept-Encoding': 'identity'}
+                    ), activity)
+                finally:
+                    await self._run_blocking(f.close)
+                lengths = [
+                    value for key, value in headers.items()
+                    if key.lower() == 'content-length'
+                ]
+                if lengths and int(lengths[0]) != received[0]:
+                    raise odufrDownloadError()
+                await self._run_blocking(os.replace, part_path, file_path)
+                if digest is not None:
+                    await self._run_blocking(
+                        self.store.add, file_path, digest.hexdigest()
+                    )
+            except BaseException as ex:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                if isinstance(ex, Exception):
+                    self._emit('on_error', file_path, ex)
+                raise
+
+            duration = time.monotonic() - start
+            self._emit('on_task_end', file_path, received[0], duration)
+
+        return DownloadResult(
+            os.path.basename(path), resource, 'downloaded', file_path,
+            received[0], duration
+        )
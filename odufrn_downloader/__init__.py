@@ -1 +1,2 @@
 from .ODUFRNDownloader import ODUFRNDownloader
+from .AsyncODUFRNDownloader import AsyncODUFRNDownloader
@@ -8,3 +8,9 @@ class odufrIOError(odufrException):
     def __init__(self):
         default_message = 'odufrIOError Exception!'
         super().__init__()
+
+
+class odufrDownloadError(odufrException):
+    def __init__(self):
+        default_message = 'odufrDownloadError Exception!'
+        super().__init__()
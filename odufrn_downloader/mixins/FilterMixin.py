@@ -5,3 +5,43 @@ from .filters.YearsMixin import YearsMixin
 
 class FilterMixin(LevenshteinMixin, SimpleSearchMixin, YearsMixin):
     """Mixin que engloba os métodos de filtros."""
+
+    def filter_resources(self, resources: list, dictionary: bool = True,
+                         years: list = None, key=None) -> list:
+        """Seleciona os recursos de um pacote que devem ser baixados.
+
+        Parâmetros
+        ----------
+        resources: list
+            recursos do pacote, como retornados pela API.
+        dictionary: bool
+            flag para manter o dicionário dos dados (por padrão, True).
+        years: list
+            anos dos dados que serão mantidos (por padrão, todos); aceita
+            também range ou uma tupla (início, fim).
+        key:
+            identificação da versão do pacote, usada para reaproveitar o
+            índice de anos dos recursos (por padrão, não reaproveita).
+
+        Retorno
+        ----------
+        list:
+            os recursos selecionados.
+        """
+        years = self.compile_years(years)
+        if years is not None:
+            index = self.years_index(resources, key)
+            dated = set()
+            for year in years:
+                dated.update(index.get(year, ()))
+
+        selected = []
+        for position, resource in enumerate(resources):
+            if 'Dicion' in resource['name']:
+                if not dictionary:
+                    continue
+            elif years is not None and position not in dated:
+                continue
+            selected.append(resource)
+
+        return selected
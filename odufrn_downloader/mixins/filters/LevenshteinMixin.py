@@ -1,6 +1,17 @@
+import threading
+from collections import OrderedDict
+from ...utils.SearchIndex import SearchIndex
+
+
 class LevenshteinMixin:
     """Mixin relacionado ao calculo de similaridade entre duas palavras."""
 
+    """Índices de busca das listas pesquisadas recentemente, compartilhados
+    por todas as instâncias do processo"""
+    _search_indexes = OrderedDict()
+    _search_indexes_size = 8
+    _search_indexes_lock = threading.Lock()
+
     def levenshtein(self, str1: list, str2: list) -> float:
         """Calcula a similaridade entre duas palavras de acordo com a
         distância de Levenshtein.
@@ -51,20 +62,82 @@ class LevenshteinMixin:
 
         Retorno
         -------
-        lista de valores com nome similares à palavra de interesse.
+        lista de valores com nome similares à palavra de interesse, na
+        ordem da input_list e sem repetições.
+        """
+        return self.search_index(input_list, split).search(keyword)
+
+    def rank_similar(self, keyword: str, input_list: list, k: int = 10,
+                     split: bool = True) -> list:
+        """Busca na input_list os k elementos com nomes mais semelhantes
+        à keyword recebida.
+
+        Parâmetros
+        ----------
+        keyword: str
+            palavra-chave com a qual será feita a busca.
+        input_list: list
+            lista com os valores que irá verificar a similaridade com keyword.
+        k: int
+            quantidade máxima de valores retornados.
+        split: bool
+            flag que indica se a palavra-chave deve ser dividida.
+
+        Retorno
+        -------
+        lista de pares (valor, razão), do mais ao menos semelhante.
+        """
+        return self.search_index(input_list, split).top(keyword, k)
+
+    def search_similar_batch(self, keywords: list, input_list: list,
+                             split: bool = True) -> dict:
+        """Busca na input_list os elementos com nomes semelhantes a cada
+        uma das keywords recebidas, usando o mesmo índice para todas.
+
+        Parâmetros
+        ----------
+        keywords: list
+            palavras-chave com as quais será feita a busca.
+        input_list: list
+            lista com os valores que irá verificar a similaridade.
+        split: bool
+            flag que indica se a palavra-chave deve ser dividida.
+
+        Retorno
+        -------
+        dicionário com a lista de pares (valor, razão) de cada palavra-chave.
         """
-        str1 = list(keyword)
-        filter_list = []
-
-        for item in input_list:
-            items = item.split('-') if split else [item]
-            for word in items:
-                ratio = self.levenshtein(str1, list(word))
-                if ratio > 0.87:
-                    filter_list.append(item)
-                    continue
-
-        return filter_list
+        return self.search_index(input_list, split).batch_search(keywords)
+
+    def search_index(self, input_list: list,
+                     split: bool = True) -> SearchIndex:
+        """Retorna o índice de busca da lista, construindo-o apenas na
+        primeira busca feita sobre ela.
+
+        Parâmetros
+        ----------
+        input_list: list
+            lista com os valores que serão indexados.
+        split: bool
+            flag que indica se os valores devem ser divididos em palavras.
+        """
+        key = (id(input_list), split)
+        with LevenshteinMixin._search_indexes_lock:
+            index = LevenshteinMixin._search_indexes.get(key)
+            if index is not None and index.items is input_list and \
+                    index.size == len(input_list):
+                LevenshteinMixin._search_indexes.move_to_end(key)
+                return index
+
+        # O índice é construído fora da trava, que só protege o cache
+        index = SearchIndex(input_list, split)
+        with LevenshteinMixin._search_indexes_lock:
+            LevenshteinMixin._search_indexes[key] = index
+            while len(LevenshteinMixin._search_indexes) > \
+                    LevenshteinMixin._search_indexes_size:
+                LevenshteinMixin._search_indexes.popitem(last=False)
+
+        return index
 
     def str_related(self, related_packages: list):
         """Formata mensagem de lista com buscas relacionadas.
@@ -1,3 +1,7 @@
+import heapq
+from operator import itemgetter
+
+
 class SimpleSearchMixin:
     """Mixin relacionado ao calculo de similaridade entre duas palavras."""
 
@@ -22,3 +26,31 @@ class SimpleSearchMixin:
                 filter_list.append(item)
 
         return filter_list
+
+    def simple_rank(self, keyword: str, input_list: list,
+                    k: int = 10) -> list:
+        """Busca na input_list os k elementos que contêm a keyword e nos
+        quais ela ocupa a maior parte do nome.
+
+        Parâmetros
+        ----------
+        keyword: str
+            palavra-chave com a qual será feita a busca.
+        input_list: list
+            lista com os valores que irá verificar a similaridade com keyword.
+        k: int
+            quantidade máxima de valores retornados.
+
+        Retorno
+        -------
+        lista de pares (valor, razão), do mais ao menos semelhante. A razão
+        é a fração do nome ocupada pela keyword.
+        """
+        scored = []
+        seen = set()
+        for item in input_list:
+            if keyword in item and item not in seen:
+                seen.add(item)
+                scored.append((item, len(keyword) / len(item)))
+
+        return heapq.nlargest(k, scored, key=itemgetter(1))
@@ -1,7 +1,46 @@
+import re
+import threading
+from collections import OrderedDict
+
+# Anos de quatro dígitos que não fazem parte de um número maior
+YEAR_PATTERN = re.compile(r'(?<!\d)(\d{4})(?!\d)')
+
+
 class YearsMixin:
     """Mixin que adiciona métodos relacionados a filtragem
     de pacotes e grupos por anos"""
 
+    """Índices de anos dos recursos dos pacotes consultados recentemente,
+    compartilhados por todas as instâncias do processo"""
+    _years_indexes = OrderedDict()
+    _years_indexes_size = 256
+    _years_indexes_lock = threading.Lock()
+
+    def compile_years(self, years) -> frozenset:
+        """Converte os anos recebidos no filtro usado pelos downloads.
+
+        Parâmetros
+        ----------
+        years: list, range ou tuple
+            anos desejados. Uma tupla (início, fim) indica todos os anos
+            entre início e fim, inclusive.
+
+        Retorno
+        ----------
+        frozenset:
+            os anos como textos, ou None se não houver filtro. Um filtro
+            já convertido é retornado sem alterações.
+        """
+        if years is None or isinstance(years, frozenset):
+            return years
+
+        if isinstance(years, int):
+            years = [years]
+        elif isinstance(years, tuple) and len(years) == 2:
+            years = range(int(years[0]), int(years[1]) + 1)
+
+        return frozenset(str(year) for year in years)
+
     def year_find(self, package_name: str, years: list = None) -> bool:
         """Verifica se o pacote pertence a uma ano específico da lista years.
 
@@ -17,8 +56,49 @@ class YearsMixin:
         bool
             True se o ano foi encontrado no nome do pacote se não false."""
 
+        years = self.compile_years(years)
         if years:
-            for _, year in enumerate(years):
-                if str(year) in package_name:
+            for year in YEAR_PATTERN.findall(package_name):
+                if year in years:
                     return True
         return False
+
+    def years_index(self, resources: list, key=None) -> dict:
+        """Agrupa os recursos de um pacote pelos anos presentes em seus
+        nomes.
+
+        Parâmetros
+        ----------
+        resources: list
+            recursos do pacote, como retornados pela API.
+        key:
+            identificação da versão do pacote. Se informada, o índice é
+            guardado e reaproveitado nas próximas chamadas, desde que os
+            nomes dos recursos sejam os mesmos.
+
+        Retorno
+        ----------
+        dict:
+            para cada ano, as posições dos recursos em resources.
+        """
+        names = tuple(resource['name'] for resource in resources)
+        if key is not None:
+            with YearsMixin._years_indexes_lock:
+                cached = YearsMixin._years_indexes.get(key)
+                if cached is not None and cached[0] == names:
+                    YearsMixin._years_indexes.move_to_end(key)
+                    return cached[1]
+
+        index = {}
+        for position, name in enumerate(names):
+            for year in set(YEAR_PATTERN.findall(name)):
+                index.setdefault(year, []).append(position)
+
+        if key is not None:
+            with YearsMixin._years_indexes_lock:
+                YearsMixin._years_indexes[key] = (names, index)
+                while len(YearsMixin._years_indexes) > \
+                        YearsMixin._years_indexes_size:
+                    YearsMixin._years_indexes.popitem(last=False)
+
+        return index
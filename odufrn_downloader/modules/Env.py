@@ -1,7 +1,16 @@
 from abc import ABC
-import requests
 import os
 import pprint
+import threading
+import time
+from ..utils.CompressedFile import CompressedFile
+from ..utils.ContentStore import ContentStore
+from ..utils.DownloadListener import DownloadListener
+from ..utils.MetadataCache import MetadataCache
+from ..utils.PooledSession import PooledSession
+from ..utils.ProgressPrinter import ProgressPrinter
+from ..utils.TokenBucket import TokenBucket
+from ..utils.WorkerPool import WorkerPool
 
 
 class Env(ABC):
@@ -14,6 +23,28 @@ class Env(ABC):
         a url para a API de dados abertos da UFRN.
     url_action: str
         a url para a página de ações da API.
+    max_workers: int
+        número padrão de downloads simultâneos (por padrão, 1).
+    max_host_connections: int
+        número máximo de conexões simultâneas para um mesmo servidor.
+    chunk_size: int
+        tamanho, em bytes, dos blocos gravados durante o download.
+    session: PooledSession
+        sessão HTTP usada em todas as requisições do pacote.
+    cache: MetadataCache
+        cache em disco das respostas de metadados (por padrão, None,
+        desativado).
+    store: ContentStore
+        armazenamento dos arquivos pelo conteúdo, que guarda uma única
+        cópia de arquivos iguais (por padrão, None, desativado).
+    request_limiter: TokenBucket
+        limite de requisições por segundo (por padrão, None, sem limite).
+    bandwidth_limiter: TokenBucket
+        limite de bytes baixados por segundo (por padrão, None, sem
+        limite).
+    listeners: list
+        ouvintes dos eventos dos downloads (por padrão, um
+        ProgressPrinter).
     """
 
     """Constante com mensagens de erros"""
@@ -26,10 +57,28 @@ class Env(ABC):
         'none_package': 'Nenhum pacote foi encontrado',
     }
 
+    """Catálogos (listas de pacotes, grupos e etiquetas) compartilhados
+    por todas as instâncias do processo"""
+    _catalogs = {}
+    _catalogs_lock = threading.Lock()
+    """Travas de cada catálogo, usadas durante a consulta à API"""
+    _catalog_locks = {}
+    """Eventos adiados da thread que está consultando um catálogo"""
+    _catalog_events = threading.local()
+
     def __init__(self):
         self.url_base = 'http://dados.ufrn.br/'
         self.url_action = self.url_base + 'api/action/'
         self.warnings = False
+        self.max_workers = 1
+        self.max_host_connections = 4
+        self.chunk_size = 1024 * 1024
+        self.session = PooledSession()
+        self.cache = None
+        self.store = None
+        self.request_limiter = None
+        self.bandwidth_limiter = None
+        self.listeners = [ProgressPrinter()]
 
     def _print_exception(self, ex: Exception,
                          msg: str = MSG_ERRORS['download_error']):
@@ -54,19 +103,236 @@ class Env(ABC):
         pp = pprint.PrettyPrinter(indent=4)
         pp.pprint(variable)
 
-    def _load_list(self, option: str) -> list:
+    def _load_list(self, option: str, refresh: bool = False) -> list:
         """Atualiza a lista desejada através de uma consulta.
 
         Parâmetros
         ----------
         option: str
             indica o que se deseja consultar pelo request.
+        refresh: bool
+            flag para ignorar o cache em disco (por padrão, False).
         """
         try:
-            packages = requests.get(self.url_action + option).json()
+            packages = self._request_get(self.url_action + option, refresh)
             return packages['result']
         except Exception as ex:
-            self._print_exception(ex)
+            self._emit('on_error', self.url_action + option, ex)
+
+    def configure_session(self, pool_size: int = 10, timeout: float = 30,
+                          retries: int = 3, backoff_factor: float = 0.5):
+        """Configura a sessão HTTP compartilhada pelo pacote.
+
+        > Exemplo: configure_session(pool_size=16, timeout=60)
+
+        Parâmetros
+        ----------
+        pool_size: int
+            número máximo de conexões mantidas abertas por servidor
+            (por padrão, 10).
+        timeout: float
+            tempo máximo, em segundos, de espera por uma resposta
+            (por padrão, 30).
+        retries: int
+            número de novas tentativas em falhas de conexão e
+            respostas 5xx (por padrão, 3).
+        backoff_factor: float
+            fator do intervalo exponencial entre as tentativas
+            (por padrão, 0.5).
+        """
+        self.session.configure(pool_size, timeout, retries, backoff_factor)
+
+    def use_cache(self, path: str = None, ttls: dict = None,
+                  max_size: int = 64 * 1024 * 1024) -> MetadataCache:
+        """Ativa o cache em disco das consultas de metadados.
+
+        > Exemplo: use_cache(ttls={'dataset': 24 * 3600})
+
+        Parâmetros
+        ----------
+        path: str
+            a pasta onde será guardado o cache
+            (por padrão, ~/.cache/odufrn_downloader).
+        ttls: dict
+            tempo de vida, em segundos, das respostas de cada endpoint
+            ('package_list', 'group_list', 'tag_list', 'dataset',
+            'group', 'tag', 'package_search' ou 'default').
+        max_size: int
+            tamanho máximo, em bytes, das respostas guardadas
+            (por padrão, 64 MiB).
+
+        Retorno
+        ----------
+        MetadataCache:
+            o cache ativado.
+        """
+        self.cache = MetadataCache(path, ttls, max_size)
+        return self.cache
+
+    def use_store(self, path: str) -> ContentStore:
+        """Ativa o armazenamento dos arquivos pelo conteúdo: o SHA-256 de
+        cada arquivo é calculado durante o download e arquivos de mesmo
+        conteúdo passam a ser hard links para uma única cópia.
+
+        > Exemplo: use_store('dados/.odufrn-store')
+
+        Parâmetros
+        ----------
+        path: str
+            a pasta do armazenamento, que deve estar no mesmo sistema de
+            arquivos das pastas dos downloads.
+
+        Retorno
+        ----------
+        ContentStore:
+            o armazenamento ativado.
+        """
+        self.store = ContentStore(path)
+        return self.store
+
+    def limit_rate(self, requests_per_second: float = None,
+                   bytes_per_second: float = None):
+        """Limita a taxa de requisições e de bytes baixados por esta
+        instância, somando todas as threads dos downloads simultâneos.
+
+        > Exemplo: limit_rate(requests_per_second=5, bytes_per_second=2e6)
+
+        Parâmetros
+        ----------
+        requests_per_second: float
+            número máximo de requisições por segundo
+            (por padrão, None, sem limite).
+        bytes_per_second: float
+            número máximo de bytes baixados por segundo
+            (por padrão, None, sem limite).
+        """
+        self.request_limiter = None
+        if requests_per_second:
+            self.request_limiter = TokenBucket(requests_per_second)
+
+        self.bandwidth_limiter = None
+        if bytes_per_second:
+            self.bandwidth_limiter = TokenBucket(bytes_per_second)
+
+    def add_listener(self, listener: DownloadListener) -> DownloadListener:
+        """Adiciona um ouvinte dos eventos dos downloads.
+
+        > Exemplo: add_listener(MetricsCollector())
+
+        Parâmetros
+        ----------
+        listener: DownloadListener
+            o ouvinte, que recebe os eventos de início, bytes recebidos,
+            novas tentativas, fim e erro de cada arquivo e as consultas
+            de metadados.
+
+        Retorno
+        ----------
+        DownloadListener:
+            o ouvinte adicionado.
+        """
+        self.listeners.append(listener)
+        return listener
+
+    def remove_listener(self, listener: DownloadListener):
+        """Remove um ouvinte dos eventos dos downloads.
+
+        Parâmetros
+        ----------
+        listener: DownloadListener
+            o ouvinte a ser removido.
+        """
+        self.listeners.remove(listener)
+
+    def _emit(self, event: str, *args):
+        """Envia o evento a todos os ouvintes."""
+        events = getattr(Env._catalog_events, 'events', None)
+        if events is not None:
+            events.append((event, args))
+            return
+        for listener in self.listeners:
+            getattr(listener, event)(*args)
+
+    def _throttle_request(self):
+        """Aguarda o limite de requisições por segundo, se houver."""
+        if self.request_limiter is not None:
+            self.request_limiter.acquire()
+
+    def _throttle_bytes(self, size: int):
+        """Aguarda o limite de bytes por segundo, se houver."""
+        if self.bandwidth_limiter is not None:
+            self.bandwidth_limiter.acquire(size)
+
+    def connection_stats(self) -> dict:
+        """Retorna quantas requisições foram feitas, quantas conexões
+        foram abertas e quantas requisições reaproveitaram conexões.
+        """
+        return self.session.stats()
+
+    def _worker_pool(self, workers: int = None) -> WorkerPool:
+        """Cria o conjunto de trabalhadores usado nos downloads.
+
+        Parâmetros
+        ----------
+        workers: int
+            número de downloads simultâneos (por padrão, max_workers).
+        """
+        return WorkerPool(
+            workers or self.max_workers, self.max_host_connections
+        )
+
+    def _catalog(self, option: str, refresh: bool = False) -> list:
+        """Retorna o catálogo desejado, consultando a API apenas no
+        primeiro acesso do processo ou quando refresh for True.
+
+        Parâmetros
+        ----------
+        option: str
+            indica o que se deseja consultar pelo request.
+        refresh: bool
+            flag para consultar a API novamente (por padrão, False).
+
+        Retorno
+        ----------
+        list:
+            o catálogo, ou uma lista vazia se a consulta falhou.
+        """
+        key = (self.url_action, option)
+        with Env._catalogs_lock:
+            catalog = Env._catalogs.get(key)
+            lock = Env._catalog_locks.setdefault(key, threading.Lock())
+        if catalog is not None and not refresh:
+            return catalog
+
+        # A consulta só bloqueia quem espera pelo mesmo catálogo, e os
+        # eventos são enviados depois de liberar a trava, para que os
+        # ouvintes possam acessar os catálogos
+        Env._catalog_events.events = events = []
+        try:
+            with lock:
+                with Env._catalogs_lock:
+                    catalog = Env._catalogs.get(key)
+                if refresh or catalog is None:
+                    catalog = self._load_list(option, refresh)
+                    with Env._catalogs_lock:
+                        Env._catalogs[key] = catalog
+        finally:
+            Env._catalog_events.events = None
+
+        for event, args in events:
+            self._emit(event, *args)
+        return catalog or []
+
+    def _catalog_loaded(self, option: str) -> bool:
+        """Indica se a última consulta ao catálogo desejado deu certo, ou
+        seja, se uma lista vazia retornada por _catalog é mesmo vazia."""
+        with Env._catalogs_lock:
+            return Env._catalogs.get((self.url_action, option)) is not None
+
+    def _set_catalog(self, option: str, value: list):
+        """Substitui o catálogo compartilhado pelo valor recebido."""
+        with Env._catalogs_lock:
+            Env._catalogs[(self.url_action, option)] = value
 
     def _make_dir(self, path: str) -> str:
         """Cria o diretório, caso ele não exista.
@@ -80,19 +346,44 @@ class Env(ABC):
 
         return path
 
-    def _request_get(self, url: str) -> dict:
+    def _file_path(self, path: str, resource: dict,
+                   compression: str = None) -> str:
+        """Retorna o caminho onde o arquivo do recurso é salvo."""
+        return '{}/{}.{}{}'.format(
+            path, resource['name'], resource['format'].lower(),
+            CompressedFile.suffix(compression)
+        )
+
+    def _request_get(self, url: str, refresh: bool = False) -> dict:
         """Realiza a requisição desejada e retorna os dados
         e o caminho formado para download.
 
+        Se o cache estiver ativado, a resposta guardada é usada enquanto
+        não expirar.
+
         Parâmetros
         ----------
         url: str
             a url que se deseja realizar a requisição.
+        refresh: bool
+            flag para ignorar o cache em disco (por padrão, False).
 
         Retorno
         ----------
         dict:
             a resposta da requisição em json (dicionário)."""
-        request_get = requests.get(url)
+        if self.cache is not None and not refresh:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+
+        self._throttle_request()
+        start = time.monotonic()
+        request_get = self.session.get(url)
+        response = request_get.json()
+        self._emit('on_metadata', url, time.monotonic() - start)
+
+        if self.cache is not None and request_get.ok:
+            self.cache.set(url, response)
 
-        return request_get.json()
+        return response
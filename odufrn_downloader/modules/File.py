@@ -10,7 +10,10 @@ class File(Package):
         super().__init__()
 
     def download_from_file(self, filename: str, path: str = os.getcwd(),
-                           dictionary: bool = True, years: list = None):
+                           dictionary: bool = True, years: list = None,
+                           workers: int = None, sync: bool = False,
+                           shard_index: int = None,
+                           shard_count: int = None) -> list:
         """Baixa os pacotes de dados que estão escritos
         em um arquivo de texto.
 
@@ -27,13 +30,32 @@ class File(Package):
             flag para baixar o dicionário dos dados (por padrão, True).
         years: list
             define os anos dos dados que serão baixados, se existir
-            realiza-se o download
+            realiza-se o download; aceita também range ou uma tupla
+            (início, fim), com os dois anos inclusive.
+        workers: int
+            número de arquivos baixados simultaneamente
+            (por padrão, max_workers).
+        sync: bool
+            flag para baixar apenas os recursos que mudaram desde o último
+            download (por padrão, False).
+        shard_index: int
+            a parte dos arquivos baixada por esta máquina, de 0 a
+            shard_count - 1 (por padrão, None, todos os arquivos).
+        shard_count: int
+            o número de máquinas entre as quais os arquivos são divididos
+            (por padrão, None).
+
+        Retorno
+        ----------
+        list:
+            lista com o resumo do download de cada pacote.
         """
         try:
             with open(filename, 'r') as file:
-                for packageName in file:
-                    self.download_package(
-                        packageName.rstrip(), path, dictionary, years
-                    )
+                packages = [packageName.rstrip() for packageName in file]
+            return self.download_packages(
+                packages, path, dictionary, years, workers, sync,
+                shard_index=shard_index, shard_count=shard_count
+            )
         except IOError:
             raise odufrIOError()
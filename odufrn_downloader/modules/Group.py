@@ -1,5 +1,8 @@
 import os
 from .Package import Package
+from ..utils.DownloadResult import DownloadResult
+from ..utils.ShardManifest import ShardManifest
+from odufrn_downloader.exceptions import odufrDownloadError
 
 
 class Group(Package):
@@ -11,19 +14,25 @@ class Group(Package):
         a url para a consulta de grupos de conjuntos de dados da API da UFRN.
     available_groups: list
         lista de grupos de conjuntos de dados que estão disponíveis
-        para download.
+        para download, carregada no primeiro acesso.
     """
 
     def __init__(self):
         super().__init__()
 
         self.url_group = self.url_base + 'api/rest/group/'
-        self.available_groups = []
-        self.load_groups()
+
+    @property
+    def available_groups(self) -> list:
+        return self._catalog('group_list')
+
+    @available_groups.setter
+    def available_groups(self, value: list):
+        self._set_catalog('group_list', value)
 
     def load_groups(self):
         """Atualiza lista de grupos de pacotes disponíveis."""
-        self.available_groups = self._load_list('group_list')
+        self._catalog('group_list', refresh=True)
 
     def print_groups(self):
         """Imprime os grupos de pacotes."""
@@ -48,7 +57,9 @@ class Group(Package):
         return response['packages']
 
     def download_group(self, name: str, path: str = os.getcwd(),
-                       dictionary: bool = True, years: list = None):
+                       dictionary: bool = True, years: list = None,
+                       workers: int = None, sync: bool = False,
+                       sink=None) -> list:
         """Exibe grupo de pacotes de acordo com seu nome
         e baixa-os em pastas com o nome do respectivo
         grupo de dados.
@@ -61,31 +72,47 @@ class Group(Package):
             nome do grupo.
         years: list
             define os anos dos dados que serão baixados, se existir
-            realiza-se o download.
+            realiza-se o download; aceita também range ou uma tupla
+            (início, fim), com os dois anos inclusive.
         path: str
             o caminho da pasta onde serão adicionados os arquivos
             (por padrão, a pasta atual).
         dictionary: bool
             flag para baixar o dicionário dos dados (por padrão, True).
-        """
+        workers: int
+            número de arquivos baixados simultaneamente
+            (por padrão, max_workers).
+        sync: bool
+            flag para baixar apenas os recursos que mudaram desde o último
+            download (por padrão, False).
+        sink: StorageSink
+            destino dos arquivos, como um TarSink ou ZipSink; com ele, path
+            é ignorado, os caminhos ficam dentro de sink.root e sync só
+            é aceito com um DirectorySink
+            (por padrão, None, arquivos soltos em path).
 
-        # Checa se o grupo está disponível
-        if not (name in self.available_groups) and self.warnings:
-            self._print_not_found(name, 'Grupo')
-            return
-
-        groups = self._request_get(self.url_group + name)
-        path = self._make_dir('{}/{}'.format(path, name))
-
-        try:
-            for package in groups['packages']:
-                self.download_package(package, path, dictionary, years)
-
-        except Exception as ex:
-            self._print_exception(ex)
+        Retorno
+        ----------
+        list:
+            lista com o resumo do download de cada pacote do grupo. Se a
+            consulta ao grupo falhar, a lista traz o resumo da falha, com
+            'package' None e a chave 'group', que retry_failed repete.
+        """
+        years = self.compile_years(years)
+        if sink is not None:
+            sink.check(sync)
+            path = sink.root
+        with self._worker_pool(workers) as pool:
+            pending = self._submit_group(
+                pool, name, path, dictionary, years, sync, sink
+            )
+            return self._collect_packages(pending)
 
     def download_groups(self, groups: list, path: str = os.getcwd(),
-                        dictionary: bool = True, years: list = None):
+                        dictionary: bool = True, years: list = None,
+                        workers: int = None, sync: bool = False,
+                        sink=None, shard_index: int = None,
+                        shard_count: int = None) -> list:
         """Exibe os grupos de pacotes de acordo com seu nome
         e baixa-os em pastas com o nome do respectivo
         grupo de dados.
@@ -98,16 +125,289 @@ class Group(Package):
             lista com os nomes dos grupos desejados.
         years: list
             define os anos dos dados que serão baixados, se existir
-            realiza-se o download.
+            realiza-se o download; aceita também range ou uma tupla
+            (início, fim), com os dois anos inclusive.
+        path: str
+            o caminho da pasta onde serão adicionados os arquivos
+            (por padrão, a pasta atual).
+        dictionary: bool
+            flag para baixar o dicionário dos dados (por padrão, True).
+        workers: int
+            número de arquivos baixados simultaneamente
+            (por padrão, max_workers).
+        sync: bool
+            flag para baixar apenas os recursos que mudaram desde o último
+            download (por padrão, False).
+        sink: StorageSink
+            destino dos arquivos, como um TarSink ou ZipSink; com ele, path
+            é ignorado, os caminhos ficam dentro de sink.root e sync só
+            é aceito com um DirectorySink
+            (por padrão, None, arquivos soltos em path).
+        shard_index: int
+            a parte dos arquivos baixada por esta máquina, de 0 a
+            shard_count - 1 (por padrão, None, todos os arquivos).
+        shard_count: int
+            o número de máquinas entre as quais os arquivos são divididos
+            (por padrão, None).
+
+        Retorno
+        ----------
+        list:
+            lista com o resumo do download de cada pacote dos grupos.
+            Os pacotes presentes em mais de um grupo são baixados uma
+            única vez e ligados às pastas dos demais grupos; com
+            shard_index e shard_count, cada máquina liga apenas os arquivos
+            da sua parte. Cada grupo cuja consulta falhou traz o resumo da
+            falha, como em download_group.
+        """
+        years = self.compile_years(years)
+        if sink is not None:
+            sink.check(sync)
+            path = sink.root
+        failures = []
+        resolved = self._resolve_groups(groups, workers, failures)
+        shard = None
+        responses = {}
+        if shard_index is not None or shard_count is not None:
+            # A divisão usa o tamanho dos metadados; as respostas das
+            # consultas são reaproveitadas pelos downloads
+            ShardManifest.check(shard_index, shard_count)
+            shard = ShardManifest(shard_index, shard_count, self._plan(
+                self._group_entries(resolved, path), dictionary, years,
+                head=False, responses=responses
+            ))
+        plan = []
+        sources = {}
+        with self._worker_pool(workers) as pool:
+            for group, packages in resolved:
+                group_path = self._make_dir('{}/{}'.format(path, group))
+                for package in packages:
+                    # Pacotes repetidos são baixados só no primeiro grupo
+                    if package in sources:
+                        plan.append((package, group_path, False))
+                        continue
+                    sources[package] = self._submit_package(
+                        pool, package, group_path, dictionary, years, sync,
+                        sink=sink, shard=shard,
+                        response=responses.get(package)
+                    )
+                    plan.append((package, group_path, True))
+
+            summaries = {}
+            for package, pending in sources.items():
+                for summary in self._collect_packages([pending]):
+                    summaries[package] = summary
+
+        result = []
+        for package, group_path, downloaded in plan:
+            if package not in summaries:
+                continue
+            if downloaded:
+                result.append(summaries[package])
+            else:
+                result.append(
+                    self._link_package(summaries[package], group_path, sink)
+                )
+        for group, ex in failures:
+            result.append(self._group_failure(
+                group, '{}/{}'.format(path, group), ex, dictionary, years
+            ))
+
+        if shard is not None:
+            self._save_shard(shard, result, path, sink)
+        return result
+
+    def plan_groups(self, groups: list, path: str = os.getcwd(),
+                    dictionary: bool = True, years: list = None,
+                    workers: int = None, head: bool = True):
+        """Monta o plano de download de uma lista de grupos, sem baixar
+        nenhum arquivo.
+
+        Como em download_groups, os pacotes presentes em mais de um grupo
+        são baixados só na pasta do primeiro grupo e ligados às demais.
+
+        > Exemplo: plan_groups(['biblioteca', 'ensino'])
+
+        Parâmetros
+        ----------
+        groups: list
+            lista com os nomes dos grupos desejados.
         path: str
             o caminho da pasta onde serão adicionados os arquivos
             (por padrão, a pasta atual).
         dictionary: bool
             flag para baixar o dicionário dos dados (por padrão, True).
+        years: list
+            define os anos dos dados que serão baixados; aceita também
+            range ou uma tupla (início, fim), com os dois anos inclusive.
+        workers: int
+            número de consultas simultâneas
+            (por padrão, max_host_connections).
+        head: bool
+            flag para consultar o tamanho de cada arquivo com uma
+            requisição HEAD; se False, é usado o tamanho informado nos
+            metadados (por padrão, True).
+
+        Retorno
+        ----------
+        DownloadPlan:
+            o plano, com o tamanho de cada arquivo.
         """
+        return self._plan(
+            self._group_entries(self._resolve_groups(groups, workers), path),
+            dictionary, years, workers, head
+        )
+
+    def _group_entries(self, resolved: list, path: str) -> list:
+        """Retorna as entradas do plano dos grupos já consultados, com os
+        pacotes repetidos ligados ao primeiro grupo."""
+        entries = []
+        sources = {}
+        for group, packages in resolved:
+            for package in packages:
+                package_path = '{}/{}/{}'.format(path, group, package)
+                entries.append({
+                    'group': group, 'package': package,
+                    'path': package_path, 'source': sources.get(package)
+                })
+                sources.setdefault(package, package_path)
+        return entries
 
-        for group in groups:
-            self.download_group(group, path, dictionary, years)
+    def _resolve_groups(self, groups: list, workers: int = None,
+                        failures: list = None) -> list:
+        """Consulta simultaneamente os pacotes de cada grupo.
+
+        Parâmetros
+        ----------
+        groups: list
+            nomes dos grupos desejados.
+        workers: int
+            número de grupos consultados simultaneamente
+            (por padrão, max_host_connections).
+        failures: list
+            lista que recebe os pares (grupo, exceção) dos grupos cuja
+            consulta falhou (por padrão, None).
+
+        Retorno
+        ----------
+        list:
+            pares (grupo, pacotes) dos grupos encontrados, na ordem
+            recebida e sem grupos repetidos.
+        """
+        names = []
+        for name in groups:
+            if name in names:
+                continue
+            # Checa se o grupo está disponível
+            if self.warnings and name not in self.available_groups:
+                self._print_not_found(name, 'Grupo')
+                continue
+            names.append(name)
+
+        resolved = []
+        pool = self._worker_pool(workers or self.max_host_connections)
+        with pool:
+            futures = [
+                (name, pool.submit(
+                    self.url_group, self._request_get, self.url_group + name
+                ))
+                for name in names
+            ]
+            for name, future in futures:
+                try:
+                    resolved.append((name, self._group_packages(
+                        future.result()
+                    )))
+                except Exception as ex:
+                    self._emit('on_error', self.url_group + name, ex)
+                    if failures is not None:
+                        failures.append((name, ex))
+
+        return resolved
+
+    def _submit_group(self, pool, name: str, path: str,
+                      dictionary: bool, years: list,
+                      sync: bool = False, sink=None) -> list:
+        """Agenda os downloads de todos os pacotes do grupo.
+
+        Parâmetros
+        ----------
+        pool: WorkerPool
+            conjunto de trabalhadores que executará os downloads.
+        name: str
+            nome do grupo.
+        path: str
+            o caminho da pasta onde será criada a pasta do grupo.
+        dictionary: bool
+            flag para baixar o dicionário dos dados.
+        years: list
+            define os anos dos dados que serão baixados.
+        sync: bool
+            flag para baixar apenas os recursos que mudaram.
+        sink: StorageSink
+            destino dos arquivos baixados (por padrão, None).
+
+        Retorno
+        ----------
+        list:
+            lista com os downloads agendados de cada pacote ou, se a
+            consulta ao grupo falhar, com o resumo da falha.
+        """
+        # Checa se o grupo está disponível
+        if self.warnings and name not in self.available_groups:
+            self._print_not_found(name, 'Grupo')
+            return []
+
+        path = '{}/{}'.format(path, name)
+        try:
+            packages = self._group_packages(
+                self._request_get(self.url_group + name)
+            )
+        except Exception as ex:
+            self._emit('on_error', self.url_group + name, ex)
+            return [self._group_failure(name, path, ex, dictionary, years)]
+
+        self._make_dir(path)
+        return [
+            self._submit_package(
+                pool, package, path, dictionary, years, sync, sink=sink
+            )
+            for package in packages
+        ]
+
+    @staticmethod
+    def _group_packages(response) -> list:
+        """Retorna os pacotes da resposta da consulta a um grupo."""
+        if not isinstance(response, dict) or \
+                not isinstance(response.get('packages'), list):
+            raise odufrDownloadError()
+        return response['packages']
+
+    @staticmethod
+    def _group_failure(name: str, path: str, ex: Exception,
+                       dictionary: bool, years: list) -> dict:
+        """Retorna o resumo da falha da consulta a um grupo, com o
+        DownloadResult que permite repeti-la em retry_failed."""
+        return {
+            'package': None, 'group': name, 'path': path,
+            'downloaded': [], 'unchanged': [], 'failed': {name: ex},
+            'results': [DownloadResult(
+                None, None, 'failed', path, exception=ex, options={
+                    'group': name, 'dictionary': dictionary,
+                    'years': years, 'compression': None
+                }
+            )]
+        }
+
+    def _resubmit(self, pool, result: DownloadResult, sync: bool = False,
+                  sink=None) -> list:
+        if 'group' not in result.options:
+            return super()._resubmit(pool, result, sync, sink)
+        return self._submit_group(
+            pool, result.options['group'], os.path.dirname(result.path),
+            result.options['dictionary'], result.options['years'], sync,
+            sink
+        )
 
     def search_related_groups(self, keyword: str,
                               simple_filter: bool = False) -> list:
@@ -135,6 +435,31 @@ class Group(Package):
 
         return related
 
+    def rank_related_groups(self, keyword: str, k: int = 10,
+                            simple_filter: bool = False) -> list:
+        """Procura os k grupos de pacotes com nomes mais semelhantes à
+        palavra recebida.
+
+        > Exemplo: rank_related_groups('pesquisa', 3)
+
+        Parâmetros
+        ----------
+        keyword: str
+            palavra-chave com a qual será feita a busca.
+        k: int
+            quantidade máxima de grupos retornados (por padrão, 10).
+        simple_filter: bool = False
+            indica o uso de um filtro mais simples que o Levenshtein.
+
+        Retorno
+        ----------
+        list:
+            pares (grupo, similaridade), do mais ao menos semelhante.
+        """
+        if simple_filter:
+            return self.simple_rank(keyword, self.available_groups, k)
+        return self.rank_similar(keyword, self.available_groups, k)
+
     def print_files_from_group(self, name: str):
         """Printa os arquivos dos pacotes de um grupo.
 
@@ -1,7 +1,25 @@
+import codecs
+import contextlib
+import csv
+import hashlib
+import json
 import os
+import threading
+import time
+from concurrent.futures import Future
 import requests
 from .Env import Env
 from ..mixins.FilterMixin import FilterMixin
+from ..utils.ColumnarConverter import ColumnarConverter
+from ..utils.CompressedFile import CompressedFile
+from ..utils.ContentStore import ContentStore
+from ..utils.DirectorySink import DirectorySink
+from ..utils.DownloadPlan import DownloadPlan
+from ..utils.DownloadResult import DownloadResult
+from ..utils.Manifest import Manifest
+from ..utils.ShardManifest import ShardManifest
+from ..utils.TextIndex import TextIndex
+from odufrn_downloader.exceptions import odufrDownloadError
 from .Tag import Tag
 
 
@@ -13,23 +31,53 @@ class Package(Env, FilterMixin):
     url_package: str
         a url para a consulta de pacotes da API da UFRN.
     available_packages: list
-        lista de pacotes de dados que estão disponíveis para download.
+        lista de pacotes de dados que estão disponíveis para download,
+        carregada no primeiro acesso.
     tag: Tag
         instância da classe Tag usada na classe.
     """
 
+    """Índices de texto dos metadados dos pacotes, compartilhados por todas
+    as instâncias do processo"""
+    _text_indexes = {}
+    _text_indexes_lock = threading.Lock()
+
     def __init__(self):
         super().__init__()
 
         self.url_package = self.url_base + 'api/rest/dataset/'
-        self.available_packages = []
-        self.load_packages()
-        self.tag = Tag()
+        self._tag = None
+
+    @property
+    def available_packages(self) -> list:
+        return self._catalog('package_list')
+
+    @available_packages.setter
+    def available_packages(self, value: list):
+        self._set_catalog('package_list', value)
+
+    @property
+    def tag(self) -> Tag:
+        # O próprio objeto é usado quando ele já trata etiquetas
+        if isinstance(self, Tag):
+            return self
+
+        if self._tag is None:
+            self._tag = Tag()
+        self._tag.session = self.session
+        self._tag.cache = self.cache
+        self._tag.request_limiter = self.request_limiter
+        self._tag.bandwidth_limiter = self.bandwidth_limiter
+        self._tag.listeners = self.listeners
+        return self._tag
 
     def _get_related_package_search(self, keyword: str,
                                     dictionary: bool = False) -> list:
         """Retorna packages relacionados de acordo com o nome
 
+        A busca é feita no índice de texto local (text_index), sem
+        consultar a API.
+
         Parâmetros
         ----------
         keyword: str
@@ -40,27 +88,100 @@ class Package(Env, FilterMixin):
         list_related_packages: list
             lista com os nomes relacionados a keyword passada
         """
-        url_search_related = self.url_base + 'api/action/package_search?q='
-        request = self._request_get(url_search_related + keyword)
+        index = self.text_index()
         list_related_packages = []
-        for response in request['result']['results']:
-            for res in response['resources']:
-                if not dictionary and 'Dicion' in res['name']:
+        for name in index.search(keyword):
+            for res in index.resources(name):
+                if not dictionary and 'Dicion' in res:
                     continue
-                list_related_packages.append(res['name'])
+                list_related_packages.append(res)
 
         return list_related_packages
 
+    def text_index(self, refresh: bool = False,
+                   workers: int = None) -> TextIndex:
+        """Retorna o índice de texto dos metadados dos pacotes.
+
+        O índice é atualizado aos poucos: os pacotes que saíram do
+        catálogo são removidos e apenas os que ainda não foram indexados
+        são consultados, simultaneamente e pelo cache, se ativado. Os
+        pacotes que falharem são consultados de novo no próximo acesso, e
+        se a consulta ao catálogo falhar o índice é mantido como está.
+
+        Parâmetros
+        ----------
+        refresh: bool
+            flag para consultar novamente todos os pacotes, reindexando
+            apenas os que mudaram (por padrão, False).
+        workers: int
+            número de pacotes consultados simultaneamente
+            (por padrão, max_host_connections).
+
+        Retorno
+        ----------
+        TextIndex:
+            o índice de texto.
+        """
+        with Package._text_indexes_lock:
+            index = Package._text_indexes.setdefault(
+                self.url_package, TextIndex()
+            )
+
+        names = self.available_packages
+        if self._catalog_loaded('package_list'):
+            # Sem o catálogo, não há como saber quais pacotes saíram dele
+            for name in index.names - set(names):
+                index.remove(name)
+
+        missing = [name for name in names if refresh or name not in index]
+        if missing:
+            pool = self._worker_pool(workers or self.max_host_connections)
+            with pool:
+                futures = [
+                    (name, pool.submit(
+                        self.url_package, self._request_get,
+                        self.url_package + name, refresh
+                    ))
+                    for name in missing
+                ]
+                for name, future in futures:
+                    try:
+                        self._index_package(name, future.result())
+                    except Exception:
+                        continue
+
+        return index
+
+    def _index_package(self, name: str, response: dict):
+        """Atualiza o pacote no índice de texto, caso ele já exista.
+
+        Parâmetros
+        ----------
+        name: str
+            nome do pacote.
+        response: dict
+            o json do pacote, como retornado por api/rest/dataset.
+        """
+        with Package._text_indexes_lock:
+            index = Package._text_indexes.get(self.url_package)
+
+        if index is not None and isinstance(response, dict) and \
+                'resources' in response:
+            index.add(name, response)
+
     def load_packages(self):
         """Atualiza lista de pacotes disponíveis."""
-        self.available_packages = self._load_list('package_list')
+        self._catalog('package_list', refresh=True)
 
     def print_packages(self):
         """Imprime os conjuntos de dados."""
         self._print_list("pacotes de dados", self.available_packages)
 
     def download_package(self, name: str, path: str = os.getcwd(),
-                         dictionary: bool = True, years: list = None):
+                         dictionary: bool = True, years: list = None,
+                         workers: int = None, sync: bool = False,
+                         convert: str = None, compression: str = None,
+                         sink=None) -> dict:
         """Exibe pacote de dados de acordo com seu nome
         e baixa-os em pastas com o nome do respectivo
         conjunto de dado.
@@ -78,28 +199,54 @@ class Package(Env, FilterMixin):
             flag para baixar o dicionário dos dados (por padrão, True).
         years: list
             define os anos dos dados que serão baixados, se existir
-            realiza-se o download.
+            realiza-se o download; aceita também range ou uma tupla
+            (início, fim), com os dois anos inclusive.
+        workers: int
+            número de arquivos baixados simultaneamente
+            (por padrão, max_workers).
+        sync: bool
+            flag para baixar apenas os recursos que mudaram desde o último
+            download (por padrão, False).
+        convert: str
+            'parquet' ou 'arrow' para converter os CSVs baixados para esse
+            formato, em processos separados (por padrão, None).
+        compression: str
+            'gzip' ou 'zstd' para gravar os arquivos comprimidos, com a
+            extensão .gz ou .zst (por padrão, None).
+        sink: StorageSink
+            destino dos arquivos, como um TarSink ou ZipSink; com ele, path
+            é ignorado, os caminhos ficam dentro de sink.root e sync só
+            é aceito com um DirectorySink
+            (por padrão, None, arquivos soltos em path).
+
+        Retorno
+        ----------
+        dict:
+            resumo do download do pacote, ou None se ele não foi encontrado.
         """
-        # Checa se o pacote está disponível
-        if not (name in self.available_packages) and self.warnings:
-            self._print_not_found(name, 'Pacote')
-            return
+        years = self.compile_years(years)
+        CompressedFile.check(compression)
+        if sink is not None:
+            sink.check(sync)
+            path = sink.root
+        with self._worker_pool(workers) as pool, \
+                self._converter(convert) as converter:
+            pending = self._submit_package(
+                pool, name, path, dictionary, years, sync, converter,
+                compression, sink
+            )
+            summaries = self._collect_packages(
+                [pending], converter, compression
+            )
 
-        response = self._request_get(self.url_package + name)
-        path = self._make_dir('{}/{}'.format(path, name))
-
-        try:
-            for resource in response['resources']:
-                if 'Dicion' in resource['name']:
-                    if dictionary:
-                        self._download(path, resource)
-                elif years is None or self.year_find(resource['name'], years):
-                    self._download(path, resource)
-        except Exception as ex:
-            self._print_exception(ex)
+        return summaries[0] if summaries else None
 
     def download_packages(self, packages: list, path: str = os.getcwd(),
-                          dictionary: bool = True, years: list = None):
+                          dictionary: bool = True, years: list = None,
+                          workers: int = None, sync: bool = False,
+                          convert: str = None, compression: str = None,
+                          sink=None, shard_index: int = None,
+                          shard_count: int = None) -> list:
         """Exibe os pacotes de dados de acordo com seu nome
         e baixa-os em pastas com o nome do respectivo
         conjunto de dado.
@@ -118,10 +265,446 @@ class Package(Env, FilterMixin):
             flag para baixar o dicionário dos dados (por padrão, True).
         years: list
             define os anos dos dados que serão baixados, se existir
-            realiza-se o download.
+            realiza-se o download; aceita também range ou uma tupla
+            (início, fim), com os dois anos inclusive.
+        workers: int
+            número de arquivos baixados simultaneamente
+            (por padrão, max_workers).
+        sync: bool
+            flag para baixar apenas os recursos que mudaram desde o último
+            download (por padrão, False).
+        convert: str
+            'parquet' ou 'arrow' para converter os CSVs baixados para esse
+            formato, em processos separados (por padrão, None).
+        compression: str
+            'gzip' ou 'zstd' para gravar os arquivos comprimidos, com a
+            extensão .gz ou .zst (por padrão, None).
+        sink: StorageSink
+            destino dos arquivos, como um TarSink ou ZipSink; com ele, path
+            é ignorado, os caminhos ficam dentro de sink.root e sync só
+            é aceito com um DirectorySink
+            (por padrão, None, arquivos soltos em path).
+        shard_index: int
+            a parte dos arquivos baixada por esta máquina, de 0 a
+            shard_count - 1 (por padrão, None, todos os arquivos).
+        shard_count: int
+            o número de máquinas entre as quais os arquivos são divididos
+            (por padrão, None).
+
+        Retorno
+        ----------
+        list:
+            lista com o resumo do download de cada pacote.
+        """
+        years = self.compile_years(years)
+        CompressedFile.check(compression)
+        if sink is not None:
+            sink.check(sync)
+            path = sink.root
+        shard = None
+        responses = {}
+        if shard_index is not None or shard_count is not None:
+            # A divisão usa o tamanho dos metadados; as respostas das
+            # consultas são reaproveitadas pelos downloads
+            ShardManifest.check(shard_index, shard_count)
+            shard = ShardManifest(shard_index, shard_count, self._plan(
+                self._package_entries(packages, path), dictionary, years,
+                head=False, responses=responses
+            ))
+        with self._worker_pool(workers) as pool, \
+                self._converter(convert) as converter:
+            pending = [
+                self._submit_package(
+                    pool, package, path, dictionary, years, sync, converter,
+                    compression, sink, shard, responses.get(package)
+                )
+                for package in packages
+            ]
+            summaries = self._collect_packages(
+                pending, converter, compression
+            )
+
+        if shard is not None:
+            self._save_shard(shard, summaries, path, sink)
+        return summaries
+
+    def _submit_package(self, pool, name: str, path: str,
+                        dictionary: bool, years: list,
+                        sync: bool = False, converter=None,
+                        compression: str = None, sink=None,
+                        shard=None, response: dict = None) -> tuple:
+        """Consulta os recursos do pacote e agenda os seus downloads.
+
+        Parâmetros
+        ----------
+        pool: WorkerPool
+            conjunto de trabalhadores que executará os downloads.
+        name: str
+            nome do pacote.
+        path: str
+            o caminho da pasta onde será criada a pasta do pacote.
+        dictionary: bool
+            flag para baixar o dicionário dos dados.
+        years: list
+            define os anos dos dados que serão baixados.
+        sync: bool
+            flag para baixar apenas os recursos que mudaram.
+        converter: ColumnarConverter
+            conversor dos CSVs baixados (por padrão, None).
+        compression: str
+            compressão dos arquivos gravados (por padrão, None).
+        sink: StorageSink
+            destino dos arquivos baixados (por padrão, None).
+        shard: ShardManifest
+            a parte dos arquivos baixada por esta máquina
+            (por padrão, None, todos os arquivos).
+        response: dict
+            a resposta já obtida da consulta ao pacote (por padrão, None,
+            o pacote é consultado).
+
+        Retorno
+        ----------
+        tuple:
+            (nome, pasta, [(recurso, future)], registro) ou None se o
+            pacote não foi encontrado ou não tem arquivos da parte. Se a
+            consulta ao pacote falhar, a lista traz o par (None, future)
+            com o DownloadResult da falha.
         """
-        for package in packages:
-            self.download_package(package, path, dictionary, years)
+        # Checa se o pacote está disponível
+        if self.warnings and name not in self.available_packages:
+            self._print_not_found(name, 'Pacote')
+            return None
+
+        path = '{}/{}'.format(path, name)
+        manifest = None
+        submitted = []
+        try:
+            if response is None:
+                response = self._request_get(self.url_package + name)
+            if not isinstance(response, dict) or \
+                    'resources' not in response:
+                raise odufrDownloadError()
+            self._index_package(name, response)
+            resources = self.filter_resources(
+                response['resources'], dictionary, years,
+                (self.url_package + name, response.get('metadata_modified'))
+            )
+            if shard is not None:
+                resources = [
+                    resource for resource in resources
+                    if shard.assigned(name, resource)
+                ]
+                if not resources:
+                    return None
+            self._make_dir(path)
+            manifest = Manifest(path) if sync else None
+            tables = []
+            for resource in resources:
+                if converter is not None and self._is_table(resource):
+                    # A conversão é agendada quando o CSV e os tipos do
+                    # dicionário estiverem prontos
+                    tables.append(len(submitted))
+                    submitted.append((resource, pool.submit(
+                        resource['url'], self._download, path, resource,
+                        manifest, compression
+                    )))
+                    continue
+                if sink is None:
+                    submitted.append((resource, pool.submit(
+                        resource['url'], self._download, path, resource,
+                        manifest, compression
+                    )))
+                    continue
+                submitted.append((resource, pool.submit(
+                    resource['url'], self._download_stored, path, resource,
+                    manifest, compression, sink
+                )))
+            if tables:
+                types = self._submit_types(
+                    pool, response['resources'], submitted, sink
+                )
+                for index in tables:
+                    resource, download = submitted[index]
+                    submitted[index] = (resource, self._when_done(
+                        [download, types], self._convert_stored, converter,
+                        sink
+                    ))
+        except Exception as ex:
+            self._emit('on_error', self.url_package + name, ex)
+            failure = Future()
+            failure.set_result(DownloadResult(
+                name, None, 'failed', path, exception=ex, options={
+                    'dictionary': dictionary, 'years': years,
+                    'compression': compression
+                }
+            ))
+            submitted.append((None, failure))
+
+        return name, path, submitted, manifest
+
+    def _collect_packages(self, pending: list, converter=None,
+                          compression: str = None) -> list:
+        """Aguarda os downloads agendados e monta o resumo de cada pacote.
+
+        Parâmetros
+        ----------
+        pending: list
+            lista retornada por _submit_package para cada pacote.
+        converter: ColumnarConverter
+            conversor dos CSVs baixados (por padrão, None).
+        compression: str
+            compressão dos arquivos gravados (por padrão, None).
+
+        Retorno
+        ----------
+        list:
+            lista de dicionários com as chaves 'package', 'path',
+            'downloaded' (arquivos salvos), 'unchanged' (arquivos que não
+            mudaram, na sincronização), 'failed' (recursos que falharam
+            e suas exceções) e, com um conversor, 'converted' (arquivos
+            convertidos).
+        """
+        summaries = []
+        for item in pending:
+            if item is None:
+                continue
+            if isinstance(item, dict):
+                # Resumo já pronto, como o da falha da consulta a um grupo
+                summaries.append(item)
+                continue
+
+            name, path, submitted, manifest = item
+            summary = {
+                'package': name, 'path': path,
+                'downloaded': [], 'unchanged': [], 'failed': {},
+                'results': []
+            }
+            if converter is not None:
+                summary['converted'] = []
+            for resource, future in submitted:
+                try:
+                    result = future.result()
+                except Exception as ex:
+                    # O erro já foi emitido por _download
+                    summary['failed'][resource['name']] = ex
+                    result = DownloadResult(
+                        name, resource, 'failed',
+                        self._file_path(path, resource, compression),
+                        exception=ex
+                    )
+                else:
+                    if result.resource is None:
+                        # A consulta ao pacote falhou
+                        summary['failed'][name] = result.exception
+                    else:
+                        summary[result.status].append(result.path)
+                    if converter is not None and not result.failed:
+                        self._collect_conversion(converter, result, summary)
+                summary['results'].append(result)
+            if manifest is not None:
+                manifest.save()
+            summaries.append(summary)
+
+        return summaries
+
+    def _collect_conversion(self, converter, result: DownloadResult,
+                            summary: dict):
+        """Aguarda a conversão do arquivo baixado, se houver, e a adiciona
+        ao resumo do pacote."""
+        try:
+            output_path = converter.result(result.path)
+        except Exception as ex:
+            self._emit('on_error', converter.output_path(result.path), ex)
+            return
+        if output_path is not None:
+            summary['converted'].append(output_path)
+
+    def retry_failed(self, results: list, workers: int = None,
+                     sync: bool = False, sink=None) -> list:
+        """Baixa novamente, de forma simultânea, apenas os arquivos que
+        falharam. Os pacotes cuja consulta falhou são consultados e
+        baixados de novo, com os mesmos filtros.
+
+        > Exemplo: retry_failed(download_all())
+
+        Parâmetros
+        ----------
+        results: list
+            resumos retornados pelos métodos de download ou uma lista de
+            DownloadResult.
+        workers: int
+            número de arquivos baixados simultaneamente
+            (por padrão, max_workers).
+        sync: bool
+            flag para baixar apenas os recursos que mudaram desde o último
+            download (por padrão, False).
+        sink: StorageSink
+            o destino usado nos downloads originais, que ainda não foi
+            finalizado (por padrão, None).
+
+        Retorno
+        ----------
+        list:
+            um DownloadResult para cada arquivo baixado novamente, ou para
+            cada pacote cuja consulta falhou de novo.
+        """
+        if sink is not None:
+            sink.check(sync)
+        failed = []
+        packages = []
+        paths = set()
+        for item in results:
+            for result in item.get('results', []) \
+                    if isinstance(item, dict) else [item]:
+                if not result.failed or result.path in paths:
+                    continue
+                if result.resource is not None:
+                    paths.add(result.path)
+                    failed.append(result)
+                elif result.options is not None:
+                    paths.add(result.path)
+                    packages.append(result)
+                # Recursos sem metadados não podem ser baixados de novo
+
+        manifests = {}
+        with self._worker_pool(workers) as pool:
+            pending = [
+                self._resubmit(pool, result, sync, sink)
+                for result in packages
+            ]
+            futures = []
+            for result in failed:
+                path = os.path.dirname(result.path)
+                if sync and path not in manifests:
+                    manifests[path] = Manifest(path)
+                futures.append((result, pool.submit(
+                    result.resource['url'], self._download_stored, path,
+                    result.resource, manifests.get(path),
+                    CompressedFile.detect(result.path), sink
+                )))
+
+            retried = []
+            for result, future in futures:
+                try:
+                    retried.append(future.result())
+                except Exception as ex:
+                    retried.append(DownloadResult(
+                        result.package, result.resource, 'failed',
+                        result.path, exception=ex
+                    ))
+            for result, items in zip(packages, pending):
+                for summary in self._collect_packages(
+                        items, compression=result.options['compression']):
+                    retried.extend(summary['results'])
+
+        for manifest in manifests.values():
+            manifest.save()
+        return retried
+
+    def _resubmit(self, pool, result: DownloadResult, sync: bool = False,
+                  sink=None) -> list:
+        """Agenda de novo os downloads de uma consulta que falhou, com os
+        parâmetros guardados em result.options.
+
+        Retorno
+        ----------
+        list:
+            os itens agendados, como os de _submit_package.
+        """
+        return [self._submit_package(
+            pool, result.package, os.path.dirname(result.path),
+            result.options['dictionary'], result.options['years'], sync,
+            compression=result.options['compression'], sink=sink
+        )]
+
+    def deduplicate(self, path: str = os.getcwd(),
+                    dry_run: bool = False) -> dict:
+        """Procura arquivos de mesmo conteúdo na pasta dos downloads e
+        troca as cópias por hard links para o armazenamento (use_store),
+        liberando o espaço duplicado.
+
+        Sem um armazenamento ativado, é usada a pasta .odufrn-store dentro
+        de path.
+
+        > Exemplo: deduplicate('dados', dry_run=True)
+
+        Parâmetros
+        ----------
+        path: str
+            a pasta dos downloads (por padrão, a pasta atual).
+        dry_run: bool
+            flag para apenas informar o espaço duplicado, sem alterar os
+            arquivos (por padrão, False).
+
+        Retorno
+        ----------
+        dict:
+            o relatório de ContentStore.deduplicate.
+        """
+        store = self.store
+        if store is None:
+            store = ContentStore(os.path.join(path, '.odufrn-store'))
+
+        report = store.deduplicate(path, dry_run)
+        print("{} arquivos, {} conteúdos diferentes, {:.1f} MB duplicados"
+              .format(report['files'], report['unique'],
+                      report['duplicate_bytes'] / 1024 ** 2))
+        if not dry_run:
+            print("{:.1f} MB liberados".format(
+                (report['reclaimed'] + report['pruned']) / 1024 ** 2
+            ))
+        return report
+
+    def merge_shards(self, path: str = os.getcwd()) -> dict:
+        """Combina os registros das partes de um download dividido entre
+        várias máquinas (shard_index e shard_count), reunidos na pasta dos
+        downloads, e salva o resultado em .odufrn-shards.json.
+
+        > Exemplo: merge_shards('espelho')
+
+        Parâmetros
+        ----------
+        path: str
+            a pasta dos downloads (por padrão, a pasta atual).
+
+        Retorno
+        ----------
+        dict:
+            o resultado de ShardManifest.merge.
+        """
+        merged = ShardManifest.merge(ShardManifest.find(path))
+        file_path = os.path.join(path, ShardManifest.MERGED_FILENAME)
+        with open(file_path + '.tmp', 'w') as f:
+            json.dump(merged, f, indent=1)
+        os.replace(file_path + '.tmp', file_path)
+
+        print("{} de {} partes, {} arquivos, {:.1f} MB".format(
+            len(merged['shards']), merged['shard_count'],
+            len(merged['files']), merged['bytes'] / 1024 ** 2
+        ))
+        if merged['missing']:
+            print("Partes sem registro: {}".format(
+                ', '.join(str(index) for index in merged['missing'])
+            ))
+        if not merged['consistent']:
+            print("As partes foram baixadas com planos diferentes")
+        if merged['failed']:
+            print("{} arquivos falharam".format(len(merged['failed'])))
+        if merged['duplicates']:
+            print("{} arquivos baixados por mais de uma parte".format(
+                len(merged['duplicates'])
+            ))
+        return merged
+
+    def _save_shard(self, shard: ShardManifest, summaries: list, path: str,
+                    sink=None):
+        """Registra os resultados da parte e grava o registro na pasta dos
+        downloads ou, com um destino, entrega-o a ele."""
+        shard.record(summaries, path)
+        self._make_dir(path)
+        file_path = shard.save(path)
+        if sink is not None:
+            sink.add_file(file_path)
 
     def search_related_packages(self, keyword: str,
                                 simple_filter: bool = False,
@@ -163,11 +746,64 @@ class Package(Env, FilterMixin):
 
         return related
 
+    def rank_related_packages(self, keyword: str, k: int = 10,
+                              simple_filter: bool = False) -> list:
+        """Procura os k pacotes de dados com nomes mais semelhantes à
+        palavra recebida.
+
+        > Exemplo: rank_related_packages('discente', 3)
+
+        Parâmetros
+        ----------
+        keyword: str
+            palavra-chave com a qual será feita a busca.
+        k: int
+            quantidade máxima de pacotes retornados (por padrão, 10).
+        simple_filter: bool = False
+            indica o uso de um filtro mais simples que o Levenshtein.
+
+        Retorno
+        ----------
+        list:
+            pares (pacote, similaridade), do mais ao menos semelhante.
+        """
+        if simple_filter:
+            return self.simple_rank(keyword, self.available_packages, k)
+        return self.rank_similar(keyword, self.available_packages, k)
+
+    def search_related_packages_batch(self, keywords: list) -> dict:
+        """Procura, de uma só vez, os pacotes de dados que possuam nomes
+        semelhantes a cada uma das palavras recebidas.
+
+        > Exemplo: search_related_packages_batch(['discente', 'docente'])
+
+        Parâmetros
+        ----------
+        keywords: list
+            palavras-chave com as quais será feita a busca.
+
+        Retorno
+        ----------
+        dict:
+            para cada palavra-chave, a lista de pares (pacote, razão) dos
+            pacotes semelhantes.
+        """
+        return self.search_similar_batch(keywords, self.available_packages)
+
     def download_all(self, path: str = os.getcwd(),
-                     dictionary: bool = True, years: list = None):
+                     dictionary: bool = True, years: list = None,
+                     workers: int = None, sync: bool = False,
+                     convert: str = None, compression: str = None,
+                     sink=None, shard_index: int = None,
+                     shard_count: int = None) -> list:
         """Exibe todos os pacotes de dados e baixa-os
         em pastas com o nome do respectivo conjunto de dado.
 
+        Com shard_index e shard_count, os arquivos são divididos entre
+        várias máquinas em partes de tamanhos próximos (veja
+        DownloadPlan.assign) e cada máquina grava na pasta dos downloads o
+        registro da sua parte, que pode ser combinado por merge_shards.
+
         > Exemplo:
             download_all(dictionary = False, years = list(range(2009, 2014)))
 
@@ -180,13 +816,389 @@ class Package(Env, FilterMixin):
             flag para baixar o dicionário dos dados (por padrão, True).
         years: list
             define os anos dos dados que serão baixados, se existir
-            realiza-se o download.
+            realiza-se o download; aceita também range ou uma tupla
+            (início, fim), com os dois anos inclusive.
+        workers: int
+            número de arquivos baixados simultaneamente
+            (por padrão, max_workers).
+        sync: bool
+            flag para baixar apenas os recursos que mudaram desde o último
+            download (por padrão, False).
+        convert: str
+            'parquet' ou 'arrow' para converter os CSVs baixados para esse
+            formato, em processos separados (por padrão, None).
+        compression: str
+            'gzip' ou 'zstd' para gravar os arquivos comprimidos, com a
+            extensão .gz ou .zst (por padrão, None).
+        sink: StorageSink
+            destino dos arquivos, como um TarSink ou ZipSink; com ele, path
+            é ignorado, os caminhos ficam dentro de sink.root e sync só
+            é aceito com um DirectorySink
+            (por padrão, None, arquivos soltos em path).
+        shard_index: int
+            a parte dos arquivos baixada por esta máquina, de 0 a
+            shard_count - 1 (por padrão, None, todos os arquivos).
+        shard_count: int
+            o número de máquinas entre as quais os arquivos são divididos
+            (por padrão, None).
+
+        Retorno
+        ----------
+        list:
+            lista com o resumo do download de cada pacote.
+        """
+        return self.download_packages(
+            self.available_packages, path, dictionary, years, workers, sync,
+            convert, compression, sink, shard_index, shard_count
+        )
+
+    def plan_packages(self, packages: list, path: str = os.getcwd(),
+                      dictionary: bool = True, years: list = None,
+                      workers: int = None, head: bool = True) -> DownloadPlan:
+        """Monta o plano de download de uma lista de pacotes, sem baixar
+        nenhum arquivo.
+
+        > Exemplo: plan_packages(['discentes', 'docentes'])
+
+        Parâmetros
+        ----------
+        packages: list
+            lista com os nomes dos pacotes desejados.
+        path: str
+            o caminho da pasta onde serão adicionados os arquivos
+            (por padrão, a pasta atual).
+        dictionary: bool
+            flag para baixar o dicionário dos dados (por padrão, True).
+        years: list
+            define os anos dos dados que serão baixados; aceita também
+            range ou uma tupla (início, fim), com os dois anos inclusive.
+        workers: int
+            número de consultas simultâneas
+            (por padrão, max_host_connections).
+        head: bool
+            flag para consultar o tamanho de cada arquivo com uma
+            requisição HEAD; se False, é usado o tamanho informado nos
+            metadados (por padrão, True).
+
+        Retorno
+        ----------
+        DownloadPlan:
+            o plano, com o tamanho de cada arquivo.
         """
-        self.download_packages(
-            self.available_packages, path, dictionary, years
+        return self._plan(
+            self._package_entries(packages, path), dictionary, years,
+            workers, head
         )
 
-    def download_packages_by_tag(self, tag: str, path: str = os.getcwd()):
+    def _package_entries(self, packages: list, path: str) -> list:
+        """Retorna as entradas do plano de uma lista de pacotes."""
+        return [
+            {'group': None, 'package': name, 'source': None,
+             'path': '{}/{}'.format(path, name)}
+            for name in packages
+        ]
+
+    def plan_all(self, path: str = os.getcwd(), dictionary: bool = True,
+                 years: list = None, workers: int = None,
+                 head: bool = True) -> DownloadPlan:
+        """Monta o plano de download de todos os pacotes, sem baixar
+        nenhum arquivo.
+
+        > Exemplo: plan_all(years=(2017, 2019))
+
+        Parâmetros
+        ----------
+        path: str
+            o caminho da pasta onde serão adicionados os arquivos
+            (por padrão, a pasta atual).
+        dictionary: bool
+            flag para baixar o dicionário dos dados (por padrão, True).
+        years: list
+            define os anos dos dados que serão baixados; aceita também
+            range ou uma tupla (início, fim), com os dois anos inclusive.
+        workers: int
+            número de consultas simultâneas
+            (por padrão, max_host_connections).
+        head: bool
+            flag para consultar o tamanho de cada arquivo com uma
+            requisição HEAD; se False, é usado o tamanho informado nos
+            metadados (por padrão, True).
+
+        Retorno
+        ----------
+        DownloadPlan:
+            o plano, com o tamanho de cada arquivo.
+        """
+        return self.plan_packages(
+            self.available_packages, path, dictionary, years, workers, head
+        )
+
+    def execute_plan(self, plan: DownloadPlan, workers: int = None,
+                     sync: bool = False) -> list:
+        """Baixa os arquivos de um plano.
+
+        > Exemplo: execute_plan(DownloadPlan.load('plano.json'))
+
+        Parâmetros
+        ----------
+        plan: DownloadPlan
+            o plano, como retornado por plan_packages, plan_all ou
+            plan_groups.
+        workers: int
+            número de arquivos baixados simultaneamente
+            (por padrão, max_workers).
+        sync: bool
+            flag para baixar apenas os recursos que mudaram desde o último
+            download (por padrão, False).
+
+        Retorno
+        ----------
+        list:
+            lista com o resumo do download de cada pacote do plano.
+        """
+        packages = {}
+        for task in plan:
+            key = (task['package'], task['path'])
+            packages.setdefault(key, []).append(task)
+
+        summaries = {}
+        with self._worker_pool(workers) as pool:
+            pending = {}
+            for (name, path), tasks in packages.items():
+                if tasks[0]['source'] is not None:
+                    continue
+                path = self._make_dir(path)
+                manifest = Manifest(path) if sync else None
+                submitted = [
+                    (task['resource'], pool.submit(
+                        task['resource']['url'], self._download, path,
+                        task['resource'], manifest
+                    ))
+                    for task in tasks
+                ]
+                pending[(name, tasks[0]['path'])] = (
+                    name, path, submitted, manifest
+                )
+
+            for key, item in pending.items():
+                summaries[key] = self._collect_packages([item])[0]
+
+        result = []
+        for (name, path), tasks in packages.items():
+            if tasks[0]['source'] is None:
+                result.append(summaries[(name, path)])
+                continue
+            source = summaries.get((name, tasks[0]['source']))
+            if source is not None:
+                result.append(
+                    self._link_package(source, os.path.dirname(path))
+                )
+
+        return result
+
+    def _plan(self, entries: list, dictionary: bool, years: list,
+              workers: int = None, head: bool = True,
+              responses: dict = None) -> DownloadPlan:
+        """Consulta simultaneamente os pacotes e o tamanho dos seus
+        arquivos e monta o plano de download.
+
+        Parâmetros
+        ----------
+        entries: list
+            dicionários com as chaves 'group', 'package', 'path' e
+            'source' de cada pacote do plano.
+        dictionary: bool
+            flag para baixar o dicionário dos dados.
+        years: list
+            define os anos dos dados que serão baixados.
+        workers: int
+            número de consultas simultâneas
+            (por padrão, max_host_connections).
+        head: bool
+            flag para consultar o tamanho de cada arquivo com uma
+            requisição HEAD; se False, é usado o tamanho informado nos
+            metadados (por padrão, True).
+        responses: dict
+            dicionário que recebe a resposta da consulta de cada pacote,
+            para que os downloads não consultem a API de novo
+            (por padrão, None).
+
+        Retorno
+        ----------
+        DownloadPlan:
+            o plano, com o tamanho de cada arquivo.
+        """
+        years = self.compile_years(years)
+        names = []
+        for entry in entries:
+            name = entry['package']
+            if name in names:
+                continue
+            # Checa se o pacote está disponível
+            if self.warnings and name not in self.available_packages:
+                self._print_not_found(name, 'Pacote')
+                continue
+            names.append(name)
+
+        pool = self._worker_pool(workers or self.max_host_connections)
+        with pool:
+            futures = [
+                (name, pool.submit(
+                    self.url_package, self._request_get,
+                    self.url_package + name
+                ))
+                for name in names
+            ]
+            resources = {}
+            for name, future in futures:
+                try:
+                    response = future.result()
+                    self._index_package(name, response)
+                    if responses is not None:
+                        responses[name] = response
+                    resources[name] = self.filter_resources(
+                        response['resources'], dictionary, years,
+                        (self.url_package + name,
+                         response.get('metadata_modified'))
+                    )
+                except Exception as ex:
+                    self._emit('on_error', self.url_package + name, ex)
+
+            sizes = {}
+            for selected in resources.values():
+                for resource in selected:
+                    if resource['url'] not in sizes:
+                        sizes[resource['url']] = pool.submit(
+                            resource['url'], self._content_length, resource,
+                            head
+                        )
+
+            tasks = []
+            for entry in entries:
+                for resource in resources.get(entry['package'], []):
+                    task = dict(entry)
+                    task['resource'] = resource
+                    task['size'] = sizes[resource['url']].result()
+                    tasks.append(task)
+
+        return DownloadPlan(tasks)
+
+    def _content_length(self, resource: dict, head: bool = True) -> int:
+        """Consulta o tamanho do arquivo do recurso com uma requisição
+        HEAD, usando o tamanho informado nos metadados se o servidor não
+        o informar.
+
+        Parâmetros
+        ----------
+        resource: dict
+            o recurso do pacote.
+        head: bool
+            flag para fazer a requisição HEAD; se False, é usado apenas o
+            tamanho dos metadados (por padrão, True).
+
+        Retorno
+        ----------
+        int:
+            o tamanho em bytes, ou None se desconhecido.
+        """
+        if head:
+            try:
+                self._throttle_request()
+                response = self.session.head(
+                    resource['url'], allow_redirects=True,
+                    headers={'Accept-Encoding': 'identity'}
+                )
+                if response.ok and 'Content-Length' in response.headers:
+                    return int(response.headers['Content-Length'])
+            except (requests.RequestException, ValueError):
+                pass
+
+        try:
+            return int(resource.get('size'))
+        except (TypeError, ValueError):
+            return None
+
+    def _link_package(self, summary: dict, path: str, sink=None) -> dict:
+        """Replica na pasta de outro grupo os arquivos de um pacote já
+        baixado, sem baixá-los novamente.
+
+        Os arquivos são ligados por hard link; se o sistema de arquivos
+        não permitir, por link simbólico e, por fim, por cópia. Com um
+        destino, a réplica é feita por ele.
+
+        Parâmetros
+        ----------
+        summary: dict
+            resumo do download do pacote, como retornado por
+            _collect_packages.
+        path: str
+            o caminho da pasta do grupo onde o pacote será replicado.
+        sink: StorageSink
+            destino dos arquivos baixados (por padrão, None).
+
+        Retorno
+        ----------
+        dict:
+            o resumo do pacote na nova pasta.
+        """
+        package_path = self._make_dir(
+            '{}/{}'.format(path, summary['package'])
+        )
+        linked = {
+            'package': summary['package'], 'path': package_path,
+            'downloaded': [], 'unchanged': [],
+            'failed': dict(summary['failed']), 'results': []
+        }
+        resources = {}
+        for result in summary.get('results', []):
+            resources[result.path] = result.resource
+            if result.failed and result.resource is None:
+                # A consulta ao pacote falhou; a nova tentativa o baixa
+                # direto nesta pasta
+                linked['results'].append(DownloadResult(
+                    summary['package'], None, 'failed', package_path,
+                    exception=result.exception, options=result.options
+                ))
+            elif result.failed:
+                # Uma nova tentativa baixa o arquivo direto nesta pasta
+                linked['results'].append(DownloadResult(
+                    summary['package'], result.resource, 'failed',
+                    os.path.join(package_path, os.path.basename(result.path)),
+                    exception=result.exception
+                ))
+
+        for key in ('downloaded', 'unchanged'):
+            for source in summary[key]:
+                target = os.path.join(
+                    package_path, os.path.basename(source)
+                )
+                try:
+                    if sink is None:
+                        self._link_file(source, target)
+                    else:
+                        sink.link(source, target)
+                except OSError as ex:
+                    self._emit('on_error', target, ex)
+                    linked['failed'][os.path.basename(source)] = ex
+                    linked['results'].append(DownloadResult(
+                        summary['package'], resources.get(source), 'failed',
+                        target, exception=ex
+                    ))
+                    continue
+                linked[key].append(target)
+                linked['results'].append(DownloadResult(
+                    summary['package'], resources.get(source), 'linked',
+                    target
+                ))
+
+        return linked
+
+    def _link_file(self, source: str, target: str):
+        """Liga target ao arquivo source, substituindo o que existir."""
+        DirectorySink.link_file(source, target)
+
+    def download_packages_by_tag(self, tag: str, path: str = os.getcwd(),
+                                 workers: int = None) -> list:
         """Baixa pacotes pertencentes a uma etiqueta.
 
         Parâmetros
@@ -196,11 +1208,19 @@ class Package(Env, FilterMixin):
         path: str
             o caminho da pasta onde serão adicionados os arquivos
             (por padrão, a pasta atual).
+        workers: int
+            número de arquivos baixados simultaneamente
+            (por padrão, max_workers).
+
+        Retorno
+        ----------
+        list:
+            lista com o resumo do download de cada pacote.
         """
         # Recupera pacotes
         packages = self.tag.search_by_tag(tag)
 
-        self.download_packages(packages, path)
+        return self.download_packages(packages, path, workers=workers)
 
     def print_files_from_package(self, name: str):
         """Imprime os arquivos do pacote.
@@ -219,9 +1239,172 @@ class Package(Env, FilterMixin):
                 e, self.str_related(self.search_related_packages(name))
             )
 
-    def _download(self, path: str, resource):
+    def iter_rows(self, package: str, resource: str = None,
+                  years: list = None, batch_size: int = None,
+                  encoding: str = None, delimiter: str = ';'):
+        """Percorre as linhas dos arquivos CSV do pacote diretamente da
+        resposta HTTP, sem gravá-los em disco.
+
+        O conteúdo é lido em blocos de chunk_size bytes e decodificado aos
+        poucos, então a memória usada não depende do tamanho do arquivo.
+        Sem uma codificação definida, o arquivo é lido como UTF-8 e passa
+        a ser lido como Latin-1 no primeiro byte inválido. Falhas de
+        conexão no meio do arquivo são retomadas do ponto em que pararam,
+        até session.retries vezes.
+
+        > Exemplo: iter_rows('obras', years=2018)
+
+        Parâmetros
+        ----------
+        package: str
+            nome do pacote.
+        resource: str
+            nome do recurso, ou do seu arquivo (por padrão, todos os
+            recursos CSV do pacote, exceto o dicionário).
+        years: list
+            anos dos recursos que serão lidos (por padrão, todos); aceita
+            também range ou uma tupla (início, fim).
+        batch_size: int
+            número de linhas de cada lote; sem ele, as linhas são
+            retornadas uma a uma (por padrão, None).
+        encoding: str
+            codificação dos arquivos (por padrão, detectada).
+        delimiter: str
+            separador das colunas (por padrão, ';').
+
+        Retorno
+        ----------
+        generator:
+            um dicionário, com as colunas do cabeçalho, para cada linha,
+            ou uma lista de até batch_size dicionários, com as linhas de um
+            mesmo recurso.
+        """
+        response = self._request_get(self.url_package + package)
+        if not isinstance(response, dict) or 'resources' not in response:
+            self._print_not_found(package, 'Pacote')
+            return
+
+        self._index_package(package, response)
+        resources = self.filter_resources(
+            response['resources'], False, years,
+            (self.url_package + package, response.get('metadata_modified'))
+        )
+        for item in resources:
+            if item.get('format', '').lower() != 'csv':
+                continue
+            if resource is not None and \
+                    resource not in (item['name'], item['url'].split('/')[-1]):
+                continue
+
+            lines = self._iter_lines(
+                self._iter_text(self._iter_bytes(item['url']), encoding)
+            )
+            rows = csv.DictReader(lines, delimiter=delimiter)
+            if batch_size is None:
+                yield from rows
+                continue
+
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    def _iter_bytes(self, url: str):
+        """Percorre os blocos do conteúdo da url, retomando com uma
+        requisição Range as transferências interrompidas.
+
+        A retomada é validada por If-Range com o ETag (ou Last-Modified)
+        da primeira resposta: se o arquivo mudou no servidor, ele responde
+        com o arquivo inteiro e a leitura falha, em vez de juntar partes
+        de versões diferentes.
+        """
+        received = 0
+        attempt = 0
+        validator = None
+        while True:
+            headers = {'Accept-Encoding': 'identity'}
+            if received:
+                headers['Range'] = 'bytes={}-'.format(received)
+                if validator:
+                    headers['If-Range'] = validator
+
+            self._throttle_request()
+            response = self.session.get(url, stream=True, headers=headers)
+            try:
+                response.raise_for_status()
+                if received and self._range_start(response) != received:
+                    # O servidor não retomou do ponto em que parou
+                    raise odufrDownloadError()
+                if not received:
+                    validator = response.headers.get('ETag') or \
+                        response.headers.get('Last-Modified')
+
+                for chunk in response.iter_content(self._read_size()):
+                    self._throttle_bytes(len(chunk))
+                    received += len(chunk)
+                    yield chunk
+                return
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as ex:
+                attempt += 1
+                if attempt > self.session.retries:
+                    raise
+                self._emit('on_retry', url, attempt, ex)
+            finally:
+                response.close()
+
+    def _iter_text(self, chunks, encoding: str = None):
+        """Decodifica os blocos recebidos aos poucos.
+
+        Sem uma codificação definida, os blocos são lidos como UTF-8 até o
+        primeiro byte inválido e, a partir do bloco dele, como Latin-1.
+        """
+        decoder = codecs.getincrementaldecoder(encoding or 'utf-8-sig')()
+        for chunk in chunks:
+            try:
+                text = decoder.decode(chunk)
+            except UnicodeDecodeError:
+                if encoding is not None:
+                    raise
+                pending = decoder.getstate()[0]
+                decoder = codecs.getincrementaldecoder('latin-1')()
+                text = decoder.decode(pending + chunk)
+            if text:
+                yield text
+        text = decoder.decode(b'', True)
+        if text:
+            yield text
+
+    def _iter_lines(self, texts):
+        """Divide os textos recebidos em linhas, mantendo o fim de linha
+        exigido pelo módulo csv."""
+        pending = ''
+        for text in texts:
+            lines = (pending + text).split('\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line + '\n'
+        if pending:
+            yield pending
+
+    def _download(self, path: str, resource, manifest=None,
+                  compression: str = None, sink=None) -> DownloadResult:
         """Baixa o arquivo desejado e o coloca na pasta desejada
 
+        O conteúdo é gravado em blocos de chunk_size bytes num arquivo
+        .part, que só é renomeado para o nome final quando o download
+        termina (ver _fetch). Com um destino que não mantém os arquivos
+        em disco, como um tar ou zip, o conteúdo é gravado direto no fluxo
+        aberto pelo destino.
+
+        Com um registro (manifest), o download é pulado se os metadados do
+        recurso não mudaram e, caso contrário, é feito com uma requisição
+        condicional, que também é pulada se o servidor responder 304.
+
         > Exemplo: _download('acervo-biblioteca')
 
         Parâmetros
@@ -229,11 +1412,549 @@ class Package(Env, FilterMixin):
         path: str
             o caminho da pasta onde serão adicionados os arquivos
             (por padrão, a pasta atual).
+        resource: dict
+            o recurso do pacote que será baixado.
+        manifest: Manifest
+            registro dos downloads anteriores do pacote, usado na
+            sincronização (por padrão, None).
+        compression: str
+            'gzip' ou 'zstd' para gravar o arquivo comprimido
+            (por padrão, None).
+        sink: StorageSink
+            destino que recebe o conteúdo (por padrão, None).
+
+        Retorno
+        ----------
+        DownloadResult:
+            o resultado do download.
+        """
+        file_path = self._file_path(path, resource, compression)
+        package = os.path.basename(path)
+
+        headers = {}
+        if manifest is not None:
+            if manifest.is_unchanged(file_path, resource):
+                manifest.mark_unchanged(file_path, resource)
+                return DownloadResult(package, resource, 'unchanged',
+                                      file_path)
+            headers = manifest.conditional_headers(file_path)
+
+        progress = {'bytes': 0}
+        start = time.monotonic()
+        if sink is not None and not sink.keeps_files:
+            with sink.open(file_path) as stream:
+                response_headers = self._fetch(
+                    resource['url'], file_path, headers, progress,
+                    compression, stream
+                )
+        else:
+            response_headers = self._fetch(
+                resource['url'], file_path, headers, progress, compression
+            )
+        status = 'downloaded'
+        if response_headers is None:
+            manifest.mark_unchanged(file_path, resource)
+            status = 'unchanged'
+        elif manifest is not None:
+            manifest.record(file_path, resource, response_headers)
+
+        return DownloadResult(
+            package, resource, status, file_path, progress['bytes'],
+            time.monotonic() - start
+        )
+
+    def _download_stored(self, path: str, resource: dict, manifest,
+                         compression: str = None,
+                         sink=None) -> DownloadResult:
+        """Baixa o arquivo e o entrega ao destino.
+
+        Com um destino que não mantém os arquivos em disco, o arquivo é
+        gravado direto nele; os demais destinos recebem o arquivo na
+        pasta, como num download comum.
         """
-        print("Baixando {}...".format(resource['name']))
-        file_path = '{}/{}.{}'.format(
-            path, resource['name'], resource['format'].lower()
+        if sink is not None and sink.keeps_files:
+            sink = None
+        return self._download(path, resource, manifest, compression, sink)
+
+    def _convert_stored(self, download: Future, types: Future, converter,
+                        sink=None) -> DownloadResult:
+        """Agenda a conversão do CSV baixado, com os tipos do dicionário,
+        e o entrega ao destino.
+
+        A conversão segue em outro processo enquanto os trabalhadores
+        passam aos próximos downloads. Os arquivos convertidos precisam
+        estar em disco para o outro processo, então, com um destino que
+        não mantém os arquivos em disco, a espera pela conversão antecede
+        a entrega do CSV e do arquivo convertido. Arquivos que não mudaram,
+        na sincronização, só são convertidos se a conversão ainda não
+        existir.
+
+        Parâmetros
+        ----------
+        download: Future
+            o download do CSV.
+        types: Future
+            os tipos das colunas (ver _submit_types).
+        converter: ColumnarConverter
+            conversor dos CSVs baixados.
+        sink: StorageSink
+            destino dos arquivos baixados (por padrão, None).
+
+        Retorno
+        ----------
+        DownloadResult:
+            o resultado do download.
+        """
+        if sink is not None and sink.keeps_files:
+            sink = None
+        result = download.result()
+        future = None
+        if result.status == 'downloaded' or \
+                not os.path.exists(converter.output_path(result.path)):
+            future = converter.submit(result.path, types.result())
+
+        if sink is not None:
+            if future is not None:
+                try:
+                    future.result()
+                except Exception:
+                    # O erro é emitido ao coletar a conversão
+                    pass
+                output_path = converter.output_path(result.path)
+                if os.path.exists(output_path):
+                    sink.add_file(output_path)
+            sink.add_file(result.path)
+        return result
+
+    @contextlib.contextmanager
+    def _converter(self, convert: str = None):
+        """Cria o conversor dos CSVs baixados, se desejado, e o encerra ao
+        final dos downloads."""
+        if convert is None:
+            yield None
+            return
+
+        with ColumnarConverter(convert) as converter:
+            yield converter
+
+    def _is_table(self, resource: dict) -> bool:
+        """Indica se o recurso é uma tabela de dados em CSV."""
+        return resource.get('format', '').lower() == 'csv' and \
+            'Dicion' not in resource['name']
+
+    def _is_dictionary(self, resource: dict) -> bool:
+        """Indica se o recurso é o dicionário de dados em CSV."""
+        return resource.get('format', '').lower() == 'csv' and \
+            'Dicion' in resource['name']
+
+    def _submit_types(self, pool, resources: list, submitted: list,
+                      sink=None) -> Future:
+        """Agenda a leitura dos tipos das colunas do dicionário de dados.
+
+        Se o dicionário está entre os downloads agendados e fica em
+        disco, os tipos são lidos do arquivo baixado assim que ele
+        terminar; senão, o dicionário é lido da rede por um trabalhador.
+
+        Parâmetros
+        ----------
+        pool: WorkerPool
+            conjunto de trabalhadores que executará os downloads.
+        resources: list
+            todos os recursos do pacote.
+        submitted: list
+            pares (recurso, future) dos downloads agendados do pacote.
+        sink: StorageSink
+            destino dos arquivos baixados (por padrão, None).
+
+        Retorno
+        ----------
+        Future:
+            o tipo do Arrow de cada coluna (ver _dictionary_types).
+        """
+        if sink is None or sink.keeps_files:
+            for resource, future in submitted:
+                if self._is_dictionary(resource):
+                    return self._when_done([future], self._downloaded_types)
+
+        for resource in resources:
+            if self._is_dictionary(resource):
+                return pool.submit(
+                    resource['url'], self._dictionary_types, resources
+                )
+
+        types = Future()
+        types.set_result({})
+        return types
+
+    def _when_done(self, futures: list, fn, *args) -> Future:
+        """Executa fn(*futures, *args) quando todos os futures terminarem,
+        na thread que concluir o último deles, sem ocupar um trabalhador
+        à espera.
+
+        Retorno
+        ----------
+        Future:
+            o resultado (ou a exceção) de fn.
+        """
+        chained = Future()
+        pending = [len(futures)]
+        lock = threading.Lock()
+
+        def done(future):
+            with lock:
+                pending[0] -= 1
+                if pending[0]:
+                    return
+            try:
+                chained.set_result(fn(*(list(futures) + list(args))))
+            except Exception as ex:
+                chained.set_exception(ex)
+
+        for future in futures:
+            future.add_done_callback(done)
+        return chained
+
+    def _downloaded_types(self, download: Future) -> dict:
+        """Lê os tipos das colunas do dicionário de dados já baixado.
+
+        Retorno
+        ----------
+        dict:
+            tipo de cada coluna, ou um dicionário vazio se o download
+            falhou ou o dicionário não tem colunas de nome e tipo.
+        """
+        try:
+            path = download.result().path
+        except Exception:
+            # O erro já foi emitido por _download
+            return {}
+
+        try:
+            with CompressedFile.open(path, 'rt') as f:
+                return self._read_types(f)
+        except Exception as ex:
+            self._emit('on_error', path, ex)
+            return {}
+
+    def _dictionary_types(self, resources: list) -> dict:
+        """Lê o dicionário de dados do pacote, sem gravá-lo em disco, e
+        retorna o tipo do Arrow de cada coluna declarada nele.
+
+        Retorno
+        ----------
+        dict:
+            tipo de cada coluna, ou um dicionário vazio se o pacote não
+            tiver um dicionário em CSV com colunas de nome e tipo.
+        """
+        for resource in resources:
+            if not self._is_dictionary(resource):
+                continue
+
+            try:
+                return self._read_types(self._iter_lines(self._iter_text(
+                    self._iter_bytes(resource['url'])
+                )))
+            except Exception as ex:
+                self._emit('on_error', resource['url'], ex)
+                return {}
+
+        return {}
+
+    def _read_types(self, lines) -> dict:
+        """Retorna o tipo do Arrow de cada coluna declarada nas linhas do
+        dicionário de dados, ou um dicionário vazio se ele não tiver
+        colunas de nome e tipo."""
+        rows = csv.DictReader(lines, delimiter=';')
+        fields = [field.lower() for field in rows.fieldnames or []]
+        name = self._find_field(
+            fields, ('coluna', 'campo', 'atributo', 'nome')
+        )
+        kind = self._find_field(fields, ('tipo',))
+        if name is None or kind is None:
+            return {}
+
+        name = rows.fieldnames[name]
+        kind = rows.fieldnames[kind]
+        types = {}
+        for row in rows:
+            arrow_type = ColumnarConverter.arrow_type(row[kind])
+            if row[name] and arrow_type is not None:
+                types[row[name].strip()] = arrow_type
+        return types
+
+    def _find_field(self, fields: list, names: tuple) -> int:
+        """Retorna a posição da primeira coluna que contém um dos nomes."""
+        for name in names:
+            for position, field in enumerate(fields):
+                if name in field:
+                    return position
+        return None
+
+    def _fetch(self, url: str, file_path: str, headers: dict = None,
+               progress: dict = None, compression: str = None,
+               stream=None):
+        """Baixa a url para file_path através de um arquivo .part ou, se
+        stream for informado, para o fluxo stream.
+
+        Se o arquivo .part de uma tentativa anterior existir, o download é
+        retomado com uma requisição Range (validada por If-Range); se o
+        servidor não aceitar, o download recomeça do início. Falhas de
+        conexão durante a transferência são retomadas do ponto em que
+        pararam, até session.retries vezes.
+
+        Com compressão, o conteúdo é comprimido enquanto é gravado. Como o
+        tamanho do .part não indica mais quantos bytes foram recebidos, as
+        falhas de conexão são retomadas apenas dentro desta chamada; um
+        .part comprimido de uma execução anterior é baixado de novo. O
+        mesmo vale para os fluxos, que não ficam em disco entre execuções.
+
+        Parâmetros
+        ----------
+        url: str
+            a url do arquivo.
+        file_path: str
+            o caminho final do arquivo.
+        headers: dict
+            cabeçalhos adicionais da requisição (por padrão, None).
+        progress: dict
+            dicionário onde são somados, na chave 'bytes', os bytes
+            recebidos (por padrão, None).
+        compression: str
+            'gzip' ou 'zstd' para gravar o arquivo comprimido
+            (por padrão, None).
+        stream: file
+            fluxo binário, vazio, que recebe o conteúdo no lugar do
+            arquivo (por padrão, None).
+
+        Retorno
+        ----------
+        dict:
+            os cabeçalhos da resposta, ou None se o servidor respondeu
+            que o arquivo não mudou (304).
+        """
+        self._emit('on_task_start', file_path, url)
+        start = time.monotonic()
+        part_path = file_path + '.part'
+        if progress is None:
+            progress = {'bytes': 0}
+        attempts = self.session.retries + 1
+        try:
+            for attempt in range(attempts):
+                try:
+                    response_headers = self._fetch_part(
+                        url, part_path, headers, progress, compression,
+                        stream
+                    )
+                    break
+                except (requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError,
+                        odufrDownloadError) as ex:
+                    if attempt + 1 == attempts:
+                        raise
+                    self._emit('on_retry', file_path, attempt + 1, ex)
+
+            if response_headers is not None and stream is None:
+                os.replace(part_path, file_path)
+                self._remove_part_state(part_path)
+                if 'sha256' in progress:
+                    self.store.add(file_path, progress['sha256'].hexdigest())
+                elif self.store is not None:
+                    # O conteúdo comprimido é menor que o recebido
+                    self.store.add(
+                        file_path, ContentStore.hash_file(file_path)
+                    )
+        except Exception as ex:
+            self._emit('on_error', file_path, ex)
+            raise
+
+        self._emit(
+            'on_task_end', file_path, progress['bytes'],
+            time.monotonic() - start
+        )
+        return response_headers
+
+    def _fetch_part(self, url: str, part_path: str, headers: dict = None,
+                    progress: dict = None, compression: str = None,
+                    stream=None):
+        """Realiza uma tentativa de download para o arquivo .part, ou para
+        o fluxo stream, e verifica o tamanho final com o informado pelo
+        servidor.
+
+        Os bytes recebidos são somados em progress['bytes'] e emitidos
+        no evento on_bytes. Com um armazenamento ativado (use_store), o
+        SHA-256 do arquivo é calculado durante a gravação e guardado em
+        progress['sha256']. Com compressão ou com um fluxo, cada tentativa
+        grava um novo bloco no fim do que já foi gravado e os bytes
+        recebidos são contados em progress['raw'].
+
+        Retorno
+        ----------
+        dict:
+            os cabeçalhos da resposta, ou None se o servidor respondeu 304.
+        """
+        offset = 0
+        if stream is not None:
+            # O fluxo só existe nesta chamada de _fetch
+            state = progress.get('state', {})
+            offset = progress.get('raw', 0)
+        else:
+            state = self._read_part_state(part_path)
+            if compression is not None:
+                if os.path.exists(part_path) and progress is not None:
+                    offset = progress.get('raw', 0)
+            elif os.path.exists(part_path) and state.get('url') == url:
+                offset = os.path.getsize(part_path)
+
+        request_headers = {'Accept-Encoding': 'identity'}
+        if offset:
+            request_headers['Range'] = 'bytes={}-'.format(offset)
+            if state.get('validator'):
+                request_headers['If-Range'] = state['validator']
+        else:
+            request_headers.update(headers or {})
+
+        self._throttle_request()
+        response = self.session.get(
+            url, stream=True, headers=request_headers
         )
+        try:
+            if response.status_code == 304:
+                return None
+            if response.status_code == 416:
+                # O .part não corresponde mais ao arquivo do servidor
+                self._discard_part(part_path, progress, stream)
+                raise odufrDownloadError()
+
+            response.raise_for_status()
+            if response.status_code != 206:
+                offset = 0
+            elif self._range_start(response) != offset:
+                self._discard_part(part_path, progress, stream)
+                raise odufrDownloadError()
+            expected = self._expected_size(response, offset)
+
+            validator = response.headers.get('ETag')
+            if not validator:
+                validator = response.headers.get('Last-Modified')
+            state = {'url': url, 'validator': validator}
+            if stream is None:
+                self._write_part_state(part_path, state)
+            else:
+                progress['state'] = state
+            chunk_size = self._read_size()
+            task = part_path[:-len('.part')]
+            received = offset
+            digest = None
+            if self.store is not None and progress is not None and \
+                    compression is None and stream is None:
+                digest = self._part_digest(part_path, offset, progress)
+            if stream is None:
+                writer = CompressedFile.open(
+                    part_path, 'ab' if offset else 'wb', compression
+                )
+            else:
+                if not offset:
+                    stream.seek(0)
+                    stream.truncate()
+                writer = CompressedFile.wrap(stream, compression)
+            with writer as f:
+                for chunk in response.iter_content(chunk_size):
+                    self._throttle_bytes(len(chunk))
+                    f.write(chunk)
+                    if digest is not None:
+                        digest.update(chunk)
+                        progress['hashed'] += len(chunk)
+                    received += len(chunk)
+                    if progress is not None:
+                        progress['bytes'] += len(chunk)
+                        if compression is not None or stream is not None:
+                            progress['raw'] = received
+                    self._emit('on_bytes', task, received, expected)
+        finally:
+            response.close()
+
+        size = received
+        if compression is None and stream is None:
+            size = os.path.getsize(part_path)
+        if expected is not None and size != expected:
+            if size > expected:
+                self._discard_part(part_path, progress, stream)
+            raise odufrDownloadError()
+
+        return response.headers
+
+    def _read_size(self) -> int:
+        """Retorna o tamanho dos blocos lidos das respostas."""
+        if self.bandwidth_limiter is None:
+            return self.chunk_size
+        # Blocos menores deixam a taxa mais uniforme
+        return max(1, min(
+            self.chunk_size, int(self.bandwidth_limiter.capacity)
+        ))
+
+    def _part_digest(self, part_path: str, offset: int, progress: dict):
+        """Retorna o SHA-256 dos primeiros offset bytes do arquivo .part,
+        reaproveitando o da tentativa anterior quando ele já os cobre."""
+        if progress.get('hashed') != offset:
+            digest = hashlib.sha256()
+            if offset:
+                with open(part_path, 'rb') as f:
+                    remaining = offset
+                    while remaining:
+                        chunk = f.read(min(self.chunk_size, remaining))
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+                        remaining -= len(chunk)
+            progress['sha256'] = digest
+            progress['hashed'] = offset
+        return progress['sha256']
+
+    def _range_start(self, response) -> int:
+        """Retorna o byte inicial do cabeçalho Content-Range da resposta."""
+        content_range = response.headers.get('Content-Range', '')
+        start = content_range.split(' ')[-1].split('-')[0]
+        return int(start) if start.isdigit() else None
+
+    def _expected_size(self, response, offset: int) -> int:
+        """Retorna o tamanho final do arquivo informado pela resposta,
+        ou None se o servidor não o informou."""
+        if response.status_code == 206:
+            content_range = response.headers.get('Content-Range', '')
+            total = content_range.rsplit('/', 1)[-1]
+            if total.isdigit():
+                return int(total)
+
+        length = response.headers.get('Content-Length')
+        if length is not None and length.isdigit():
+            return offset + int(length)
+        return None
+
+    def _read_part_state(self, part_path: str) -> dict:
+        """Lê os dados do download interrompido do arquivo .part."""
+        try:
+            with open(part_path + '.json', 'r') as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return {}
+
+    def _write_part_state(self, part_path: str, state: dict):
+        """Guarda os dados necessários para retomar o arquivo .part."""
+        with open(part_path + '.json', 'w') as f:
+            json.dump(state, f)
+
+    def _discard_part(self, part_path: str, progress: dict, stream=None):
+        """Descarta o que foi recebido, no arquivo .part ou no fluxo, para
+        que a próxima tentativa recomece do início."""
+        if stream is None:
+            self._remove_part_state(part_path, True)
+        else:
+            progress['raw'] = 0
 
-        with open(file_path, 'wb') as f:
-            f.write(requests.get(resource['url']).content)
+    def _remove_part_state(self, part_path: str, remove_part: bool = False):
+        """Remove os dados do download interrompido e, se desejado, o
+        próprio arquivo .part."""
+        paths = [part_path + '.json'] + ([part_path] if remove_part else [])
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
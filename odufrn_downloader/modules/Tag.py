@@ -1,5 +1,5 @@
 import os
-import requests
+import threading
 from .Env import Env
 from ..mixins.FilterMixin import FilterMixin
 
@@ -12,31 +12,58 @@ class Tag(Env, FilterMixin):
     url_tag: str
         a url para a consulta de etiquetas da API da UFRN.
     available_tags: list
-        lista de etiquetas que estão disponíveis.
+        lista de etiquetas que estão disponíveis, carregada no
+        primeiro acesso.
     """
 
+    """Pacotes de cada etiqueta já consultada, compartilhados por todas as
+    instâncias do processo"""
+    _tag_packages = {}
+    _tag_packages_lock = threading.Lock()
+
     def __init__(self):
         super().__init__()
 
         self.url_tag = self.url_base + 'api/rest/tag'
-        self.available_tags = []
-        self.load_tags()
+
+    @property
+    def available_tags(self) -> list:
+        return self._catalog('tag_list')
+
+    @available_tags.setter
+    def available_tags(self, value: list):
+        self._set_catalog('tag_list', value)
 
     def load_tags(self):
-        """Atualiza lista de etiquetas disponíveis."""
-        self.available_tags = self._load_list('tag_list')
+        """Atualiza lista de etiquetas disponíveis e descarta os pacotes
+        das etiquetas já consultadas."""
+        self._catalog('tag_list', refresh=True)
+        with Tag._tag_packages_lock:
+            Tag._tag_packages.clear()
 
     def print_tags(self):
         """Imprime as etiquetas."""
         self._print_list("etiquetas", self.available_tags)
 
-    def search_by_tag(self, tag: str) -> list:
+    def search_by_tag(self, tag: str, workers: int = None) -> list:
         """ Busca pacotes com base em etiqueta.
 
+        As etiquetas semelhantes são consultadas simultaneamente e os
+        pacotes de cada uma ficam guardados em memória para as próximas
+        buscas.
+
         Parâmetros
         ----------
         tag: str
             etiqueta desejada
+        workers: int
+            número de etiquetas consultadas simultaneamente
+            (por padrão, max_host_connections).
+
+        Retorno
+        ----------
+        list:
+            os pacotes das etiquetas encontradas, sem repetições.
         """
 
         tags = self.search_similar(tag, self.available_tags, False)
@@ -45,9 +72,71 @@ class Tag(Env, FilterMixin):
             self._print_not_relation(tag, 'Tag')
 
         packages = []
-        for key in tags:
-            url = self.url_tag + "/" + key
-            package = self._request_get(url)
-            packages += package
+        for tag_packages in self._packages_of_tags(tags, workers):
+            for package in tag_packages:
+                if package not in packages:
+                    packages.append(package)
 
         return packages
+
+    def rank_related_tags(self, keyword: str, k: int = 10,
+                          simple_filter: bool = False) -> list:
+        """Procura as k etiquetas mais semelhantes à palavra recebida.
+
+        > Exemplo: rank_related_tags('graduacao', 3)
+
+        Parâmetros
+        ----------
+        keyword: str
+            palavra-chave com a qual será feita a busca.
+        k: int
+            quantidade máxima de etiquetas retornadas (por padrão, 10).
+        simple_filter: bool = False
+            indica o uso de um filtro mais simples que o Levenshtein.
+
+        Retorno
+        ----------
+        list:
+            pares (etiqueta, similaridade), da mais à menos semelhante.
+        """
+        if simple_filter:
+            return self.simple_rank(keyword, self.available_tags, k)
+        return self.rank_similar(keyword, self.available_tags, k, False)
+
+    def _packages_of_tags(self, tags: list, workers: int = None) -> list:
+        """Retorna os pacotes de cada etiqueta, consultando
+        simultaneamente apenas as que ainda não estão em memória.
+
+        Parâmetros
+        ----------
+        tags: list
+            etiquetas desejadas.
+        workers: int
+            número de etiquetas consultadas simultaneamente
+            (por padrão, max_host_connections).
+
+        Retorno
+        ----------
+        list:
+            lista com os pacotes de cada etiqueta, na ordem recebida.
+        """
+        keys = [(self.url_tag, tag) for tag in tags]
+        with Tag._tag_packages_lock:
+            missing = [key for key in keys if key not in Tag._tag_packages]
+
+        if missing:
+            pool = self._worker_pool(workers or self.max_host_connections)
+            with pool:
+                futures = [
+                    (key, pool.submit(
+                        self.url_tag, self._request_get,
+                        self.url_tag + "/" + key[1]
+                    ))
+                    for key in missing
+                ]
+                results = [(key, future.result()) for key, future in futures]
+            with Tag._tag_packages_lock:
+                Tag._tag_packages.update(results)
+
+        with Tag._tag_packages_lock:
+            return [Tag._tag_packages[key] for key in keys]
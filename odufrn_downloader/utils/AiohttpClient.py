@@ -0,0 +1,108 @@
+class AiohttpClient:
+    """Cliente HTTP assíncrono padrão do AsyncODUFRNDownloader, baseado no
+    aiohttp (instalado com `pip install odufrn_downloader[async]`).
+
+    Qualquer objeto com os mesmos métodos (get_json, download e close)
+    pode ser usado no lugar deste cliente; configure e stats são
+    opcionais.
+
+    Atributos
+    ---------
+    timeout: float
+        tempo máximo, em segundos, de espera por dados de uma resposta.
+    limit: int
+        número máximo de conexões abertas simultaneamente.
+    """
+
+    def __init__(self, session=None, timeout: float = 30, limit: int = 100):
+        self.timeout = timeout
+        self.limit = limit
+        self._session = session
+        self._stats = {'requests': 0, 'connections': 0, 'reused': 0}
+
+    def configure(self, limit: int = 100, timeout: float = 30):
+        """Altera o número máximo de conexões e o timeout, antes da
+        primeira requisição."""
+        if self._session is not None:
+            raise RuntimeError(
+                'A sessão já foi aberta; configure o cliente antes das '
+                'requisições ou feche-o com close'
+            )
+        self.limit = limit
+        self.timeout = timeout
+
+    def _get_session(self):
+        if self._session is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise ImportError(
+                    'O AsyncODUFRNDownloader precisa do aiohttp: '
+                    'pip install odufrn_downloader[async]'
+                )
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(
+                    total=None, sock_read=self.timeout
+                ),
+                connector=aiohttp.TCPConnector(limit=self.limit),
+                trace_configs=[self._trace_config(aiohttp)],
+            )
+        return self._session
+
+    def _trace_config(self, aiohttp):
+        """Retorna os ganchos que contam as requisições e as conexões
+        abertas e reaproveitadas pelo conector."""
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._count('requests'))
+        trace_config.on_connection_create_end.append(
+            self._count('connections')
+        )
+        trace_config.on_connection_reuseconn.append(self._count('reused'))
+        return trace_config
+
+    def _count(self, key: str):
+        async def count(session, context, params):
+            self._stats[key] += 1
+        return count
+
+    def stats(self) -> dict:
+        """Retorna as estatísticas de uso das conexões, somando todas as
+        sessões abertas pelo cliente.
+
+        Retorno
+        ----------
+        dict:
+            'requests' (requisições enviadas), 'connections' (conexões
+            abertas) e 'reused' (requisições que reaproveitaram uma
+            conexão existente).
+        """
+        return dict(self._stats)
+
+    async def get_json(self, url: str):
+        """Realiza a requisição e retorna a resposta em json."""
+        async with self._get_session().get(url) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def download(self, url: str, write, chunk_size: int,
+                       headers: dict = None) -> dict:
+        """Baixa a url em blocos de chunk_size bytes, entregando cada
+        bloco à corrotina write, aguardada antes do bloco seguinte.
+
+        Retorno
+        ----------
+        dict:
+            os cabeçalhos da resposta.
+        """
+        session = self._get_session()
+        async with session.get(url, headers=headers) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(chunk_size):
+                await write(chunk)
+            return dict(response.headers)
+
+    async def close(self):
+        """Fecha as conexões abertas pelo cliente."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,30 @@
+import asyncio
+from .TokenBucket import TokenBucket
+
+
+class AsyncTokenBucket(TokenBucket):
+    """Versão do TokenBucket para o asyncio, usada pelo
+    AsyncODUFRNDownloader.
+
+    As fichas são contadas como no TokenBucket, mas acquire é uma
+    corrotina e a espera usa asyncio.sleep, sem bloquear o laço de
+    eventos.
+    """
+
+    async def acquire(self, amount: float = 1) -> float:
+        """Retira fichas do balde, esperando se não houver o suficiente.
+
+        Parâmetros
+        ----------
+        amount: float
+            quantidade de fichas desejada (por padrão, 1).
+
+        Retorno
+        ----------
+        float:
+            o tempo, em segundos, que foi preciso esperar.
+        """
+        wait = self._reserve(amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
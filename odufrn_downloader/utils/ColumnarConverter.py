@@ -0,0 +1,187 @@
+import codecs
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from .CompressedFile import CompressedFile
+
+
+class ColumnarConverter:
+    """Converte arquivos CSV para Parquet ou Arrow IPC em processos
+    separados, para que a conversão não dispute a CPU com os downloads.
+
+    Precisa do pyarrow (instalado com
+    `pip install odufrn_downloader[parquet]`). Cada arquivo é lido e
+    gravado em blocos, sem carregá-lo inteiro na memória.
+
+    Atributos
+    ---------
+    format: str
+        'parquet' ou 'arrow'.
+    delimiter: str
+        separador das colunas dos CSVs (por padrão, ';').
+    """
+
+    """Extensão dos arquivos de cada formato"""
+    FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+    """Trechos dos tipos declarados nos dicionários de dados e os tipos do
+    Arrow correspondentes, na ordem em que são verificados"""
+    TYPES = (
+        ('char', 'string'), ('text', 'string'), ('string', 'string'),
+        ('bool', 'bool'), ('int', 'int64'), ('serial', 'int64'),
+        ('numeric', 'float64'), ('decimal', 'float64'),
+        ('float', 'float64'), ('double', 'float64'), ('real', 'float64'),
+        ('num', 'float64'),
+    )
+
+    def __init__(self, format: str = 'parquet', workers: int = None,
+                 delimiter: str = ';'):
+        if format not in self.FORMATS:
+            raise ValueError('format deve ser parquet ou arrow')
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError(
+                'A conversão para {} precisa do pyarrow: '
+                'pip install odufrn_downloader[parquet]'.format(format)
+            )
+
+        self.format = format
+        self.delimiter = delimiter
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(workers)
+        # Os processos são criados agora, antes das threads dos downloads
+        self._executor.submit(int).result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @classmethod
+    def arrow_type(cls, declared: str) -> str:
+        """Retorna o tipo do Arrow correspondente ao tipo declarado no
+        dicionário de dados, ou None se ele deve ser inferido."""
+        declared = (declared or '').lower()
+        for fragment, arrow_type in cls.TYPES:
+            if fragment in declared:
+                return arrow_type
+        return None
+
+    def output_path(self, csv_path: str) -> str:
+        """Retorna o caminho do arquivo convertido."""
+        csv_path = CompressedFile.strip(csv_path)
+        return os.path.splitext(csv_path)[0] + self.FORMATS[self.format]
+
+    def submit(self, csv_path: str, types: dict = None):
+        """Agenda a conversão do arquivo.
+
+        Parâmetros
+        ----------
+        csv_path: str
+            o caminho do CSV.
+        types: dict
+            tipo do Arrow ('string', 'int64', 'float64' ou 'bool') de cada
+            coluna; as demais têm o tipo inferido (por padrão, None).
+        """
+        future = self._executor.submit(
+            self.convert, csv_path, self.output_path(csv_path),
+            self.format, types or {}, self.delimiter
+        )
+        with self._lock:
+            self._futures[csv_path] = future
+        return future
+
+    def result(self, csv_path: str) -> str:
+        """Aguarda a conversão do arquivo.
+
+        Retorno
+        ----------
+        str:
+            o caminho do arquivo convertido, ou None se a conversão do
+            arquivo não foi agendada.
+        """
+        with self._lock:
+            future = self._futures.pop(csv_path, None)
+        return None if future is None else future.result()
+
+    def close(self):
+        """Aguarda as conversões pendentes e encerra os processos."""
+        self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def convert(csv_path: str, output_path: str, format: str,
+                types: dict, delimiter: str = ';') -> str:
+        """Converte o CSV, lido como UTF-8 ou, se ele tiver bytes
+        inválidos, como Latin-1.
+
+        Se os valores não corresponderem aos tipos do dicionário, a
+        conversão é refeita mantendo apenas as colunas de texto e, por
+        fim, inferindo todos os tipos.
+        """
+        import pyarrow
+
+        attempts = [types]
+        strings = {k: v for k, v in types.items() if v == 'string'}
+        for column_types in (strings, {}):
+            if column_types != attempts[-1]:
+                attempts.append(column_types)
+
+        encoding = ColumnarConverter._encoding(csv_path)
+        for column_types in attempts:
+            try:
+                ColumnarConverter._write(
+                    csv_path, output_path, format, column_types,
+                    delimiter, encoding
+                )
+                return output_path
+            except pyarrow.ArrowInvalid as ex:
+                error = ex
+        raise error
+
+    @staticmethod
+    def _encoding(csv_path: str) -> str:
+        """Retorna 'utf8' se o arquivo for UTF-8 válido e 'latin1' caso
+        contrário (o pyarrow não valida os nomes das colunas)."""
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        with CompressedFile.open(csv_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                try:
+                    decoder.decode(chunk)
+                except UnicodeDecodeError:
+                    return 'latin1'
+        return 'utf8'
+
+    @staticmethod
+    def _write(csv_path: str, output_path: str, format: str, types: dict,
+               delimiter: str, encoding: str):
+        """Grava o arquivo convertido através de um arquivo .tmp."""
+        import pyarrow
+        from pyarrow import csv
+
+        tmp_path = output_path + '.tmp'
+        try:
+            with CompressedFile.open(csv_path, 'rb') as source:
+                reader = csv.open_csv(
+                    source,
+                    read_options=csv.ReadOptions(encoding=encoding),
+                    parse_options=csv.ParseOptions(delimiter=delimiter),
+                    convert_options=csv.ConvertOptions(column_types={
+                        name: pyarrow.type_for_alias(alias)
+                        for name, alias in types.items()
+                    })
+                )
+                if format == 'parquet':
+                    from pyarrow import parquet
+                    writer = parquet.ParquetWriter(tmp_path, reader.schema)
+                else:
+                    writer = pyarrow.ipc.new_file(tmp_path, reader.schema)
+                with writer:
+                    for batch in reader:
+                        writer.write_batch(batch)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
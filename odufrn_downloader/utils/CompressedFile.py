@@ -0,0 +1,153 @@
+import codecs
+import contextlib
+import gzip
+import io
+
+
+class CompressedFile:
+    """Abre arquivos gravados com ou sem compressão (gzip ou zstd),
+    escolhendo a forma de leitura pela extensão do arquivo.
+
+    A compressão zstd precisa do zstandard (instalado com
+    `pip install odufrn_downloader[zstd]`).
+    """
+
+    """Extensão dos arquivos de cada compressão"""
+    SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+    @classmethod
+    def check(cls, compression: str = None):
+        """Verifica se a compressão é conhecida e está disponível.
+
+        Parâmetros
+        ----------
+        compression: str
+            'gzip', 'zstd' ou None (sem compressão).
+        """
+        if compression is None:
+            return
+        if compression not in cls.SUFFIXES:
+            raise ValueError('compression deve ser gzip ou zstd')
+        if compression == 'zstd':
+            cls._zstandard()
+
+    @classmethod
+    def suffix(cls, compression: str = None) -> str:
+        """Retorna a extensão dos arquivos da compressão."""
+        return cls.SUFFIXES.get(compression, '')
+
+    @classmethod
+    def detect(cls, path: str) -> str:
+        """Retorna a compressão do arquivo pela sua extensão, ou None."""
+        for compression, suffix in cls.SUFFIXES.items():
+            if path.endswith(suffix):
+                return compression
+        return None
+
+    @classmethod
+    def strip(cls, path: str) -> str:
+        """Retorna o caminho sem a extensão da compressão."""
+        suffix = cls.suffix(cls.detect(path))
+        return path[:-len(suffix)] if suffix else path
+
+    @classmethod
+    def open(cls, path: str, mode: str = 'rb', compression: str = None,
+             encoding: str = None):
+        """Abre o arquivo, comprimindo ou descomprimindo o conteúdo de
+        forma transparente.
+
+        Os modos de escrita 'wb' e 'ab' gravam um novo bloco comprimido
+        (membro gzip ou frame zstd), e a leitura percorre todos os blocos
+        do arquivo.
+
+        > Exemplo: CompressedFile.open('discentes/Discentes 2019.csv.gz', 'rt')
+
+        Parâmetros
+        ----------
+        path: str
+            o caminho do arquivo.
+        mode: str
+            'rb', 'rt', 'wb' ou 'ab' (por padrão, 'rb').
+        compression: str
+            'gzip', 'zstd' ou None (por padrão, detectada pela extensão).
+        encoding: str
+            codificação usada no modo 'rt' (por padrão, UTF-8 se o início
+            do arquivo for UTF-8 válido, ou Latin-1).
+
+        Retorno
+        ----------
+        file:
+            o arquivo aberto.
+        """
+        compression = compression or cls.detect(path)
+        if mode == 'rt':
+            if encoding is None:
+                encoding = cls._encoding(path, compression)
+            return io.TextIOWrapper(
+                cls.open(path, 'rb', compression), encoding, newline=''
+            )
+
+        if compression == 'gzip':
+            # mtime=0 deixa iguais os arquivos de mesmo conteúdo
+            return gzip.GzipFile(path, mode, mtime=0)
+        if compression == 'zstd':
+            zstandard = cls._zstandard()
+            if mode == 'rb':
+                return zstandard.ZstdDecompressor().stream_reader(
+                    open(path, 'rb'), read_across_frames=True
+                )
+            return zstandard.ZstdCompressor().stream_writer(open(path, mode))
+        return open(path, mode)
+
+    @classmethod
+    @contextlib.contextmanager
+    def wrap(cls, fileobj, compression: str = None):
+        """Grava em fileobj, já aberto, um novo bloco comprimido, sem
+        fechar fileobj ao final.
+
+        > Exemplo: with CompressedFile.wrap(stream, 'gzip') as f: ...
+
+        Parâmetros
+        ----------
+        fileobj: file
+            o arquivo ou fluxo binário de destino.
+        compression: str
+            'gzip', 'zstd' ou None (sem compressão).
+        """
+        if compression is None:
+            yield fileobj
+        elif compression == 'gzip':
+            with gzip.GzipFile('', 'wb', fileobj=fileobj, mtime=0) as f:
+                yield f
+        else:
+            zstandard = cls._zstandard()
+            writer = zstandard.ZstdCompressor().stream_writer(fileobj)
+            try:
+                yield writer
+            finally:
+                # Encerra o frame, como o close dos arquivos abertos
+                writer.flush(zstandard.FLUSH_FRAME)
+
+    @classmethod
+    def _encoding(cls, path: str, compression: str = None,
+                  sample: int = 1024 * 1024) -> str:
+        """Retorna 'utf-8' se o início do arquivo for UTF-8 válido e
+        'latin-1' caso contrário."""
+        with cls.open(path, 'rb', compression) as f:
+            data = f.read(sample)
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(data)
+        except UnicodeDecodeError:
+            return 'latin-1'
+        return 'utf-8'
+
+    @staticmethod
+    def _zstandard():
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                'A compressão zstd precisa do zstandard: '
+                'pip install odufrn_downloader[zstd]'
+            )
+        return zstandard
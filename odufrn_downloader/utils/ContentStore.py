@@ -0,0 +1,174 @@
+import hashlib
+import os
+import threading
+
+
+class ContentStore:
+    """Armazenamento de arquivos endereçado pelo conteúdo (SHA-256).
+
+    Cada conteúdo é guardado uma única vez em objects/<2 primeiros
+    caracteres>/<hash> e as pastas dos pacotes recebem hard links para
+    ele, então arquivos iguais publicados em pacotes ou com nomes
+    diferentes ocupam o espaço de um só. A pasta do armazenamento deve
+    estar no mesmo sistema de arquivos das pastas dos pacotes; caso
+    contrário, os arquivos são mantidos como estão.
+
+    Atributos
+    ---------
+    path: str
+        a pasta do armazenamento.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.path, 'objects'), exist_ok=True)
+
+    def object_path(self, digest: str) -> str:
+        """Retorna o caminho do objeto com o hash recebido."""
+        return os.path.join(self.path, 'objects', digest[:2], digest)
+
+    @staticmethod
+    def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+        """Calcula o SHA-256 do arquivo, em hexadecimal.
+
+        Parâmetros
+        ----------
+        file_path: str
+            o caminho do arquivo.
+        chunk_size: int
+            tamanho dos blocos lidos (por padrão, 1 MiB).
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def add(self, file_path: str, digest: str) -> bool:
+        """Guarda o arquivo no armazenamento e o substitui por um hard
+        link para o objeto do seu conteúdo.
+
+        Parâmetros
+        ----------
+        file_path: str
+            o caminho do arquivo.
+        digest: str
+            o SHA-256 do conteúdo do arquivo, em hexadecimal.
+
+        Retorno
+        ----------
+        bool:
+            True se o arquivo passou a apontar para o objeto, False se
+            não foi possível criar o link.
+        """
+        object_path = self.object_path(digest)
+        with self._lock:
+            try:
+                if not os.path.exists(object_path):
+                    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                    os.link(file_path, object_path)
+                    return True
+
+                if os.path.samefile(file_path, object_path):
+                    return True
+
+                tmp_path = file_path + '.link'
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                os.link(object_path, tmp_path)
+                os.replace(tmp_path, file_path)
+            except OSError:
+                return False
+
+        return True
+
+    def deduplicate(self, root: str, dry_run: bool = False) -> dict:
+        """Procura arquivos de mesmo conteúdo dentro de root e, se
+        dry_run for False, troca as cópias por hard links para o
+        armazenamento e remove os objetos que não são mais usados.
+
+        Parâmetros
+        ----------
+        root: str
+            a pasta onde os arquivos serão procurados.
+        dry_run: bool
+            flag para apenas calcular o espaço duplicado
+            (por padrão, False).
+
+        Retorno
+        ----------
+        dict:
+            com as chaves 'files' (arquivos verificados), 'unique'
+            (conteúdos diferentes), 'duplicate_bytes' (espaço ocupado por
+            cópias), 'reclaimed' (espaço liberado) e 'pruned' (espaço
+            liberado pela remoção de objetos não usados).
+        """
+        by_digest = {}
+        for file_path in self._files(root):
+            by_digest.setdefault(
+                self.hash_file(file_path), []
+            ).append(file_path)
+
+        report = {
+            'files': sum(len(paths) for paths in by_digest.values()),
+            'unique': len(by_digest),
+            'duplicate_bytes': 0, 'reclaimed': 0, 'pruned': 0
+        }
+        for digest, paths in by_digest.items():
+            inodes = set()
+            for file_path in paths + [self.object_path(digest)]:
+                if os.path.exists(file_path):
+                    status = os.stat(file_path)
+                    inodes.add((status.st_dev, status.st_ino))
+            size = os.path.getsize(paths[0])
+            duplicate = (len(inodes) - 1) * size
+            report['duplicate_bytes'] += duplicate
+
+            if dry_run:
+                continue
+            # Todas as cópias são ligadas, mesmo que uma delas falhe
+            linked = [self.add(file_path, digest) for file_path in paths]
+            if all(linked):
+                report['reclaimed'] += duplicate
+
+        if not dry_run:
+            report['pruned'] = self.prune()
+        return report
+
+    def prune(self) -> int:
+        """Remove os objetos que não têm mais nenhum link fora do
+        armazenamento.
+
+        Retorno
+        ----------
+        int:
+            o espaço liberado, em bytes.
+        """
+        freed = 0
+        with self._lock:
+            for dirpath, _, filenames in os.walk(
+                    os.path.join(self.path, 'objects')):
+                for filename in filenames:
+                    object_path = os.path.join(dirpath, filename)
+                    status = os.stat(object_path)
+                    if status.st_nlink == 1:
+                        os.remove(object_path)
+                        freed += status.st_size
+        return freed
+
+    def _files(self, root: str):
+        """Percorre os arquivos de dados dentro de root, ignorando o
+        armazenamento, links simbólicos e os arquivos de controle."""
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [
+                name for name in dirnames
+                if os.path.abspath(os.path.join(dirpath, name)) != self.path
+            ]
+            for filename in filenames:
+                if filename.endswith(('.part', '.part.json', '.link')) or \
+                        filename.startswith('.odufrn-'):
+                    continue
+                file_path = os.path.join(dirpath, filename)
+                if not os.path.islink(file_path):
+                    yield file_path
@@ -0,0 +1,67 @@
+import contextlib
+import os
+import shutil
+from .StorageSink import StorageSink
+
+
+class DirectorySink(StorageSink):
+    """Destino que mantém os arquivos soltos em uma pasta, como nos
+    downloads sem destino. Como os arquivos ficam em disco, os downloads
+    usam os arquivos .part e aceitam a sincronização.
+
+    Atributos
+    ---------
+    root: str
+        a pasta dos arquivos.
+    """
+
+    keeps_files = True
+
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        super().__init__(path)
+
+    @contextlib.contextmanager
+    def open(self, file_path: str):
+        """Abre o arquivo .part, que recebe o nome final quando o bloco
+        with termina sem erros."""
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        try:
+            with open(file_path + '.part', 'wb') as stream:
+                yield stream
+        except BaseException:
+            os.remove(file_path + '.part')
+            raise
+        os.replace(file_path + '.part', file_path)
+
+    def add(self, file_path: str, fileobj):
+        with self.open(file_path) as stream:
+            shutil.copyfileobj(fileobj, stream, 1024 * 1024)
+
+    def add_file(self, file_path: str):
+        """Os arquivos em disco já estão no lugar final."""
+
+    def link(self, source: str, target: str):
+        self.link_file(source, target)
+
+    @staticmethod
+    def link_file(source: str, target: str):
+        """Liga target ao arquivo source, substituindo o que existir.
+
+        O arquivo é ligado por hard link; se o sistema de arquivos não
+        permitir, por link simbólico e, por fim, por cópia.
+        """
+        if os.path.exists(target):
+            if os.path.samefile(source, target):
+                return
+            os.remove(target)
+        elif os.path.islink(target):
+            os.remove(target)
+
+        try:
+            os.link(source, target)
+        except OSError:
+            try:
+                os.symlink(os.path.abspath(source), target)
+            except OSError:
+                shutil.copy2(source, target)
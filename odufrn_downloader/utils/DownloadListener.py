@@ -0,0 +1,84 @@
+class DownloadListener:
+    """Interface dos eventos emitidos durante os downloads.
+
+    As subclasses sobrescrevem apenas os eventos de interesse; os demais
+    não fazem nada. Os eventos podem ser emitidos por várias threads ao
+    mesmo tempo. Cada arquivo é identificado pelo caminho onde será
+    salvo; os erros fora de um arquivo (consultas de metadados) são
+    identificados pela url ou pelo nome consultado.
+    """
+
+    def on_task_start(self, task: str, url: str):
+        """Início do download de um arquivo.
+
+        Parâmetros
+        ----------
+        task: str
+            o caminho do arquivo.
+        url: str
+            a url do arquivo.
+        """
+
+    def on_bytes(self, task: str, received: int, total: int):
+        """Recebimento de um bloco do arquivo.
+
+        Parâmetros
+        ----------
+        task: str
+            o caminho do arquivo.
+        received: int
+            bytes do arquivo já gravados, incluindo os de downloads
+            retomados.
+        total: int
+            tamanho final do arquivo, ou None se desconhecido.
+        """
+
+    def on_retry(self, task: str, attempt: int, exception: Exception):
+        """Nova tentativa de download após uma falha.
+
+        Parâmetros
+        ----------
+        task: str
+            o caminho do arquivo.
+        attempt: int
+            o número da nova tentativa (a primeira é 1).
+        exception: Exception
+            a falha da tentativa anterior.
+        """
+
+    def on_task_end(self, task: str, size: int, duration: float):
+        """Fim do download de um arquivo.
+
+        Parâmetros
+        ----------
+        task: str
+            o caminho do arquivo.
+        size: int
+            bytes recebidos nesta execução (0 se o servidor respondeu que
+            o arquivo não mudou).
+        duration: float
+            duração do download, em segundos.
+        """
+
+    def on_error(self, task: str, exception: Exception):
+        """Falha definitiva de um download ou de uma consulta.
+
+        Parâmetros
+        ----------
+        task: str
+            o caminho do arquivo, a url ou o nome consultado.
+        exception: Exception
+            a exceção.
+        """
+
+    def on_metadata(self, url: str, duration: float):
+        """Consulta de metadados feita à API (não emitida quando a
+        resposta vem do cache).
+
+        Parâmetros
+        ----------
+        url: str
+            a url consultada.
+        duration: float
+            duração da consulta, em segundos.
+        """
@@ -0,0 +1,295 @@
+import hashlib
+import json
+import math
+import os
+
+
+class DownloadPlan:
+    """Lista dos downloads que serão feitos, com o tamanho de cada
+    arquivo, que pode ser conferida, salva e executada depois.
+
+    Cada tarefa é um dicionário com as chaves 'group' (o grupo, ou None),
+    'package', 'path' (a pasta do pacote), 'resource' (o recurso, como
+    retornado pela API), 'size' (o tamanho em bytes, ou None se
+    desconhecido) e 'source' (a pasta onde o pacote será baixado, se ele
+    for apenas ligado a partir de outro grupo, ou None).
+
+    Atributos
+    ---------
+    tasks: list
+        as tarefas do plano.
+    """
+
+    """Folga da carga de cada parte na divisão de assign, em relação à
+    sua fração do total de bytes"""
+    LOAD_SLACK = 0.02
+
+    def __init__(self, tasks: list = None):
+        self.tasks = tasks or []
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+    @property
+    def total_files(self) -> int:
+        """Número de arquivos que serão baixados."""
+        return sum(1 for task in self.tasks if task['source'] is None)
+
+    @property
+    def total_bytes(self) -> int:
+        """Soma dos tamanhos conhecidos dos arquivos que serão baixados."""
+        return sum(
+            task['size'] or 0 for task in self.tasks
+            if task['source'] is None
+        )
+
+    def totals(self, by: str = 'package') -> dict:
+        """Soma os arquivos e bytes do plano por pacote ou por grupo.
+
+        Parâmetros
+        ----------
+        by: str
+            'package' ou 'group' (por padrão, 'package').
+
+        Retorno
+        ----------
+        dict:
+            para cada pacote ou grupo, um dicionário com as chaves 'files'
+            (arquivos baixados), 'bytes' (tamanho conhecido), 'unknown'
+            (arquivos de tamanho desconhecido) e 'linked' (arquivos
+            ligados a partir de outro grupo).
+        """
+        totals = {}
+        for task in self.tasks:
+            total = totals.setdefault(task[by], {
+                'files': 0, 'bytes': 0, 'unknown': 0, 'linked': 0
+            })
+            if task['source'] is not None:
+                total['linked'] += 1
+                continue
+            total['files'] += 1
+            if task['size'] is None:
+                total['unknown'] += 1
+            else:
+                total['bytes'] += task['size']
+
+        return totals
+
+    def print_totals(self, by: str = 'package'):
+        """Imprime os totais do plano por pacote ou por grupo.
+
+        Parâmetros
+        ----------
+        by: str
+            'package' ou 'group' (por padrão, 'package').
+        """
+        for name, total in self.totals(by).items():
+            message = "{}: {} arquivos, {:.1f} MB".format(
+                name, total['files'], total['bytes'] / 1024 ** 2
+            )
+            if total['unknown']:
+                message += " ({} de tamanho desconhecido)".format(
+                    total['unknown']
+                )
+            if total['linked']:
+                message += " e {} ligados de outro grupo".format(
+                    total['linked']
+                )
+            print(message)
+
+        print("Total: {} arquivos, {:.1f} MB".format(
+            self.total_files, self.total_bytes / 1024 ** 2
+        ))
+
+    def assign(self, shard_count: int, weights: list = None) -> dict:
+        """Distribui os arquivos do plano entre shard_count partes com
+        bytes proporcionais aos seus pesos.
+
+        Os arquivos são percorridos do maior para o menor (os empates são
+        desfeitos pelo hash do pacote e da URL) e cada um vai para a
+        primeira parte, na ordem de preferência de rank, em que ainda
+        cabe: cada parte comporta a sua fração dos bytes distribuídos até
+        então, com uma folga de LOAD_SLACK. Se nenhuma parte comportar o
+        arquivo, ele vai para a parte menos carregada em relação ao seu
+        peso. A distribuição depende apenas do plano, então máquinas que
+        consultaram os mesmos metadados chegam à mesma divisão, e a
+        preferência pelo hash tende a manter os arquivos na mesma parte
+        quando o plano muda pouco. Os arquivos de tamanho desconhecido
+        pesam o tamanho médio dos demais.
+
+        Parâmetros
+        ----------
+        shard_count: int
+            o número de partes.
+        weights: list
+            o peso de cada parte (por padrão, None, pesos iguais).
+
+        Retorno
+        ----------
+        dict:
+            a parte (de 0 a shard_count - 1) de cada arquivo, indexada
+            pela tupla (pacote, URL).
+        """
+        weights = self._weights(shard_count, weights)
+        sizes = {}
+        for task in self.tasks:
+            if task['source'] is None:
+                sizes[self.key(task)] = task['size']
+        known = [size for size in sizes.values() if size is not None]
+        default = sum(known) // len(known) if known else 1
+        sizes = {
+            key: default if size is None else size
+            for key, size in sizes.items()
+        }
+
+        loads = [0] * shard_count
+        shards = {}
+        for key in sorted(sizes, key=lambda key: (
+                -sizes[key], self._hash(key))):
+            # A capacidade acompanha o total já distribuído
+            total = (sum(loads) + sizes[key]) * (1 + self.LOAD_SLACK)
+            capacities = [total * weight / sum(weights) for weight in weights]
+            ranking = self.rank(key, shard_count, weights)
+            shard = next((
+                index for index in ranking
+                if loads[index] + sizes[key] <= capacities[index]
+            ), None)
+            if shard is None:
+                shard = min(ranking, key=lambda index: (
+                    loads[index] + sizes[key]) / weights[index])
+            shards[key] = shard
+            loads[shard] += sizes[key]
+
+        return shards
+
+    def shard(self, shard_index: int, shard_count: int,
+              weights: list = None):
+        """Retorna a parte do plano que cabe a uma das máquinas, segundo
+        a distribuição de assign.
+
+        Os pacotes ligados a partir de outro grupo acompanham os arquivos
+        de origem.
+
+        > Exemplo: plan.shard(0, 4)
+
+        Parâmetros
+        ----------
+        shard_index: int
+            a parte desejada, de 0 a shard_count - 1.
+        shard_count: int
+            o número de partes.
+        weights: list
+            o peso de cada parte (por padrão, None, pesos iguais).
+
+        Retorno
+        ----------
+        DownloadPlan:
+            o plano com as tarefas da parte.
+        """
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(
+                'shard_index deve estar entre 0 e shard_count - 1'
+            )
+
+        shards = self.assign(shard_count, weights)
+        return DownloadPlan([
+            task for task in self.tasks
+            if shards.get(self.key(task)) == shard_index
+        ])
+
+    @classmethod
+    def rank(cls, key: tuple, shard_count: int,
+             weights: list = None) -> list:
+        """Retorna as partes na ordem de preferência do arquivo, por
+        rendezvous hashing ponderado.
+
+        Cada parte recebe a nota -peso / ln(h), em que h é o hash da chave
+        e da parte, entre 0 e 1, e as partes são ordenadas da maior para a
+        menor nota. A ordem depende apenas da chave e dos pesos.
+
+        Parâmetros
+        ----------
+        key: tuple
+            a chave (pacote, URL) do arquivo.
+        shard_count: int
+            o número de partes.
+        weights: list
+            o peso de cada parte (por padrão, None, pesos iguais).
+
+        Retorno
+        ----------
+        list:
+            as partes, de 0 a shard_count - 1, da preferida à última.
+        """
+        weights = cls._weights(shard_count, weights)
+
+        def score(index):
+            digest = int(cls._hash(tuple(key) + (index,))[:15], 16)
+            return -weights[index] / math.log(
+                (digest + 1) / (16 ** 15 + 1)
+            )
+
+        return sorted(range(shard_count), key=score, reverse=True)
+
+    @staticmethod
+    def _weights(shard_count: int, weights: list = None) -> list:
+        """Verifica o número de partes e os seus pesos."""
+        if shard_count < 1:
+            raise ValueError('shard_count deve ser maior que zero')
+        if weights is None:
+            return [1] * shard_count
+        if len(weights) != shard_count or min(weights) <= 0:
+            raise ValueError(
+                'weights deve ter um peso positivo para cada parte'
+            )
+        return weights
+
+    def digest(self) -> str:
+        """Retorna um hash dos arquivos do plano, igual em máquinas que
+        montaram o mesmo plano."""
+        keys = sorted(
+            self.key(task) for task in self.tasks if task['source'] is None
+        )
+        return hashlib.sha1(json.dumps(keys).encode()).hexdigest()
+
+    @staticmethod
+    def key(task: dict) -> tuple:
+        """Retorna a chave (pacote, URL) do arquivo da tarefa."""
+        return task['package'], task['resource']['url']
+
+    @staticmethod
+    def _hash(key: tuple) -> str:
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def save(self, file_path: str):
+        """Salva o plano em um arquivo JSON.
+
+        Parâmetros
+        ----------
+        file_path: str
+            o caminho do arquivo.
+        """
+        tmp_path = file_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': 1, 'tasks': self.tasks}, f, indent=1)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str):
+        """Carrega um plano salvo por save.
+
+        Parâmetros
+        ----------
+        file_path: str
+            o caminho do arquivo.
+
+        Retorno
+        ----------
+        DownloadPlan:
+            o plano salvo.
+        """
+        with open(file_path) as f:
+            return cls(json.load(f)['tasks'])
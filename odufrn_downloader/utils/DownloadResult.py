@@ -0,0 +1,52 @@
+class DownloadResult:
+    """Resultado do download de um arquivo.
+
+    Atributos
+    ---------
+    package: str
+        nome do pacote.
+    resource: dict
+        o recurso do pacote, como retornado pela API.
+    status: str
+        'downloaded' (baixado), 'unchanged' (não mudou, na
+        sincronização), 'linked' (ligado a partir de outro grupo) ou
+        'failed' (falhou).
+    path: str
+        o caminho do arquivo.
+    bytes: int
+        bytes recebidos nesta execução.
+    duration: float
+        duração do download, em segundos.
+    exception: Exception
+        a exceção, se o download falhou.
+    options: dict
+        nas falhas da consulta ao pacote (em que resource é None e path é
+        a pasta do pacote), os parâmetros do download ('dictionary',
+        'years' e 'compression'), usados por retry_failed; nas falhas da
+        consulta a um grupo, package também é None, path é a pasta do
+        grupo e há ainda a chave 'group', com o nome do grupo.
+    """
+
+    __slots__ = ('package', 'resource', 'status', 'path', 'bytes',
+                 'duration', 'exception', 'options')
+
+    def __init__(self, package: str, resource: dict, status: str,
+                 path: str, bytes: int = 0, duration: float = 0.0,
+                 exception: Exception = None, options: dict = None):
+        self.package = package
+        self.resource = resource
+        self.status = status
+        self.path = path
+        self.bytes = bytes
+        self.duration = duration
+        self.exception = exception
+        self.options = options
+
+    @property
+    def failed(self) -> bool:
+        return self.status == 'failed'
+
+    def __repr__(self) -> str:
+        return 'DownloadResult({!r}, {!r}, {}, {} bytes, {:.2f}s)'.format(
+            self.package, self.path, self.status, self.bytes, self.duration
+        )
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+
+
+class Manifest:
+    """Registro local dos recursos baixados de um pacote, usado pela
+    sincronização incremental para identificar os recursos que não
+    mudaram desde o último download.
+
+    O registro fica no arquivo .odufrn-manifest.json, dentro da pasta do
+    pacote, e guarda para cada arquivo o last_modified, o size e o hash
+    informados pela API, além do ETag e do Last-Modified da resposta HTTP.
+    Os registros ficam em memória até save, chamado uma vez ao final dos
+    downloads de cada pacote.
+
+    Atributos
+    ---------
+    file_path: str
+        o caminho do arquivo do registro.
+    entries: dict
+        os dados registrados de cada arquivo, indexados pelo nome.
+    unchanged: set
+        caminhos dos arquivos que não mudaram nesta execução.
+    """
+
+    FILENAME = '.odufrn-manifest.json'
+    METADATA_FIELDS = ('last_modified', 'size', 'hash')
+
+    def __init__(self, path: str):
+        self.file_path = os.path.join(path, self.FILENAME)
+        self.entries = {}
+        self.unchanged = set()
+        self._lock = threading.Lock()
+        self._changed = False
+
+        if os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, 'r') as f:
+                    self.entries = json.load(f)
+            except ValueError:
+                self.entries = {}
+
+    def is_unchanged(self, file_path: str, resource: dict) -> bool:
+        """Verifica se o arquivo existe, tem o tamanho registrado e se os
+        metadados do recurso na API não mudaram.
+
+        Parâmetros
+        ----------
+        file_path: str
+            o caminho do arquivo baixado.
+        resource: dict
+            o recurso do pacote, como retornado pela API.
+        """
+        entry = self.entries.get(os.path.basename(file_path))
+        if entry is None or not os.path.exists(file_path):
+            return False
+        if os.path.getsize(file_path) != entry.get('bytes'):
+            return False
+
+        compared = False
+        for field in self.METADATA_FIELDS:
+            if resource.get(field) in (None, '') or field not in entry:
+                continue
+            if str(resource[field]) != str(entry[field]):
+                return False
+            compared = True
+        return compared
+
+    def conditional_headers(self, file_path: str) -> dict:
+        """Retorna os cabeçalhos de requisição condicional (If-None-Match e
+        If-Modified-Since) do arquivo, se ele ainda existir."""
+        entry = self.entries.get(os.path.basename(file_path))
+        if entry is None or not os.path.exists(file_path):
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('http_last_modified'):
+            headers['If-Modified-Since'] = entry['http_last_modified']
+        return headers
+
+    def record(self, file_path: str, resource: dict, headers=None):
+        """Registra o arquivo baixado, sem salvar o registro em disco.
+
+        Parâmetros
+        ----------
+        file_path: str
+            o caminho do arquivo baixado.
+        resource: dict
+            o recurso do pacote, como retornado pela API.
+        headers: dict
+            os cabeçalhos da resposta HTTP do download.
+        """
+        headers = headers or {}
+        name = os.path.basename(file_path)
+        with self._lock:
+            entry = dict(self.entries.get(name, {}))
+            entry.update({
+                'id': resource.get('id'),
+                'url': resource.get('url'),
+                'bytes': os.path.getsize(file_path),
+            })
+            for field in self.METADATA_FIELDS:
+                entry[field] = resource.get(field)
+            if headers.get('ETag'):
+                entry['etag'] = headers['ETag']
+            if headers.get('Last-Modified'):
+                entry['http_last_modified'] = headers['Last-Modified']
+            self.entries[name] = entry
+            self._changed = True
+
+    def mark_unchanged(self, file_path: str, resource: dict, headers=None):
+        """Registra que o arquivo não mudou nesta execução."""
+        self.unchanged.add(file_path)
+        self.record(file_path, resource, headers)
+
+    def save(self):
+        """Salva o registro em disco, se houver mudanças."""
+        with self._lock:
+            if not self._changed:
+                return
+            tmp_path = self.file_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.file_path)
+            self._changed = False
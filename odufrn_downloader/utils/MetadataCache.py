@@ -0,0 +1,153 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class MetadataCache:
+    """Cache em disco (SQLite) das respostas de metadados da API.
+
+    As entradas expiram de acordo com o tempo de vida (TTL) do endpoint
+    consultado e as menos usadas recentemente são descartadas quando o
+    tamanho total ultrapassa max_size.
+
+    Atributos
+    ---------
+    path: str
+        a pasta onde fica o arquivo do cache.
+    ttls: dict
+        tempo de vida, em segundos, das respostas de cada endpoint.
+    max_size: int
+        tamanho máximo, em bytes, das respostas guardadas.
+    """
+
+    DEFAULT_TTLS = {
+        'package_list': 6 * 3600,
+        'group_list': 6 * 3600,
+        'tag_list': 6 * 3600,
+        'dataset': 3600,
+        'group': 3600,
+        'tag': 3600,
+        'package_search': 600,
+        'default': 600,
+    }
+
+    def __init__(self, path: str = None, ttls: dict = None,
+                 max_size: int = 64 * 1024 * 1024):
+        self.path = path or os.path.join(
+            os.path.expanduser('~'), '.cache', 'odufrn_downloader'
+        )
+        self.ttls = dict(self.DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.max_size = max_size
+
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(self.path, 'metadata.sqlite3'),
+            timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'url TEXT PRIMARY KEY, endpoint TEXT, body TEXT, size INTEGER, '
+            'stored_at REAL, accessed_at REAL)'
+        )
+
+    def endpoint(self, url: str) -> str:
+        """Identifica o endpoint da API consultado pela url.
+
+        > Exemplo: endpoint('http://dados.ufrn.br/api/rest/dataset/obras')
+        retorna 'dataset'.
+        """
+        parts = [p for p in urlparse(url).path.split('/') if p]
+        if len(parts) >= 3 and parts[:2] == ['api', 'action']:
+            return parts[2]
+        if len(parts) >= 3 and parts[:2] == ['api', 'rest']:
+            return parts[2]
+        return 'default'
+
+    def ttl(self, url: str) -> float:
+        """Retorna o tempo de vida das respostas da url."""
+        return self.ttls.get(self.endpoint(url), self.ttls['default'])
+
+    def get(self, url: str):
+        """Retorna a resposta guardada para a url ou None, caso ela não
+        exista ou tenha expirado."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                'SELECT body, stored_at FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl(url):
+                return None
+            self._db.execute(
+                'UPDATE responses SET accessed_at = ? WHERE url = ?',
+                (now, url)
+            )
+        return json.loads(row[0])
+
+    def set(self, url: str, value):
+        """Guarda a resposta da url e descarta as entradas excedentes."""
+        body = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                (url, self.endpoint(url), body, len(body), now, now)
+            )
+            self._evict()
+
+    def invalidate(self, url: str = None, endpoint: str = None):
+        """Remove a resposta da url, as respostas do endpoint ou,
+        sem parâmetros, todo o cache."""
+        with self._lock:
+            if url is not None:
+                self._db.execute('DELETE FROM responses WHERE url = ?', (url,))
+            elif endpoint is not None:
+                self._db.execute(
+                    'DELETE FROM responses WHERE endpoint = ?', (endpoint,)
+                )
+            else:
+                self._db.execute('DELETE FROM responses')
+
+    def size(self) -> int:
+        """Retorna o tamanho total, em bytes, das respostas guardadas."""
+        with self._lock:
+            return self._db.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM responses'
+            ).fetchone()[0]
+
+    def _evict(self):
+        """Descarta as entradas expiradas e, se necessário, as menos
+        usadas recentemente até o cache caber em max_size."""
+        now = time.time()
+        for endpoint, ttl in self.ttls.items():
+            self._db.execute(
+                'DELETE FROM responses WHERE endpoint = ? AND stored_at < ?',
+                (endpoint, now - ttl)
+            )
+
+        total = self._db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses'
+        ).fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        rows = self._db.execute(
+            'SELECT url, size FROM responses ORDER BY accessed_at'
+        ).fetchall()
+        for url, size in rows:
+            if total <= self.max_size:
+                break
+            self._db.execute('DELETE FROM responses WHERE url = ?', (url,))
+            total -= size
+
+    def close(self):
+        """Fecha o arquivo do cache."""
+        with self._lock:
+            self._db.close()
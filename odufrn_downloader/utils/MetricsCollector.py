@@ -0,0 +1,114 @@
+import threading
+import time
+from .DownloadListener import DownloadListener
+
+
+class MetricsCollector(DownloadListener):
+    """Coleta as métricas dos downloads: latência e taxa de cada arquivo,
+    novas tentativas, erros e o tempo gasto em metadados e em arquivos.
+
+    > Exemplo: ufrn_data.add_listener(MetricsCollector())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Descarta as métricas coletadas."""
+        with self._lock:
+            self._files = {}
+            self._errors = []
+            self._metadata_requests = 0
+            self._metadata_time = 0.0
+
+    def on_task_start(self, task: str, url: str):
+        with self._lock:
+            self._files[task] = {
+                'url': url, 'start': time.monotonic(), 'first_byte': None,
+                'bytes': 0, 'duration': None, 'retries': 0, 'error': None
+            }
+
+    def on_bytes(self, task: str, received: int, total: int):
+        with self._lock:
+            metrics = self._files.get(task)
+            if metrics is not None and metrics['first_byte'] is None:
+                metrics['first_byte'] = time.monotonic() - metrics['start']
+
+    def on_retry(self, task: str, attempt: int, exception: Exception):
+        with self._lock:
+            if task in self._files:
+                self._files[task]['retries'] += 1
+
+    def on_task_end(self, task: str, size: int, duration: float):
+        with self._lock:
+            if task in self._files:
+                self._files[task]['bytes'] = size
+                self._files[task]['duration'] = duration
+
+    def on_error(self, task: str, exception: Exception):
+        with self._lock:
+            self._errors.append((task, exception))
+            if task in self._files:
+                self._files[task]['error'] = exception
+
+    def on_metadata(self, url: str, duration: float):
+        with self._lock:
+            self._metadata_requests += 1
+            self._metadata_time += duration
+
+    def report(self) -> dict:
+        """Resume as métricas coletadas.
+
+        Retorno
+        ----------
+        dict:
+            com as chaves 'files' (para cada arquivo, 'url', 'bytes',
+            'duration', 'first_byte' (latência até o primeiro byte),
+            'bytes_per_second', 'retries' e 'error'), 'bytes',
+            'payload_time' (soma das durações dos arquivos),
+            'bytes_per_second', 'retries', 'errors', 'metadata_requests' e
+            'metadata_time' (soma das durações das consultas à API).
+        """
+        with self._lock:
+            files = {}
+            for task, metrics in self._files.items():
+                metrics = dict(metrics)
+                del metrics['start']
+                duration = metrics['duration']
+                metrics['bytes_per_second'] = \
+                    metrics['bytes'] / duration if duration else None
+                files[task] = metrics
+
+            payload_time = sum(
+                metrics['duration'] or 0 for metrics in files.values()
+            )
+            total = sum(metrics['bytes'] for metrics in files.values())
+            return {
+                'files': files,
+                'bytes': total,
+                'payload_time': payload_time,
+                'bytes_per_second':
+                    total / payload_time if payload_time else None,
+                'retries': sum(
+                    metrics['retries'] for metrics in files.values()
+                ),
+                'errors': list(self._errors),
+                'metadata_requests': self._metadata_requests,
+                'metadata_time': self._metadata_time,
+            }
+
+    def print_report(self):
+        """Imprime o resumo das métricas coletadas."""
+        report = self.report()
+        print("Arquivos: {}, {:.1f} MB em {:.1f}s ({:.2f} MB/s)".format(
+            len(report['files']), report['bytes'] / 1024 ** 2,
+            report['payload_time'],
+            (report['bytes_per_second'] or 0) / 1024 ** 2
+        ))
+        print("Metadados: {} consultas em {:.1f}s".format(
+            report['metadata_requests'], report['metadata_time']
+        ))
+        print("Novas tentativas: {}, erros: {}".format(
+            report['retries'], len(report['errors'])
+        ))
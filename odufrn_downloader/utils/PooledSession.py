@@ -0,0 +1,88 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class PooledSession(requests.Session):
+    """Sessão HTTP compartilhada que mantém as conexões abertas
+    (keep-alive) e repete as requisições que falham por erros
+    temporários do servidor.
+
+    Atributos
+    ---------
+    pool_size: int
+        número máximo de conexões mantidas abertas por servidor.
+    timeout: float
+        tempo máximo, em segundos, de espera por uma resposta.
+    retries: int
+        número de novas tentativas em falhas de conexão e respostas 5xx.
+    backoff_factor: float
+        fator do intervalo exponencial entre as tentativas.
+    """
+
+    RETRY_STATUS = (500, 502, 503, 504)
+
+    def __init__(self, pool_size: int = 10, timeout: float = 30,
+                 retries: int = 3, backoff_factor: float = 0.5):
+        super().__init__()
+        self.configure(pool_size, timeout, retries, backoff_factor)
+
+    def configure(self, pool_size: int = 10, timeout: float = 30,
+                  retries: int = 3, backoff_factor: float = 0.5):
+        """Reconfigura a sessão, substituindo os adaptadores de conexão.
+
+        Parâmetros
+        ----------
+        pool_size: int
+            número máximo de conexões mantidas abertas por servidor.
+        timeout: float
+            tempo máximo, em segundos, de espera por uma resposta.
+        retries: int
+            número de novas tentativas em falhas de conexão e respostas 5xx.
+        backoff_factor: float
+            fator do intervalo exponencial entre as tentativas.
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+
+        retry = Retry(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUS, raise_on_status=False
+        )
+        for prefix in ('http://', 'https://'):
+            self.mount(prefix, HTTPAdapter(
+                pool_maxsize=pool_size, max_retries=retry
+            ))
+
+    def request(self, method, url, **kwargs):
+        """Realiza a requisição usando o timeout padrão da sessão."""
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+    def stats(self) -> dict:
+        """Retorna as estatísticas de uso das conexões.
+
+        Retorno
+        ----------
+        dict:
+            'requests' (requisições enviadas), 'connections' (conexões
+            abertas) e 'reused' (requisições que reaproveitaram uma
+            conexão existente).
+        """
+        total_requests = 0
+        connections = 0
+        for adapter in self.adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                total_requests += pool.num_requests
+                connections += pool.num_connections
+
+        return {
+            'requests': total_requests,
+            'connections': connections,
+            'reused': max(0, total_requests - connections),
+        }
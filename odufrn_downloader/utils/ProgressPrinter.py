@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+from .DownloadListener import DownloadListener
+
+
+class ProgressPrinter(DownloadListener):
+    """Mostra no terminal o andamento dos downloads.
+
+    Imprime o início de cada arquivo, o progresso (porcentagem, taxa e
+    tempo restante) a cada interval segundos, o fim e os erros.
+
+    Atributos
+    ---------
+    interval: float
+        intervalo mínimo, em segundos, entre as linhas de progresso de um
+        mesmo arquivo (por padrão, 2).
+    """
+
+    def __init__(self, interval: float = 2):
+        self.interval = interval
+        self._started = {}
+        self._printed = {}
+        self._lock = threading.Lock()
+
+    def _name(self, task: str) -> str:
+        return os.path.splitext(os.path.basename(task))[0]
+
+    def on_task_start(self, task: str, url: str):
+        with self._lock:
+            self._started[task] = time.monotonic()
+            self._printed[task] = self._started[task]
+        print("Baixando {}...".format(self._name(task)))
+
+    def on_bytes(self, task: str, received: int, total: int):
+        now = time.monotonic()
+        with self._lock:
+            if task not in self._started or not total or \
+                    now - self._printed[task] < self.interval:
+                return
+            self._printed[task] = now
+            elapsed = now - self._started[task]
+
+        rate = received / elapsed if elapsed else 0
+        message = "{}: {:.0%} de {:.1f} MB, {:.2f} MB/s".format(
+            self._name(task), received / total, total / 1024 ** 2,
+            rate / 1024 ** 2
+        )
+        if rate:
+            message += ", faltam {:.0f}s".format((total - received) / rate)
+        print(message)
+
+    def on_task_end(self, task: str, size: int, duration: float):
+        with self._lock:
+            self._started.pop(task, None)
+            self._printed.pop(task, None)
+
+    def on_error(self, task: str, exception: Exception):
+        with self._lock:
+            self._started.pop(task, None)
+            self._printed.pop(task, None)
+        print('\033[91m{}: {}\033[0m'.format(task, exception))
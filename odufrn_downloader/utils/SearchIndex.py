@@ -0,0 +1,232 @@
+import heapq
+from operator import itemgetter
+
+
+class SearchIndex:
+    """Índice de busca por similaridade sobre uma lista de nomes.
+
+    As palavras distintas dos nomes são agrupadas por tamanho, o que
+    permite descartar, sem calcular a distância de Levenshtein, as
+    palavras cujo tamanho já impede a similaridade mínima, e indexadas
+    pelos seus pares de caracteres, o que descarta as palavras com poucos
+    pares em comum com a palavra-chave. Para as demais, a distância é
+    calculada apenas dentro da faixa diagonal permitida, interrompendo o
+    cálculo assim que o limite é ultrapassado.
+
+    Atributos
+    ---------
+    items: list
+        a lista de nomes indexada.
+    split: bool
+        flag que indica se os nomes são divididos em palavras pelo '-'.
+    threshold: float
+        razão mínima (exclusiva) para que duas palavras sejam similares.
+    """
+
+    def __init__(self, items: list, split: bool = True,
+                 threshold: float = 0.87):
+        self.items = items
+        self.split = split
+        self.threshold = threshold
+        self.size = len(items)
+        self._words = [
+            item.split('-') if split else [item] for item in items
+        ]
+        self._by_length = {}
+        for words in self._words:
+            for word in words:
+                self._by_length.setdefault(len(word), set()).add(word)
+        self._max_distance = {}
+        self._postings = None
+        self._word_items = None
+
+    def max_distance(self, lens: int) -> int:
+        """Retorna a maior distância que ainda mantém a razão acima do
+        limite para palavras cuja soma dos tamanhos é lens, usando a mesma
+        conta de LevenshteinMixin.levenshtein."""
+        if lens not in self._max_distance:
+            distance = -1
+            while distance + 1 <= lens and \
+                    (lens - distance - 1) / lens > self.threshold:
+                distance += 1
+            self._max_distance[lens] = distance
+        return self._max_distance[lens]
+
+    def _bigrams(self, word: str) -> dict:
+        """Conta os pares de caracteres consecutivos da palavra."""
+        counts = {}
+        for i in range(len(word) - 1):
+            gram = word[i:i + 2]
+            counts[gram] = counts.get(gram, 0) + 1
+        return counts
+
+    def _shared_bigrams(self, keyword: str) -> dict:
+        """Conta, para cada palavra indexada, quantos pares de caracteres
+        ela compartilha com a palavra-chave."""
+        if self._postings is None:
+            self._postings = {}
+            for words in self._by_length.values():
+                for word in words:
+                    for gram, count in self._bigrams(word).items():
+                        self._postings.setdefault(gram, []).append(
+                            (word, count)
+                        )
+
+        shared = {}
+        for gram, count in self._bigrams(keyword).items():
+            for word, word_count in self._postings.get(gram, ()):
+                shared[word] = shared.get(word, 0) + min(count, word_count)
+        return shared
+
+    def word_distances(self, keyword: str) -> dict:
+        """Calcula a distância entre a palavra-chave e as palavras
+        indexadas similares a ela.
+
+        Uma palavra a distância k tem ao menos max(n, m) - 1 - 2k pares de
+        caracteres em comum com a palavra-chave, então as palavras que não
+        alcançam esse mínimo são descartadas sem o cálculo da distância.
+
+        Retorno
+        ----------
+        dict:
+            as palavras similares e suas distâncias.
+        """
+        n = len(keyword)
+        shared = self._shared_bigrams(keyword)
+        distances = {}
+        for m, words in self._by_length.items():
+            if n + m == 0:
+                continue
+            limit = self.max_distance(n + m)
+            if abs(n - m) > limit:
+                continue
+
+            needed = max(n, m) - 1 - 2 * limit
+            for word in words:
+                if needed > 0 and shared.get(word, 0) < needed:
+                    continue
+                distance = bounded_levenshtein(keyword, word, limit)
+                if distance <= limit:
+                    distances[word] = distance
+
+        return distances
+
+    def batch_search(self, keywords: list) -> dict:
+        """Busca várias palavras-chave de uma só vez.
+
+        Parâmetros
+        ----------
+        keywords: list
+            as palavras-chave desejadas.
+
+        Retorno
+        ----------
+        dict:
+            para cada palavra-chave, a lista de pares (nome, razão) dos
+            nomes similares, na ordem da lista e sem repetições. A razão é
+            a da palavra do nome mais similar à palavra-chave.
+        """
+        if self._word_items is None:
+            self._word_items = {}
+            seen = set()
+            for position, (item, words) in enumerate(zip(self.items,
+                                                         self._words)):
+                # Nomes repetidos na lista ficam só na primeira posição
+                if item in seen:
+                    continue
+                seen.add(item)
+                for word in set(words):
+                    self._word_items.setdefault(word, []).append(position)
+
+        results = {}
+        for keyword in keywords:
+            if keyword in results:
+                continue
+
+            scores = {}
+            for word, distance in self.word_distances(keyword).items():
+                lens = len(keyword) + len(word)
+                ratio = (lens - distance) / lens
+                for position in self._word_items[word]:
+                    if ratio > scores.get(position, 0):
+                        scores[position] = ratio
+
+            results[keyword] = [
+                (self.items[position], scores[position])
+                for position in sorted(scores)
+            ]
+
+        return results
+
+    def search(self, keyword: str) -> list:
+        """Busca os nomes com palavras similares à palavra-chave.
+
+        Retorno
+        ----------
+        list:
+            os nomes similares, na ordem da lista e sem repetições.
+        """
+        return [item for item, _ in self.batch_search([keyword])[keyword]]
+
+    def top(self, keyword: str, k: int = 10) -> list:
+        """Busca os k nomes mais similares à palavra-chave.
+
+        Parâmetros
+        ----------
+        keyword: str
+            a palavra-chave desejada.
+        k: int
+            quantidade máxima de nomes retornados.
+
+        Retorno
+        ----------
+        list:
+            pares (nome, razão) em ordem decrescente de razão; os empates
+            mantêm a ordem da lista.
+        """
+        return heapq.nlargest(k, self.batch_search([keyword])[keyword],
+                              key=itemgetter(1))
+
+
+def bounded_levenshtein(str1: str, str2: str, limit: int) -> int:
+    """Calcula a distância de Levenshtein entre duas palavras, desde que
+    ela não ultrapasse limit; caso contrário, retorna limit + 1.
+
+    Parâmetros
+    ----------
+    str1: str
+        a primeira palavra.
+    str2: str
+        a segunda palavra.
+    limit: int
+        a maior distância de interesse.
+    """
+    if len(str1) > len(str2):
+        str1, str2 = str2, str1
+    n, m = len(str1), len(str2)
+    over = limit + 1
+    if m - n > limit:
+        return over
+
+    previous = list(range(m + 1))
+    for i in range(1, n + 1):
+        low = max(1, i - limit)
+        high = min(m, i + limit)
+        current = [over] * (m + 1)
+        current[0] = i if i <= limit else over
+        row_min = current[0]
+        char = str1[i - 1]
+        for j in range(low, high + 1):
+            value = previous[j - 1] + (char != str2[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return over
+        previous = current
+
+    return previous[m] if previous[m] <= limit else over
@@ -0,0 +1,186 @@
+import glob
+import json
+import os
+from .DownloadPlan import DownloadPlan
+
+
+class ShardManifest:
+    """Registro dos arquivos baixados por uma das máquinas de um
+    download dividido em partes (shards).
+
+    A divisão é a de DownloadPlan.assign sobre o plano completo, montado
+    com o tamanho informado nos metadados de cada recurso.
+
+    O registro fica no arquivo .odufrn-shard-<parte>-of-<total>.json, na
+    pasta dos downloads, e guarda o hash do plano completo, o que foi
+    planejado para a parte e, para cada arquivo, o pacote, a URL, o
+    caminho relativo à pasta dos downloads, o tamanho planejado, o estado
+    e os bytes recebidos. Os registros de todas as partes, reunidos em uma
+    mesma pasta, são combinados por merge.
+
+    Atributos
+    ---------
+    shard_index: int
+        a parte, de 0 a shard_count - 1.
+    shard_count: int
+        o número de partes.
+    full_plan: DownloadPlan
+        as tarefas de todas as partes.
+    plan: DownloadPlan
+        as tarefas da parte.
+    digest: str
+        o hash do plano completo.
+    files: list
+        os arquivos registrados.
+    """
+
+    FILENAME = '.odufrn-shard-{}-of-{}.json'
+    MERGED_FILENAME = '.odufrn-shards.json'
+
+    def __init__(self, shard_index: int, shard_count: int,
+                 plan: DownloadPlan):
+        self.check(shard_index, shard_count)
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.full_plan = plan
+        self.digest = plan.digest()
+        self.files = []
+        self._shards = plan.assign(shard_count)
+        self.plan = DownloadPlan([
+            task for task in plan
+            if self._shards.get(plan.key(task)) == shard_index
+        ])
+
+    @staticmethod
+    def check(shard_index: int, shard_count: int):
+        """Verifica se a parte está entre 0 e shard_count - 1."""
+        if shard_index is None or shard_count is None or \
+                not 0 <= shard_index < shard_count:
+            raise ValueError(
+                'shard_index deve estar entre 0 e shard_count - 1'
+            )
+
+    def assigned(self, package: str, resource: dict) -> bool:
+        """Indica se o recurso do pacote pertence à parte.
+
+        Os recursos fora do plano, como os de um pacote cuja consulta
+        falhou ao montá-lo, ficam com a parte preferida por
+        DownloadPlan.rank, que todas as máquinas calculam igual.
+        """
+        key = (package, resource['url'])
+        shard = self._shards.get(key)
+        if shard is None:
+            shard = DownloadPlan.rank(key, self.shard_count)[0]
+        return shard == self.shard_index
+
+    def record(self, summaries: list, root: str):
+        """Registra os resultados dos downloads da parte.
+
+        Parâmetros
+        ----------
+        summaries: list
+            lista com o resumo do download de cada pacote.
+        root: str
+            a pasta dos downloads.
+        """
+        sizes = {self.plan.key(task): task['size'] for task in self.plan}
+        for summary in summaries:
+            for result in summary.get('results', []):
+                url = (result.resource or {}).get('url')
+                self.files.append({
+                    'package': result.package, 'url': url,
+                    'path': os.path.relpath(
+                        result.path, root
+                    ).replace(os.sep, '/'),
+                    'size': sizes.get((result.package, url)),
+                    'status': result.status, 'bytes': result.bytes
+                })
+
+    def save(self, path: str) -> str:
+        """Salva o registro na pasta dos downloads.
+
+        Retorno
+        ----------
+        str:
+            o caminho do arquivo do registro.
+        """
+        file_path = os.path.join(
+            path, self.FILENAME.format(self.shard_index, self.shard_count)
+        )
+        tmp_path = file_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'version': 1, 'shard_index': self.shard_index,
+                'shard_count': self.shard_count, 'digest': self.digest,
+                'planned_files': self.plan.total_files,
+                'planned_bytes': self.plan.total_bytes,
+                'files': self.files
+            }, f, indent=1)
+        os.replace(tmp_path, file_path)
+        return file_path
+
+    @classmethod
+    def find(cls, path: str) -> list:
+        """Retorna os caminhos dos registros das partes dentro da pasta."""
+        return sorted(glob.glob(
+            os.path.join(glob.escape(path), cls.FILENAME.format('*', '*'))
+        ))
+
+    @classmethod
+    def merge(cls, file_paths: list) -> dict:
+        """Combina os registros das partes.
+
+        Parâmetros
+        ----------
+        file_paths: list
+            os caminhos dos registros.
+
+        Retorno
+        ----------
+        dict:
+            com as chaves 'shard_count', 'shards' (partes encontradas),
+            'missing' (partes sem registro), 'consistent' (se todas as
+            partes usaram o mesmo plano), 'planned_bytes' (bytes
+            planejados de cada parte), 'files' (arquivos de todas as
+            partes), 'bytes' (bytes recebidos), 'failed' (caminhos dos
+            arquivos que falharam) e 'duplicates' (caminhos registrados
+            por mais de uma parte).
+        """
+        manifests = []
+        for file_path in file_paths:
+            with open(file_path) as f:
+                manifests.append(json.load(f))
+
+        counts = set(manifest['shard_count'] for manifest in manifests)
+        if len(counts) > 1:
+            raise ValueError('os registros têm números de partes diferentes')
+        shard_count = counts.pop() if counts else 0
+
+        merged = {
+            'shard_count': shard_count, 'shards': [], 'missing': [],
+            'consistent': len(set(
+                manifest['digest'] for manifest in manifests
+            )) <= 1,
+            'planned_bytes': {}, 'files': [], 'bytes': 0,
+            'failed': [], 'duplicates': []
+        }
+        shards = {}
+        for manifest in sorted(manifests, key=lambda m: m['shard_index']):
+            index = manifest['shard_index']
+            merged['planned_bytes'][index] = manifest['planned_bytes']
+            for entry in manifest['files']:
+                if entry['path'] in shards and \
+                        shards[entry['path']] != index:
+                    merged['duplicates'].append(entry['path'])
+                shards[entry['path']] = index
+                merged['files'].append(dict(entry, shard=index))
+                merged['bytes'] += entry['bytes'] or 0
+                if entry['status'] == 'failed':
+                    merged['failed'].append(entry['path'])
+
+        merged['shards'] = sorted(merged['planned_bytes'])
+        merged['missing'] = [
+            index for index in range(shard_count)
+            if index not in merged['planned_bytes']
+        ]
+        return merged
@@ -0,0 +1,131 @@
+from abc import ABC, abstractmethod
+import contextlib
+import os
+import tempfile
+import threading
+
+
+class StorageSink(ABC):
+    """Destino dos arquivos baixados.
+
+    Cada download é gravado no fluxo retornado por open e, ao terminar,
+    entregue ao destino por add; os pacotes repetidos entre grupos são
+    replicados por link. Os arquivos são identificados por caminhos dentro
+    de root, e o nome de cada um no destino é o seu caminho relativo a
+    root. Os métodos podem ser chamados por várias threads ao mesmo tempo.
+
+    Atributos
+    ---------
+    root: str
+        a pasta base dos caminhos dos arquivos.
+    keeps_files: bool
+        indica se os arquivos ficam em disco dentro de root, o que permite
+        a sincronização (por padrão, False).
+    """
+
+    """Bytes de cada download mantidos em memória antes de passarem a um
+    arquivo temporário anônimo"""
+    SPOOL_SIZE = 8 * 1024 * 1024
+
+    keeps_files = False
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def name(self, file_path: str) -> str:
+        """Retorna o nome do arquivo no destino."""
+        return os.path.relpath(file_path, self.root).replace(os.sep, '/')
+
+    def check(self, sync: bool = False):
+        """Verifica se o destino aceita a sincronização, que compara os
+        arquivos em disco com os metadados dos recursos.
+
+        Parâmetros
+        ----------
+        sync: bool
+            flag de sincronização do download.
+        """
+        if sync and not self.keeps_files:
+            raise ValueError(
+                'sync só pode ser usado com destinos que mantêm os '
+                'arquivos em disco, como o DirectorySink'
+            )
+
+    @contextlib.contextmanager
+    def open(self, file_path: str):
+        """Abre um fluxo para gravar o arquivo, entregue ao destino quando
+        o bloco with termina sem erros.
+
+        Os downloads simultâneos gravam em fluxos separados, mantidos em
+        memória até SPOOL_SIZE bytes, e cada um é entregue de uma vez.
+
+        > Exemplo: with sink.open(sink.root + '/discentes/a.csv') as f: ...
+
+        Parâmetros
+        ----------
+        file_path: str
+            o caminho do arquivo, dentro de root.
+        """
+        with tempfile.SpooledTemporaryFile(self.SPOOL_SIZE,
+                                           dir=self.root) as stream:
+            yield stream
+            stream.seek(0)
+            self.add(file_path, stream)
+
+    def add_file(self, file_path: str):
+        """Entrega ao destino um arquivo gravado em disco, dentro de root,
+        e o remove.
+
+        Parâmetros
+        ----------
+        file_path: str
+            o caminho do arquivo, dentro de root.
+        """
+        with open(file_path, 'rb') as f:
+            self.add(file_path, f)
+        os.remove(file_path)
+
+    @abstractmethod
+    def add(self, file_path: str, fileobj):
+        """Entrega ao destino o conteúdo de um arquivo.
+
+        Parâmetros
+        ----------
+        file_path: str
+            o caminho do arquivo, dentro de root.
+        fileobj: file
+            o conteúdo do arquivo, lido do início ao fim.
+        """
+
+    @abstractmethod
+    def link(self, source: str, target: str):
+        """Replica no destino, com o nome de target, um arquivo já
+        entregue.
+
+        Parâmetros
+        ----------
+        source: str
+            o caminho do arquivo entregue, dentro de root.
+        target: str
+            o caminho da réplica, dentro de root.
+        """
+
+    def close(self):
+        """Finaliza o destino."""
+
+    @staticmethod
+    def size(fileobj) -> int:
+        """Retorna o tamanho do conteúdo de fileobj a partir da posição
+        atual, que é mantida."""
+        position = fileobj.tell()
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell() - position
+        fileobj.seek(position)
+        return size
@@ -0,0 +1,59 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+from .StorageSink import StorageSink
+
+
+class TarSink(StorageSink):
+    """Destino que grava todos os arquivos em um único arquivo tar.
+
+    Cada download é gravado no seu próprio fluxo (ver StorageSink.open) e
+    adicionado ao tar assim que termina, sob uma trava, já que o tamanho
+    de cada membro vai no seu cabeçalho; os pacotes repetidos entre grupos
+    viram hard links dentro do tar. O tar é gravado em um arquivo .tmp e
+    só recebe o nome final em close.
+
+    Atributos
+    ---------
+    path: str
+        o caminho do arquivo tar.
+    compression: str
+        'gz', 'bz2', 'xz' ou None (por padrão, None).
+    """
+
+    def __init__(self, path: str, compression: str = None):
+        self.path = path
+        self.compression = compression
+        directory = os.path.dirname(os.path.abspath(path))
+        super().__init__(
+            tempfile.mkdtemp(prefix='.odufrn-spool-', dir=directory)
+        )
+        self._tar = tarfile.open(
+            path + '.tmp', 'w:' + (compression or '')
+        )
+
+    def add(self, file_path: str, fileobj):
+        info = tarfile.TarInfo(self.name(file_path))
+        info.size = self.size(fileobj)
+        info.mtime = time.time()
+        info.mode = 0o644
+        with self._lock:
+            self._tar.addfile(info, fileobj)
+
+    def link(self, source: str, target: str):
+        info = tarfile.TarInfo(self.name(target))
+        info.type = tarfile.LNKTYPE
+        info.linkname = self.name(source)
+        with self._lock:
+            self._tar.addfile(info)
+
+    def close(self):
+        """Finaliza o tar e remove a pasta temporária."""
+        with self._lock:
+            if self._tar.closed:
+                return
+            self._tar.close()
+            os.replace(self.path + '.tmp', self.path)
+        shutil.rmtree(self.root, ignore_errors=True)
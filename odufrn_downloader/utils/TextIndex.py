@@ -0,0 +1,181 @@
+import json
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+
+
+class TextIndex:
+    """Índice invertido de texto sobre os metadados dos pacotes.
+
+    Cada pacote é indexado pelas palavras do nome, do título, da descrição,
+    das etiquetas e dos nomes dos recursos. A busca compara o início das
+    palavras, sem acentos e sem diferenciar maiúsculas, e retorna os
+    pacotes que contêm todas as palavras da consulta.
+
+    Atributos
+    ---------
+    names: set
+        os nomes dos pacotes indexados.
+    """
+
+    """Peso de cada campo do pacote na pontuação da busca"""
+    WEIGHTS = {
+        'name': 3,
+        'title': 3,
+        'tags': 2,
+        'resources': 1,
+        'notes': 1,
+    }
+
+    def __init__(self):
+        self._documents = {}
+        self._postings = {}
+        self._terms = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._documents
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    @property
+    def names(self) -> set:
+        with self._lock:
+            return set(self._documents)
+
+    def add(self, name: str, package: dict) -> bool:
+        """Indexa o pacote, substituindo a versão anterior se os metadados
+        mudaram.
+
+        Parâmetros
+        ----------
+        name: str
+            nome do pacote.
+        package: dict
+            o json do pacote, como retornado por api/rest/dataset.
+
+        Retorno
+        ----------
+        bool:
+            True se o pacote foi indexado, False se ele não mudou.
+        """
+        signature = package.get('metadata_modified') or \
+            json.dumps(package, sort_keys=True)
+        resources = [
+            resource.get('name') or '' for resource in
+            package.get('resources') or []
+        ]
+        tags = [
+            tag.get('name', '') if isinstance(tag, dict) else tag
+            for tag in package.get('tags') or []
+        ]
+        fields = {
+            'name': name,
+            'title': package.get('title'),
+            'tags': ' '.join(tags),
+            'resources': ' '.join(resources),
+            'notes': package.get('notes'),
+        }
+
+        terms = {}
+        for field, text in fields.items():
+            for term in tokenize(text):
+                terms[term] = terms.get(term, 0) + TextIndex.WEIGHTS[field]
+
+        with self._lock:
+            document = self._documents.get(name)
+            if document is not None and document['signature'] == signature:
+                return False
+
+            self._remove(name)
+            self._documents[name] = {
+                'signature': signature,
+                'terms': terms,
+                'resources': resources,
+            }
+            for term, weight in terms.items():
+                self._postings.setdefault(term, {})[name] = weight
+            self._terms = None
+
+        return True
+
+    def remove(self, name: str):
+        """Remove o pacote do índice, caso ele esteja indexado."""
+        with self._lock:
+            self._remove(name)
+
+    def _remove(self, name: str):
+        document = self._documents.pop(name, None)
+        if document is None:
+            return
+
+        for term in document['terms']:
+            postings = self._postings[term]
+            del postings[name]
+            if not postings:
+                del self._postings[term]
+        self._terms = None
+
+    def resources(self, name: str) -> list:
+        """Retorna os nomes dos recursos do pacote indexado."""
+        with self._lock:
+            return list(self._documents[name]['resources'])
+
+    def search(self, query: str) -> list:
+        """Busca os pacotes que contêm todas as palavras da consulta.
+
+        Parâmetros
+        ----------
+        query: str
+            a consulta desejada.
+
+        Retorno
+        ----------
+        list:
+            os nomes dos pacotes encontrados, do mais ao menos relevante.
+        """
+        scores = None
+        with self._lock:
+            if self._terms is None:
+                self._terms = sorted(self._postings)
+
+            for word in set(tokenize(query)):
+                word_scores = {}
+                position = bisect_left(self._terms, word)
+                while position < len(self._terms) and \
+                        self._terms[position].startswith(word):
+                    term = self._terms[position]
+                    for name, weight in self._postings[term].items():
+                        word_scores[name] = word_scores.get(name, 0) + weight
+                    position += 1
+
+                if scores is None:
+                    scores = word_scores
+                else:
+                    scores = {
+                        name: score + word_scores[name]
+                        for name, score in scores.items()
+                        if name in word_scores
+                    }
+
+        if not scores:
+            return []
+        return sorted(scores, key=lambda name: (-scores[name], name))
+
+
+def tokenize(text: str) -> list:
+    """Divide o texto em palavras minúsculas e sem acentos.
+
+    Parâmetros
+    ----------
+    text: str
+        o texto desejado.
+    """
+    if not text:
+        return []
+
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r'[a-z0-9]+', text)
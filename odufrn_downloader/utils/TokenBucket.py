@@ -0,0 +1,62 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Limitador de taxa por balde de fichas, compartilhado por todas as
+    threads que o usam.
+
+    O balde recebe rate fichas por segundo, até capacity fichas. Quem pede
+    mais fichas do que há no balde fica devendo a diferença e espera o
+    tempo de pagá-la, então a taxa média nunca passa de rate, mesmo com
+    várias threads ou pedidos maiores que o balde.
+
+    Atributos
+    ---------
+    rate: float
+        fichas adicionadas por segundo.
+    capacity: float
+        máximo de fichas acumuladas (por padrão, rate, isto é, um
+        segundo de folga).
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError('rate deve ser positivo')
+
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> float:
+        """Retira fichas do balde, esperando se não houver o suficiente.
+
+        Parâmetros
+        ----------
+        amount: float
+            quantidade de fichas desejada (por padrão, 1).
+
+        Retorno
+        ----------
+        float:
+            o tempo, em segundos, que foi preciso esperar.
+        """
+        wait = self._reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def _reserve(self, amount: float) -> float:
+        """Retira as fichas do balde e retorna o tempo, em segundos, que
+        é preciso esperar para pagar a dívida, se houver."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            return -self._tokens / self.rate if self._tokens < 0 else 0
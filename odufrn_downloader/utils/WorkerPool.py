@@ -0,0 +1,78 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+class WorkerPool:
+    """Conjunto limitado de threads responsável pela execução dos downloads.
+
+    Com apenas um trabalhador, as tarefas são executadas na própria thread
+    que as submete, preservando o comportamento sequencial.
+
+    Atributos
+    ---------
+    max_workers: int
+        número máximo de tarefas executadas simultaneamente.
+    max_per_host: int
+        número máximo de conexões simultâneas para um mesmo servidor.
+    """
+
+    def __init__(self, max_workers: int = 1, max_per_host: int = None):
+        self.max_workers = max(1, max_workers)
+        self.max_per_host = max(1, max_per_host or self.max_workers)
+        self._executor = None
+        if self.max_workers > 1:
+            self._executor = ThreadPoolExecutor(self.max_workers)
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """Retorna o semáforo que limita as conexões do servidor da url."""
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(
+                    self.max_per_host
+                )
+            return self._hosts[host]
+
+    def _run(self, url: str, fn, *args):
+        with self._host_semaphore(url):
+            return fn(*args)
+
+    def submit(self, url: str, fn, *args) -> Future:
+        """Agenda a execução de fn(*args) respeitando o limite de conexões
+        do servidor da url.
+
+        Parâmetros
+        ----------
+        url: str
+            a url que será acessada pela tarefa.
+        fn: callable
+            função que executa a tarefa.
+
+        Retorno
+        ----------
+        Future:
+            o resultado (ou a exceção) da tarefa.
+        """
+        if self._executor is not None:
+            return self._executor.submit(self._run, url, fn, *args)
+
+        future = Future()
+        try:
+            future.set_result(self._run(url, fn, *args))
+        except Exception as ex:
+            future.set_exception(ex)
+        return future
+
+    def shutdown(self):
+        """Aguarda as tarefas pendentes e libera as threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
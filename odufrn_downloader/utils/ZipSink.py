@@ -0,0 +1,85 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from .StorageSink import StorageSink
+
+
+class ZipSink(StorageSink):
+    """Destino que grava todos os arquivos em um único arquivo zip.
+
+    Cada download é gravado no seu próprio fluxo (ver StorageSink.open) e
+    adicionado ao zip assim que termina, sob uma trava. Como o zip não tem
+    links, os pacotes repetidos entre grupos são copiados dentro dele em
+    close, relendo o zip já finalizado. O zip é gravado em um arquivo .tmp
+    e só recebe o nome final em close.
+
+    Antes do Python 3.6, o zipfile não grava membros em partes, e cada
+    arquivo é lido inteiro para a memória ao ser adicionado.
+
+    Atributos
+    ---------
+    path: str
+        o caminho do arquivo zip.
+    compression: int
+        o método de compressão do zipfile (por padrão, ZIP_DEFLATED).
+    """
+
+    def __init__(self, path: str, compression: int = zipfile.ZIP_DEFLATED):
+        self.path = path
+        self.compression = compression
+        directory = os.path.dirname(os.path.abspath(path))
+        super().__init__(
+            tempfile.mkdtemp(prefix='.odufrn-spool-', dir=directory)
+        )
+        self._zip = zipfile.ZipFile(path + '.tmp', 'w', compression)
+        self._links = []
+        self._closed = False
+
+    def add(self, file_path: str, fileobj):
+        with self._lock:
+            self._write(self._zip, self.name(file_path), fileobj,
+                        self.size(fileobj))
+
+    def link(self, source: str, target: str):
+        with self._lock:
+            self._links.append((self.name(source), self.name(target)))
+
+    def close(self):
+        """Finaliza o zip, copia os arquivos replicados e remove a pasta
+        temporária."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._zip.close()
+            if self._links:
+                with zipfile.ZipFile(self.path + '.tmp', 'a',
+                                     self.compression) as archive:
+                    for source, target in self._links:
+                        # O zipfile não lê e grava membros ao mesmo tempo
+                        with tempfile.SpooledTemporaryFile(
+                                self.SPOOL_SIZE, dir=self.root) as copy:
+                            with archive.open(source) as member:
+                                shutil.copyfileobj(member, copy)
+                            size = copy.tell()
+                            copy.seek(0)
+                            self._write(archive, target, copy, size)
+            os.replace(self.path + '.tmp', self.path)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _write(self, archive: zipfile.ZipFile, name: str, fileobj,
+               size: int):
+        """Grava o conteúdo de fileobj no zip com o nome recebido."""
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = self.compression
+        info.external_attr = 0o644 << 16
+        if sys.version_info < (3, 6):
+            archive.writestr(info, fileobj.read())
+            return
+
+        info.file_size = size
+        with archive.open(info, 'w') as member:
+            shutil.copyfileobj(fileobj, member, 1024 * 1024)
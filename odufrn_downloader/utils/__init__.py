@@ -0,0 +1,20 @@
+from .AiohttpClient import AiohttpClient
+from .ColumnarConverter import ColumnarConverter
+from .CompressedFile import CompressedFile
+from .ContentStore import ContentStore
+from .DirectorySink import DirectorySink
+from .DownloadListener import DownloadListener
+from .DownloadPlan import DownloadPlan
+from .DownloadResult import DownloadResult
+from .Manifest import Manifest
+from .MetadataCache import MetadataCache
+from .MetricsCollector import MetricsCollector
+from .PooledSession import PooledSession
+from .ProgressPrinter import ProgressPrinter
+from .SearchIndex import SearchIndex
+from .ShardManifest import ShardManifest
+from .StorageSink import StorageSink
+from .TarSink import TarSink
+from .TextIndex import TextIndex
+from .WorkerPool import WorkerPool
+from .ZipSink import ZipSink
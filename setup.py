@@ -16,6 +16,11 @@ setuptools.setup(
     install_requires=[
         'requests',
     ],
+    extras_require={
+        'async': ['aiohttp'],
+        'parquet': ['pyarrow'],
+        'zstd': ['zstandard'],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
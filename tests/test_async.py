@@ -0,0 +1,200 @@
+import asyncio
+import time
+from .utils import *
+from odufrn_downloader import AsyncODUFRNDownloader
+from odufrn_downloader.modules.Env import Env
+
+
+class FakeClient:
+    """Cliente HTTP assíncrono que responde com dados fixos."""
+
+    def __init__(self, base: str):
+        self.base = base
+        self.active = 0
+        self.max_active = 0
+        self.downloads = 0
+        self.closed = False
+
+    async def _wait(self):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.active -= 1
+
+    async def get_json(self, url: str):
+        await self._wait()
+        route = url[len(self.base):]
+        if 'inexistente' in route:
+            raise ValueError('404: ' + route)
+        if route.startswith('api/rest/group/'):
+            return {'packages': ['discentes', 'docentes', 'cursos']}
+        if route == 'api/action/tag_list':
+            return {'result': ['graduacao', 'pos-graduacao', 'obras']}
+        if route.startswith('api/rest/tag/'):
+            return ['discentes', 'cursos']
+        return {'resources': [
+            {'name': 'Dados {}'.format(year), 'format': 'CSV',
+             'url': self.base + str(year)}
+            for year in (2017, 2018, 2019)
+        ] + [{'name': 'Dicionário', 'format': 'CSV', 'url': self.base}]}
+
+    async def download(self, url, write, chunk_size, headers=None):
+        await self._wait()
+        await asyncio.sleep(0.02)
+        self.downloads += 1
+        await write(b'ano;valor\n')
+        return {'Content-Length': '10'}
+
+    async def close(self):
+        self.closed = True
+
+
+class Async(unittest.TestCase):
+    def setUp(self):
+        """Inicia novo objeto em todo os testes."""
+        self.ufrn_data = AsyncODUFRNDownloader(max_concurrency=2)
+        self.client = FakeClient(self.ufrn_data.url_base)
+        self.ufrn_data.client = self.client
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        """Descarta os catálogos falsos carregados pelos testes."""
+        Env._catalogs.clear()
+        self.loop.close()
+        if os.path.exists('./tmp'):
+            shutil.rmtree('./tmp')
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_can_download_package(self):
+        """Verifica se baixa-se um pacote de forma assíncrona."""
+        summary = self.run_async(self.ufrn_data.download_package(
+            'discentes', './tmp', dictionary=False, years=[2018, 2019]
+        ))
+        self.assertEqual(len(summary['downloaded']), 2)
+        self.assertTrue(os.path.exists('./tmp/discentes/Dados 2018.csv'))
+
+    def test_respects_max_concurrency(self):
+        """Verifica se o limite de requisições simultâneas é respeitado."""
+        self.run_async(self.ufrn_data.download_packages(
+            ['discentes', 'docentes', 'cursos'], './tmp'
+        ))
+        self.assertEqual(self.client.max_active, 2)
+
+    def test_can_search_by_tag(self):
+        """Verifica se a busca por etiqueta remove pacotes repetidos."""
+        packages = self.run_async(self.ufrn_data.search_by_tag('graduacao'))
+        self.assertEqual(packages, ['discentes', 'cursos'])
+
+    def test_failed_package_does_not_stop_the_others(self):
+        """Verifica se a falha na consulta de um pacote vira um resumo
+        de falha, sem interromper os demais."""
+        self.ufrn_data.listeners = []
+        summaries = self.run_async(self.ufrn_data.download_packages(
+            ['discentes', 'inexistente'], './tmp', dictionary=False
+        ))
+        self.assertEqual(len(summaries[0]['downloaded']), 3)
+        self.assertIn('inexistente', summaries[1]['failed'])
+        self.assertIsNone(summaries[1]['results'][0].resource)
+
+    def test_failure_cancels_sibling_tasks(self):
+        """Verifica se a falha de um grupo cancela os downloads dos
+        demais antes de chegar a quem aguardava."""
+        self.ufrn_data.warnings = False
+        with self.assertRaises(ValueError):
+            self.run_async(self.ufrn_data.download_groups(
+                ['pessoas', 'inexistente'], './tmp'
+            ))
+        downloads = self.client.downloads
+        self.assertEqual(self.client.active, 0)
+        self.run_async(asyncio.sleep(0.1))
+        self.assertEqual(self.client.downloads, downloads)
+
+    def test_configure_session(self):
+        """Verifica se a configuração vai para o cliente ou, se ele não
+        puder ser configurado, é aplicada pelo próprio downloader."""
+        ufrn_data = AsyncODUFRNDownloader()
+        ufrn_data.configure_session(pool_size=5, timeout=60)
+        self.assertEqual(ufrn_data.client.limit, 5)
+        self.assertEqual(ufrn_data.client.timeout, 60)
+        self.assertIsNone(ufrn_data.timeout)
+
+        self.ufrn_data.listeners = []
+        self.ufrn_data.configure_session(pool_size=1, timeout=5)
+        self.run_async(self.ufrn_data.download_packages(
+            ['discentes', 'docentes'], './tmp'
+        ))
+        self.assertEqual(self.client.max_active, 1)
+
+        self.ufrn_data.configure_session(pool_size=1, timeout=0.001)
+        summary = self.run_async(self.ufrn_data.download_package(
+            'cursos', './tmp'
+        ))
+        self.assertIsInstance(summary['failed']['cursos'],
+                              asyncio.TimeoutError)
+
+    def test_can_limit_rate(self):
+        """Verifica se o limite de taxa espera sem bloquear o laço."""
+        self.ufrn_data.limit_rate(requests_per_second=2)
+        ticks = []
+
+        async def tick():
+            for _ in range(10):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.05)
+
+        async def download():
+            # 1 consulta e 3 arquivos: 2 requisições ficam devendo
+            summary = self.ufrn_data.download_package(
+                'discentes', './tmp', dictionary=False
+            )
+            return (await asyncio.gather(summary, tick()))[0]
+
+        start = time.monotonic()
+        summary = self.run_async(download())
+        self.assertEqual(len(summary['downloaded']), 3)
+        self.assertGreaterEqual(time.monotonic() - start, 0.9)
+        self.assertEqual(len(ticks), 10)
+        self.assertLess(ticks[-1] - ticks[0], 0.8)
+
+    def test_can_use_store(self):
+        """Verifica se os arquivos de mesmo conteúdo viram hard links."""
+        self.ufrn_data.use_store('./tmp/.store')
+        self.run_async(self.ufrn_data.download_packages(
+            ['discentes', 'docentes'], './tmp', dictionary=False
+        ))
+        self.assertTrue(os.path.samefile(
+            './tmp/discentes/Dados 2017.csv', './tmp/docentes/Dados 2019.csv'
+        ))
+
+    def test_connection_stats_with_local_server(self):
+        """Verifica se as estatísticas vêm do conector do aiohttp."""
+        with self.assertRaises(NotImplementedError):
+            self.ufrn_data.connection_stats()
+
+        server = LocalServer()
+        server.add_package('pa', {'A 2018': b'a\n1\n', 'A 2019': b'a\n2\n'})
+        ufrn_data = server.use(AsyncODUFRNDownloader(max_concurrency=1))
+
+        async def download():
+            async with ufrn_data:
+                return await ufrn_data.download_package('pa', './tmp')
+
+        summary = self.run_async(download())
+        server.close()
+        self.assertEqual(len(summary['downloaded']), 2)
+        stats = ufrn_data.connection_stats()
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['connections'], 1)
+        self.assertEqual(stats['reused'], 2)
+
+    def test_can_close_client(self):
+        """Verifica se o cliente é fechado ao sair do contexto."""
+        async def use():
+            async with self.ufrn_data:
+                pass
+        self.run_async(use())
+        self.assertTrue(self.client.closed)
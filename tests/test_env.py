@@ -1,7 +1,11 @@
 import os
 import json
 import shutil
+import tempfile
+import threading
+import time
 from .utils import *
+from odufrn_downloader.utils import DownloadListener, MetricsCollector
 
 
 class Env(unittest.TestCase):
@@ -46,3 +50,142 @@ class Env(unittest.TestCase):
             print(e)
             result = False
         self.assertTrue(result)
+
+    def test_can_reuse_connections(self):
+        """ Verifica se as requisições reaproveitam a conexão da sessão """
+        self.ufrn_data._load_list('package_list')
+        self.ufrn_data._load_list('group_list')
+        stats = self.ufrn_data.connection_stats()
+        self.assertTrue(stats['reused'] > 0)
+
+    def test_reuse_connections_with_local_server(self):
+        """ Verifica, sem rede, se as requisições reaproveitam a conexão """
+        server = LocalServer()
+        server.lists['package_list'] = ['discentes']
+        ufrn_data = server.use(self.ufrn_data)
+        ufrn_data.configure_session()
+        for _ in range(3):
+            ufrn_data._load_list('package_list')
+        stats = ufrn_data.connection_stats()
+        server.close()
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['connections'], 1)
+        self.assertEqual(stats['reused'], 2)
+
+    def test_can_configure_session(self):
+        """ Verifica se a sessão compartilhada pode ser configurada """
+        self.ufrn_data.configure_session(pool_size=2, timeout=5, retries=1)
+        self.assertEqual(self.ufrn_data.session.timeout, 5)
+        self.assertIs(self.ufrn_data.tag.session, self.ufrn_data.session)
+
+    def test_construction_is_lazy(self):
+        """ Verifica se a construção não realiza requisições """
+        ufrn_data = ODUFRNDownloader()
+        self.assertEqual(ufrn_data.connection_stats()['requests'], 0)
+
+    def test_catalogs_are_shared(self):
+        """ Verifica se os catálogos são compartilhados entre instâncias """
+        other = ODUFRNDownloader()
+        self.assertIs(
+            self.ufrn_data.available_packages, other.available_packages
+        )
+        self.assertIs(self.ufrn_data.tag, self.ufrn_data)
+
+    def test_listener_can_read_catalog_while_loading(self):
+        """ Verifica se um ouvinte pode acessar o catálogo durante a sua
+        consulta, sem travar """
+        ufrn_data = self.ufrn_data
+        ufrn_data.url_action = 'http://catalogo.invalido/{}/'.format(
+            id(self)
+        )
+        seen = []
+
+        class Listener(DownloadListener):
+            def on_metadata(self, url, elapsed):
+                seen.append(list(ufrn_data.available_packages))
+
+        def load_list(option, refresh=False):
+            ufrn_data._emit('on_metadata', option, 0.1)
+            return ['discentes']
+
+        ufrn_data.listeners = [Listener()]
+        ufrn_data._load_list = load_list
+        thread = threading.Thread(target=lambda: ufrn_data.available_packages)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(seen, [['discentes']])
+
+    def test_can_cache_request_get(self):
+        """ Verifica se as respostas em cache são reaproveitadas """
+        cache_dir = tempfile.mkdtemp()
+        self.ufrn_data.use_cache(cache_dir)
+        url = self.ufrn_data.url_package + 'discentes'
+        self.ufrn_data._request_get(url)
+        requests_made = self.ufrn_data.connection_stats()['requests']
+        self.ufrn_data._request_get(url)
+        self.assertEqual(
+            self.ufrn_data.connection_stats()['requests'], requests_made
+        )
+        self.ufrn_data._request_get(url, refresh=True)
+        self.assertTrue(
+            self.ufrn_data.connection_stats()['requests'] > requests_made
+        )
+        self.ufrn_data.cache.close()
+        shutil.rmtree(cache_dir)
+
+    def test_cache_evicts_by_ttl_and_size(self):
+        """ Verifica se o cache descarta entradas expiradas e excedentes """
+        cache_dir = tempfile.mkdtemp()
+        cache = self.ufrn_data.use_cache(
+            cache_dir, ttls={'tag': 0}, max_size=100
+        )
+        url = self.ufrn_data.url_package
+        cache.set(url + 'a', ['a' * 40])
+        cache.set(url + 'b', ['b' * 40])
+        cache.set(url + 'c', ['c' * 40])
+        self.assertIsNone(cache.get(url + 'a'))
+        self.assertEqual(cache.get(url + 'c'), ['c' * 40])
+        tag_url = self.ufrn_data.url_base + 'api/rest/tag/x'
+        cache.set(tag_url, ['x'])
+        self.assertIsNone(cache.get(tag_url))
+        cache.close()
+        shutil.rmtree(cache_dir)
+
+    def test_limit_rate(self):
+        """ Verifica se o limite de taxa é compartilhado entre threads """
+        self.ufrn_data.limit_rate(requests_per_second=50)
+        start = time.monotonic()
+        threads = [
+            threading.Thread(target=self.ufrn_data._throttle_request)
+            for _ in range(60)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # 50 fichas no balde e as outras 10 a 50 por segundo
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+        self.ufrn_data.limit_rate()
+        self.assertIsNone(self.ufrn_data.request_limiter)
+
+    def test_metrics_collector(self):
+        """ Verifica se as métricas dos eventos são coletadas """
+        metrics = self.ufrn_data.add_listener(MetricsCollector())
+        self.ufrn_data._emit('on_metadata', 'url', 0.5)
+        self.ufrn_data._emit('on_task_start', 'a.csv', 'url/a')
+        self.ufrn_data._emit('on_bytes', 'a.csv', 10, 20)
+        self.ufrn_data._emit('on_retry', 'a.csv', 1, IOError())
+        self.ufrn_data._emit('on_task_end', 'a.csv', 20, 2.0)
+        self.ufrn_data._emit('on_task_start', 'b.csv', 'url/b')
+        self.ufrn_data._emit('on_error', 'b.csv', IOError())
+        report = metrics.report()
+        self.assertEqual(report['bytes'], 20)
+        self.assertEqual(report['bytes_per_second'], 10)
+        self.assertEqual(report['retries'], 1)
+        self.assertEqual(report['metadata_time'], 0.5)
+        self.assertEqual(len(report['errors']), 1)
+        self.assertIsNotNone(report['files']['a.csv']['first_byte'])
+        self.assertIsNotNone(report['files']['b.csv']['error'])
+        self.ufrn_data.remove_listener(metrics)
+        self.assertNotIn(metrics, self.ufrn_data.listeners)
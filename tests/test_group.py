@@ -1,3 +1,4 @@
+import tempfile
 from .utils import *
 
 
@@ -48,6 +49,76 @@ class Group(unittest.TestCase):
         if os.path.exists('./tmp'):
             shutil.rmtree('./tmp')
 
+    def test_can_download_groups_concurrently(self):
+        """Verifica se baixa-se vários grupos com downloads simultâneos."""
+        summaries = self.ufrn_data.download_groups(
+            ['biblioteca', 'extensao'], './tmp', workers=4
+        )
+        self.assertTrue(len(summaries) > 0)
+        self.assertTrue(os.path.exists('./tmp/extensao'))
+        self.assertTrue(os.path.exists('./tmp/biblioteca'))
+        if os.path.exists('./tmp'):
+            shutil.rmtree('./tmp')
+
+    def test_can_link_package_into_other_group(self):
+        """Verifica se um pacote já baixado é ligado à pasta de outro
+        grupo sem ser baixado novamente."""
+        os.makedirs('./tmp/ensino/discentes')
+        source = './tmp/ensino/discentes/Discentes 2019.csv'
+        with open(source, 'w') as f:
+            f.write('ano;valor\n')
+        summary = {
+            'package': 'discentes', 'path': './tmp/ensino/discentes',
+            'downloaded': [source], 'unchanged': [], 'failed': {}
+        }
+        linked = self.ufrn_data._link_package(summary, './tmp/pessoas')
+        target = './tmp/pessoas/discentes/Discentes 2019.csv'
+        self.assertEqual(linked['downloaded'], [target])
+        self.assertTrue(os.path.samefile(source, target))
+        self.ufrn_data._link_package(summary, './tmp/pessoas')
+        self.assertTrue(os.path.samefile(source, target))
+        if os.path.exists('./tmp'):
+            shutil.rmtree('./tmp')
+
+    def test_failed_group_lookup_can_be_retried(self):
+        """Verifica se a falha na consulta de um grupo aparece no resumo e
+        pode ser refeita por retry_failed."""
+        server = LocalServer()
+        server.add_package('pa', {'A 2019': b'a\n1\n'})
+        server.add_package('pb', {'B 2019': b'b\n1\n'})
+        server.groups['ga'] = ['pa']
+        server.errors['/api/rest/group/gb'] = (500, b'<html>erro</html>')
+        ufrn_data = server.use(self.ufrn_data)
+        ufrn_data.configure_session(retries=0)
+        path = tempfile.mkdtemp()
+
+        summaries = ufrn_data.download_groups(
+            ['ga', 'gb', 'gc'], path, dictionary=False
+        )
+        self.assertEqual([s['package'] for s in summaries], ['pa', None, None])
+        self.assertEqual([s.get('group') for s in summaries[1:]],
+                         ['gb', 'gc'])
+        self.assertEqual(sorted(summaries[1]['failed']), ['gb'])
+        self.assertEqual(summaries[2]['results'][0].path,
+                         '{}/gc'.format(path))
+
+        # Sem conexão, download_group também devolve a falha
+        ufrn_data.url_group = 'http://127.0.0.1:1/api/rest/group/'
+        failed = ufrn_data.download_group('gb', path, dictionary=False)
+        self.assertEqual(failed[0]['group'], 'gb')
+
+        server.use(ufrn_data)
+        del server.errors['/api/rest/group/gb']
+        server.groups['gb'] = ['pb']
+        retried = ufrn_data.retry_failed(summaries + failed)
+        server.close()
+        self.assertEqual([(r.package, r.status) for r in retried],
+                         [('pb', 'downloaded'), (None, 'failed')])
+        self.assertEqual(retried[1].options['group'], 'gc')
+        self.assertEqual(os.listdir(os.path.join(path, 'gb', 'pb')),
+                         ['B 2019.csv'])
+        shutil.rmtree(path)
+
     def test_can_search_groups(self):
         """Verifica se a procura por grupos está funcionando."""
         list_groups = self.ufrn_data.search_related_groups('pesquis')
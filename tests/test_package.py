@@ -1,4 +1,15 @@
+import gzip
+import importlib.util
+import random
+import tarfile
+import tempfile
+import threading
+import zipfile
 from .utils import *
+from odufrn_downloader.exceptions import odufrDownloadError
+from odufrn_downloader.utils import ColumnarConverter, CompressedFile, \
+    ContentStore, DownloadListener, DownloadPlan, DownloadResult, Manifest, \
+    ShardManifest, StorageSink, TarSink, TextIndex, ZipSink
 
 
 class Package(unittest.TestCase):
@@ -72,3 +83,788 @@ class Package(unittest.TestCase):
         self.assertTrue(len(files) > 0 and file_exist)
         if os.path.exists('./tmp'):
             shutil.rmtree('./tmp')
+
+    def test_filter_resources_by_years(self):
+        """Verifica se o filtro de anos aceita intervalos e ignora anos
+        dentro de números maiores."""
+        resources = [
+            {'name': 'Turmas 2017'}, {'name': 'Turmas 2018.1'},
+            {'name': 'Turmas 120190'}, {'name': 'Dicionário de Dados'},
+            {'name': 'Turmas 2019-2020'}
+        ]
+
+        def names(years, dictionary=True):
+            return [
+                resource['name'] for resource in
+                self.ufrn_data.filter_resources(resources, dictionary, years)
+            ]
+
+        self.assertEqual(names([2019], False), ['Turmas 2019-2020'])
+        self.assertEqual(names((2018, 2019), False),
+                         ['Turmas 2018.1', 'Turmas 2019-2020'])
+        self.assertEqual(names(range(2017, 2019)), [
+            'Turmas 2017', 'Turmas 2018.1', 'Dicionário de Dados'
+        ])
+        self.assertEqual(names(None), [r['name'] for r in resources])
+        self.assertFalse(self.ufrn_data.year_find('Turmas 20190', [2019]))
+
+    def test_years_index_cache_checks_resource_names(self):
+        """Verifica se o índice de anos guardado não é reaproveitado para
+        uma lista de recursos diferente, de mesmo tamanho."""
+        key = ('http://x/pacote', None)
+        before = [{'name': 'Turmas 2017'}, {'name': 'Turmas 2018'}]
+        after = [{'name': 'Turmas 2018'}, {'name': 'Turmas 2019'}]
+        self.assertEqual(self.ufrn_data.years_index(before, key),
+                         {'2017': [0], '2018': [1]})
+        self.assertEqual(self.ufrn_data.years_index(after, key),
+                         {'2018': [0], '2019': [1]})
+
+    def test_can_download_packages_concurrently(self):
+        """Verifica se baixa-se pacotes com downloads simultâneos."""
+        summaries = self.ufrn_data.download_packages(
+            ['telefones', 'unidades-academicas'], './tmp', workers=4
+        )
+        self.assertEqual(len(summaries), 2)
+        for summary in summaries:
+            self.assertFalse(summary['failed'])
+            for file_path in summary['downloaded']:
+                self.assertTrue(os.path.exists(file_path))
+        if os.path.exists('./tmp'):
+            shutil.rmtree('./tmp')
+
+    def test_can_download_package_in_chunks(self):
+        """Verifica se o download em blocos não deixa arquivos parciais."""
+        self.ufrn_data.chunk_size = 1024
+        summary = self.ufrn_data.download_package('telefones', './tmp')
+        _, _, files = next(os.walk('./tmp/telefones'))
+        self.assertTrue(len(summary['downloaded']) > 0)
+        self.assertFalse([f for f in files if '.part' in f])
+        if os.path.exists('./tmp'):
+            shutil.rmtree('./tmp')
+
+    def test_can_sync_package(self):
+        """Verifica se a sincronização pula os recursos que não mudaram."""
+        first = self.ufrn_data.download_package(
+            'telefones', './tmp', sync=True
+        )
+        second = self.ufrn_data.download_package(
+            'telefones', './tmp', sync=True
+        )
+        self.assertTrue(os.path.exists(
+            './tmp/telefones/.odufrn-manifest.json'
+        ))
+        self.assertEqual(
+            sorted(second['unchanged']), sorted(first['downloaded'])
+        )
+        self.assertFalse(second['downloaded'])
+        if os.path.exists('./tmp'):
+            shutil.rmtree('./tmp')
+
+    def test_can_resume_partial_download(self):
+        """Verifica se um arquivo .part é retomado até o tamanho final."""
+        path = self.ufrn_data._make_dir('./tmp')
+        resource = self.ufrn_data._request_get(
+            self.ufrn_data.url_package + 'telefones'
+        )['resources'][0]
+        file_path = self.ufrn_data._download(path, resource).path
+        with open(file_path, 'rb') as f:
+            content = f.read()
+
+        with open(file_path + '.part', 'wb') as f:
+            f.write(content[:len(content) // 2])
+        self.ufrn_data._write_part_state(
+            file_path + '.part', {'url': resource['url']}
+        )
+        self.ufrn_data._fetch(resource['url'], file_path)
+        with open(file_path, 'rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertFalse(os.path.exists(file_path + '.part'))
+        if os.path.exists('./tmp'):
+            shutil.rmtree('./tmp')
+
+    def test_download_in_chunks_from_local_server(self):
+        """Verifica, sem rede, se o arquivo é gravado em blocos, sem
+        deixar arquivos parciais."""
+        server = LocalServer()
+        content = b'ano;valor\n' + b'2019;1\n' * 100
+        server.add_package('telefones', {'Telefones': content})
+        ufrn_data = server.use(self.ufrn_data)
+        ufrn_data.chunk_size = 16
+        sizes = []
+
+        class Listener(DownloadListener):
+            def on_bytes(self, file_path, received, total):
+                sizes.append(received)
+
+        ufrn_data.add_listener(Listener())
+        path = tempfile.mkdtemp()
+        summary = ufrn_data.download_package('telefones', path)
+        server.close()
+
+        with open(summary['downloaded'][0], 'rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual(os.listdir(os.path.join(path, 'telefones')),
+                         ['Telefones.csv'])
+        self.assertGreater(len(sizes), 1)
+        self.assertEqual(sizes[-1], len(content))
+        shutil.rmtree(path)
+
+    def test_sync_with_local_server(self):
+        """Verifica, sem rede, se a sincronização usa requisições
+        condicionais e salva o registro uma vez por pacote."""
+        server = LocalServer()
+        resources = server.add_package('telefones', {
+            'Telefones 2018': b'a;b\n1;2\n', 'Telefones 2019': b'a;b\n3;4\n'
+        })
+        for resource in resources:
+            # Sem metadados para comparar, o servidor decide pelo ETag
+            del resource['size']
+        ufrn_data = server.use(self.ufrn_data)
+        path = tempfile.mkdtemp()
+        saves = []
+        save = Manifest.save
+
+        def counted_save(manifest):
+            saves.append(manifest.file_path)
+            save(manifest)
+
+        Manifest.save = counted_save
+        try:
+            first = ufrn_data.download_package('telefones', path, sync=True)
+            second = ufrn_data.download_package('telefones', path, sync=True)
+            server.files[resources[1]['url'][len(server.url) - 1:]] = \
+                b'a;b\n5;6\n'
+            third = ufrn_data.download_package('telefones', path, sync=True)
+        finally:
+            Manifest.save = save
+            server.close()
+
+        self.assertEqual(len(first['downloaded']), 2)
+        self.assertEqual(sorted(second['unchanged']),
+                         sorted(first['downloaded']))
+        self.assertEqual(len(third['downloaded']), 1)
+        self.assertEqual(len(saves), 3)
+        conditional = [
+            headers for method, _, headers in server.requests
+            if headers.get('If-None-Match')
+        ]
+        self.assertEqual(len(conditional), 4)
+        with open(third['downloaded'][0], 'rb') as f:
+            self.assertEqual(f.read(), b'a;b\n5;6\n')
+        shutil.rmtree(path)
+
+    def test_resume_with_local_server(self):
+        """Verifica, sem rede, se uma transferência interrompida e um
+        .part de outra execução são retomados com Range."""
+        server = LocalServer()
+        content = bytes(range(256)) * 64
+        resource = server.add_package('obras', {'Obras': content})[0]
+        url_path = resource['url'][len(server.url) - 1:]
+        ufrn_data = server.use(self.ufrn_data)
+        ufrn_data.configure_session(retries=1, backoff_factor=0)
+        ufrn_data.chunk_size = 1024
+        path = tempfile.mkdtemp()
+
+        server.truncate.add(url_path)
+        result = ufrn_data._download(path, resource)
+        with open(result.path, 'rb') as f:
+            self.assertEqual(f.read(), content)
+        ranges = [h.get('Range') for _, p, h in server.requests
+                  if p == url_path]
+        self.assertEqual(ranges, [None, 'bytes={}-'.format(len(content) // 2)])
+
+        with open(result.path + '.part', 'wb') as f:
+            f.write(content[:1000])
+        ufrn_data._write_part_state(result.path + '.part', {
+            'url': resource['url'],
+            'validator': server.requests[-1][2].get('If-Range')
+        })
+        ufrn_data._fetch(resource['url'], result.path)
+        server.close()
+
+        self.assertEqual(server.requests[-1][2].get('Range'), 'bytes=1000-')
+        with open(result.path, 'rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertFalse(os.path.exists(result.path + '.part'))
+        shutil.rmtree(path)
+
+    def test_iter_rows_resume_with_local_server(self):
+        """Verifica se a leitura interrompida é retomada com If-Range e
+        falha se o arquivo mudou no servidor."""
+        server = LocalServer()
+        content = b'ano;valor\n' + b'2019;1\n' * 2000
+        resource = server.add_package('obras', {'Obras 2019': content})[0]
+        url_path = resource['url'][len(server.url) - 1:]
+        ufrn_data = server.use(self.ufrn_data)
+        ufrn_data.configure_session(retries=1, backoff_factor=0)
+        ufrn_data.chunk_size = 1024
+
+        server.truncate.add(url_path)
+        self.assertEqual(len(list(ufrn_data.iter_rows('obras'))), 2000)
+        headers = [h for _, p, h in server.requests if p == url_path]
+        self.assertIsNotNone(headers[1].get('Range'))
+        self.assertEqual(headers[1].get('If-Range'),
+                         '"{}"'.format(hashlib.sha1(content).hexdigest()))
+
+        class Changer(DownloadListener):
+            def on_retry(self, task, attempt, exception):
+                server.files[url_path] = content.replace(b'2019', b'2020')
+
+        ufrn_data.add_listener(Changer())
+        server.truncate.add(url_path)
+        with self.assertRaises(odufrDownloadError):
+            list(ufrn_data.iter_rows('obras'))
+        server.close()
+
+    def test_search_similar_matches_levenshtein(self):
+        """Verifica se a busca indexada retorna o mesmo que o cálculo
+        completo de Levenshtein, sem repetir nomes."""
+        names = ['discentes', 'docentes', 'dados-de-discentes',
+                 'cursos-de-graduacao', 'discente-discentes', 'obras']
+        for keyword in ['discent', 'docente', 'graduacao', 'obra', 'x']:
+            ratio = self.ufrn_data.levenshtein
+            expected = [
+                name for name in names
+                if any(ratio(list(keyword), list(word)) > 0.87
+                       for word in name.split('-'))
+            ]
+            self.assertEqual(
+                self.ufrn_data.search_similar(keyword, names), expected
+            )
+
+    def test_rank_similar(self):
+        """Verifica se a busca ordenada retorna os k nomes mais
+        semelhantes, sem repetições."""
+        names = ['discentes', 'docentes', 'discente-discentes',
+                 'discentes', 'dados-de-discente']
+        ranked = self.ufrn_data.rank_similar('discente', names, 2)
+        self.assertEqual(
+            [name for name, _ in ranked],
+            ['discente-discentes', 'dados-de-discente']
+        )
+        self.assertEqual(ranked[0][1], 1.0)
+        ranked = self.ufrn_data.simple_rank('discentes', names)
+        self.assertEqual(
+            [name for name, _ in ranked], ['discentes', 'discente-discentes']
+        )
+
+    def test_download_plan_totals_and_json(self):
+        """Verifica se o plano soma os tamanhos por pacote e por grupo e
+        pode ser salvo e carregado."""
+        def task(group, package, size, source=None):
+            return {
+                'group': group, 'package': package, 'size': size,
+                'path': './tmp/{}/{}'.format(group, package),
+                'resource': {'name': 'r', 'url': 'u'}, 'source': source
+            }
+
+        plan = DownloadPlan([
+            task('ensino', 'discentes', 10), task('ensino', 'discentes', 5),
+            task('ensino', 'docentes', None),
+            task('pessoas', 'docentes', None, './tmp/ensino/docentes')
+        ])
+        self.assertEqual(plan.total_files, 3)
+        self.assertEqual(plan.total_bytes, 15)
+        self.assertEqual(plan.totals('group')['pessoas'], {
+            'files': 0, 'bytes': 0, 'unknown': 0, 'linked': 1
+        })
+        self.assertEqual(plan.totals()['docentes']['unknown'], 1)
+        os.makedirs('./tmp')
+        plan.save('./tmp/plano.json')
+        self.assertEqual(DownloadPlan.load('./tmp/plano.json').tasks,
+                         plan.tasks)
+        if os.path.exists('./tmp'):
+            shutil.rmtree('./tmp')
+
+    def test_shards(self):
+        """Verifica se as partes do plano são disjuntas, estáveis,
+        equilibradas e se os seus registros podem ser combinados."""
+        def make_plan(sizes):
+            return DownloadPlan([
+                {'group': None, 'package': 'p{}'.format(n % 3),
+                 'size': size, 'path': 'p{}'.format(n % 3), 'source': None,
+                 'resource': {'name': str(n),
+                              'url': 'http://x/{}.csv'.format(n)}}
+                for n, size in enumerate(sizes)
+            ])
+
+        sizes = [90, 70, 60, 50, 40, 30, 20, 10, None, None]
+        plan = make_plan(sizes)
+        shards = [plan.shard(index, 3) for index in range(3)]
+        keys = [plan.key(task) for shard in shards for task in shard]
+        self.assertEqual(sorted(keys), sorted(plan.key(t) for t in plan))
+        self.assertEqual(DownloadPlan(list(reversed(plan.tasks))).assign(3),
+                         plan.assign(3))
+        with self.assertRaises(ValueError):
+            plan.shard(3, 3)
+        with self.assertRaises(ValueError):
+            plan.assign(3, [1, 1])
+
+        generator = random.Random(7)
+        large = make_plan([int(generator.lognormvariate(13, 1.5))
+                           for _ in range(300)])
+        for count, weights in [(4, None), (8, None), (3, [1, 1, 2])]:
+            shares = weights or [1] * count
+            loads = [large.shard(index, count, weights).total_bytes
+                     for index in range(count)]
+            for load, share in zip(loads, shares):
+                expected = large.total_bytes * share / sum(shares)
+                self.assertLess(abs(load - expected), expected * 0.1)
+
+        root = tempfile.mkdtemp()
+        for index in range(3):
+            manifest = ShardManifest(index, 3, plan)
+            manifest.record([{'results': [
+                DownloadResult(task['package'], task['resource'], 'failed'
+                               if task['size'] is None else 'downloaded',
+                               os.path.join(root, task['resource']['name']),
+                               task['size'] or 0)
+                for task in manifest.plan
+            ]}], root)
+            manifest.save(root)
+
+        merged = ShardManifest.merge(ShardManifest.find(root))
+        self.assertEqual(merged['shards'], [0, 1, 2])
+        self.assertEqual(merged['missing'], [])
+        self.assertTrue(merged['consistent'])
+        self.assertEqual(len(merged['files']), len(sizes))
+        self.assertEqual(merged['bytes'], 370)
+        self.assertEqual(len(merged['failed']), 2)
+        self.assertEqual(merged['duplicates'], [])
+        os.remove(ShardManifest.find(root)[0])
+        self.assertEqual(ShardManifest.merge(
+            ShardManifest.find(root))['missing'], [0])
+        shutil.rmtree(root)
+
+    def test_shards_with_local_server(self):
+        """Verifica, sem rede, se as máquinas baixam partes disjuntas e
+        consultam cada pacote uma única vez."""
+        server = LocalServer()
+        for name in ['a', 'b', 'c']:
+            server.add_package(name, {
+                'Dados {} {}'.format(name, n): b'ano;valor\n2019;1\n'
+                for n in range(4)
+            })
+        ufrn_data = server.use(self.ufrn_data)
+        path = tempfile.mkdtemp()
+        downloaded = []
+        for index in range(2):
+            summaries = ufrn_data.download_packages(
+                ['a', 'b', 'c'], path, shard_index=index, shard_count=2
+            )
+            downloaded += [file_path for summary in summaries
+                           for file_path in summary['downloaded']]
+        lookups = [request for request in server.requests
+                   if request[1].startswith('/api/rest/dataset/')]
+        server.close()
+
+        self.assertEqual(len(downloaded), 12)
+        self.assertEqual(len(set(downloaded)), 12)
+        self.assertEqual(len(lookups), 6)
+        merged = ufrn_data.merge_shards(path)
+        self.assertEqual(merged['missing'], [])
+        self.assertTrue(merged['consistent'])
+        shutil.rmtree(path)
+
+    def test_retry_failed(self):
+        """Verifica se apenas os arquivos que falharam são baixados de
+        novo."""
+        resource = {'name': 'r', 'format': 'CSV', 'url': 'http://x/r.csv'}
+        summary = {'results': [
+            DownloadResult('p', resource, 'downloaded', './tmp/p/a.csv'),
+            DownloadResult('p', resource, 'failed', './tmp/p/r.csv',
+                           exception=IOError())
+        ]}
+        calls = []
+
+        def download(path, resource, manifest=None, compression=None,
+                     sink=None):
+            calls.append(path)
+            return DownloadResult('p', resource, 'downloaded',
+                                  path + '/r.csv', 10, 0.1)
+
+        self.ufrn_data._download = download
+        retried = self.ufrn_data.retry_failed([summary], workers=2)
+        self.assertEqual(calls, ['./tmp/p'])
+        self.assertEqual(len(retried), 1)
+        self.assertFalse(retried[0].failed)
+        self.assertEqual(retried[0].bytes, 10)
+        self.assertEqual(self.ufrn_data.retry_failed(retried), [])
+
+    def test_failed_package_lookup_can_be_retried(self):
+        """Verifica se a falha na consulta de um pacote não interrompe os
+        demais e pode ser refeita por retry_failed."""
+        server = LocalServer()
+        server.add_package('pa', {'A 2019': b'a\n1\n'})
+        server.add_package('pb', {'B 2018': b'b\n1\n', 'B 2019': b'b\n2\n'})
+        server.errors['/api/rest/dataset/pb'] = (500, b'<html>erro</html>')
+        ufrn_data = server.use(self.ufrn_data)
+        ufrn_data.configure_session(retries=0)
+        path = tempfile.mkdtemp()
+
+        summaries = ufrn_data.download_packages(
+            ['pa', 'pb', 'pc'], path, years=[2019]
+        )
+        self.assertEqual([len(s['downloaded']) for s in summaries],
+                         [1, 0, 0])
+        self.assertEqual([sorted(s['failed']) for s in summaries],
+                         [[], ['pb'], ['pc']])
+        self.assertIsNone(summaries[1]['results'][0].resource)
+
+        del server.errors['/api/rest/dataset/pb']
+        retried = ufrn_data.retry_failed(summaries)
+        server.close()
+        self.assertEqual([r.status for r in retried], ['downloaded', 'failed'])
+        self.assertEqual(os.listdir(os.path.join(path, 'pb')),
+                         ['B 2019.csv'])
+        self.assertEqual(retried[1].package, 'pc')
+        shutil.rmtree(path)
+
+    def test_deduplicate(self):
+        """Verifica se arquivos iguais passam a ocupar o espaço de um só."""
+        os.makedirs('./tmp/a', exist_ok=True)
+        os.makedirs('./tmp/b', exist_ok=True)
+        for path in ['./tmp/a/x.csv', './tmp/b/y.csv']:
+            with open(path, 'w') as f:
+                f.write('ano;total\n2019;10\n')
+        with open('./tmp/b/z.csv', 'w') as f:
+            f.write('outro\n')
+
+        store = ContentStore('./tmp/.store')
+        report = store.deduplicate('./tmp', dry_run=True)
+        self.assertEqual(report['files'], 3)
+        self.assertEqual(report['unique'], 2)
+        self.assertEqual(report['duplicate_bytes'], 18)
+        self.assertFalse(os.path.samefile('./tmp/a/x.csv', './tmp/b/y.csv'))
+
+        report = store.deduplicate('./tmp')
+        self.assertEqual(report['reclaimed'], 18)
+        self.assertTrue(os.path.samefile('./tmp/a/x.csv', './tmp/b/y.csv'))
+        self.assertEqual(store.deduplicate('./tmp')['duplicate_bytes'], 0)
+
+        os.remove('./tmp/b/z.csv')
+        self.assertEqual(store.prune(), 6)
+        if os.path.exists('./tmp'):
+            shutil.rmtree('./tmp')
+
+    def test_deduplicate_links_every_copy(self):
+        """Verifica se uma cópia que falha não impede as demais de serem
+        ligadas."""
+        os.makedirs('./tmp', exist_ok=True)
+        paths = ['./tmp/{}.csv'.format(name) for name in 'abc']
+        for path in paths:
+            with open(path, 'w') as f:
+                f.write('ano;total\n2019;10\n')
+
+        store = ContentStore('./tmp/.store')
+        add = store.add
+        calls = []
+
+        def failing_add(file_path, digest):
+            calls.append(file_path)
+            return len(calls) > 1 and add(file_path, digest)
+
+        store.add = failing_add
+        report = store.deduplicate('./tmp')
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(report['reclaimed'], 0)
+        linked = [path for path in paths if path not in calls[:1]]
+        self.assertTrue(os.path.samefile(linked[0], linked[1]))
+        if os.path.exists('./tmp'):
+            shutil.rmtree('./tmp')
+
+    def test_iter_rows(self):
+        """Verifica se as linhas dos CSVs são lidas em blocos, em UTF-8 ou
+        Latin-1, e filtradas por recurso e por ano."""
+        contents = {
+            'http://x/obras-2018.csv': 'licitação;valor\r\n'
+                                       '"1/2018";"R$ 10,00"\r\n'
+                                       '2/2018;R$ 5,00\r\n'.encode('utf-8'),
+            'http://x/obras-2019.csv': 'licitação;valor\n'
+                                       '1/2019;R$ 7,00\n'.encode('latin-1')
+        }
+        self.ufrn_data._request_get = lambda url: {'resources': [
+            {'name': 'Dicionário', 'format': 'CSV', 'url': 'http://x/d.csv'},
+            {'name': 'Obras 2018', 'format': 'CSV',
+             'url': 'http://x/obras-2018.csv'},
+            {'name': 'Obras 2019', 'format': 'CSV',
+             'url': 'http://x/obras-2019.csv'}
+        ]}
+
+        def iter_bytes(url):
+            content = contents[url]
+            for start in range(0, len(content), 3):
+                yield content[start:start + 3]
+
+        self.ufrn_data._iter_bytes = iter_bytes
+        rows = list(self.ufrn_data.iter_rows('obras'))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0], {'licitação': '1/2018', 'valor': 'R$ 10,00'})
+        self.assertEqual(rows[2], {'licitação': '1/2019', 'valor': 'R$ 7,00'})
+        self.assertEqual(
+            list(self.ufrn_data.iter_rows('obras', years=2019)), rows[2:]
+        )
+        self.assertEqual(
+            list(self.ufrn_data.iter_rows('obras', 'obras-2018.csv',
+                                          batch_size=1)),
+            [[rows[0]], [rows[1]]]
+        )
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'),
+                         'pyarrow não instalado')
+    def test_columnar_converter(self):
+        """Verifica se os CSVs são convertidos com os tipos do dicionário,
+        mantendo as colunas de texto quando os demais tipos falham."""
+        import pyarrow.parquet
+        self.assertEqual(ColumnarConverter.arrow_type('character varying'),
+                         'string')
+        self.assertEqual(ColumnarConverter.arrow_type('INTEGER'), 'int64')
+        self.assertIsNone(ColumnarConverter.arrow_type('date'))
+
+        os.makedirs('./tmp', exist_ok=True)
+        with open('./tmp/obras.csv', 'wb') as f:
+            f.write('licitação;valor;codigo\n1/2018;R$ 1,00;007\n'
+                    .encode('latin-1'))
+        with ColumnarConverter('parquet', workers=1) as converter:
+            converter.submit('./tmp/obras.csv', {
+                'valor': 'float64', 'codigo': 'string'
+            })
+            output_path = converter.result('./tmp/obras.csv')
+
+        self.assertEqual(output_path, './tmp/obras.parquet')
+        self.assertEqual(pyarrow.parquet.read_table(output_path).to_pylist(),
+                         [{'licitação': '1/2018', 'valor': 'R$ 1,00',
+                           'codigo': '007'}])
+        if os.path.exists('./tmp'):
+            shutil.rmtree('./tmp')
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'),
+                         'pyarrow não instalado')
+    def test_convert_with_local_server(self):
+        """Verifica se os tipos vêm do dicionário baixado, sem consultá-lo
+        de novo, ou de uma consulta feita por um trabalhador."""
+        import pyarrow.parquet
+        server = LocalServer()
+        resources = server.add_package('obras', {
+            'Obras 2019': b'ano;codigo\n2019;007\n',
+            'Dicionário de Dados': b'coluna;tipo\ncodigo;character varying\n'
+        })
+        dictionary_path = resources[1]['url'][len(server.url) - 1:]
+        ufrn_data = server.use(self.ufrn_data)
+        path = tempfile.mkdtemp()
+
+        for dictionary in [True, False]:
+            del server.requests[:]
+            summary = ufrn_data.download_package(
+                'obras', os.path.join(path, str(dictionary)), dictionary,
+                workers=4, convert='parquet'
+            )
+            self.assertEqual(len(summary['converted']), 1)
+            self.assertEqual(
+                pyarrow.parquet.read_table(
+                    summary['converted'][0]
+                ).to_pylist(),
+                [{'ano': 2019, 'codigo': '007'}]
+            )
+            gets = [p for _, p, _ in server.requests if p == dictionary_path]
+            self.assertEqual(len(gets), 1)
+            self.assertEqual(len(summary['downloaded']), 1 + dictionary)
+
+        server.close()
+        shutil.rmtree(path)
+
+    def test_compressed_file(self):
+        """Verifica se os blocos comprimidos gravados em tentativas
+        diferentes são lidos como um único arquivo."""
+        os.makedirs('./tmp', exist_ok=True)
+        compressions = ['gzip']
+        if importlib.util.find_spec('zstandard'):
+            compressions.append('zstd')
+
+        for compression in compressions:
+            path = './tmp/r.csv' + CompressedFile.suffix(compression)
+            with CompressedFile.open(path, 'wb', compression) as f:
+                f.write('ano;situação\n'.encode('latin-1'))
+            with CompressedFile.open(path, 'ab') as f:
+                f.write('2019;matrícula\n'.encode('latin-1'))
+
+            self.assertEqual(CompressedFile.detect(path), compression)
+            self.assertEqual(CompressedFile.strip(path), './tmp/r.csv')
+            with CompressedFile.open(path, 'rt') as f:
+                self.assertEqual(f.read(), 'ano;situação\n2019;matrícula\n')
+
+        with self.assertRaises(ValueError):
+            CompressedFile.check('bz2')
+        if os.path.exists('./tmp'):
+            shutil.rmtree('./tmp')
+
+    def test_archive_sinks(self):
+        """Verifica se os arquivos entregues por várias threads e as suas
+        réplicas são gravados no tar e no zip."""
+        os.makedirs('./tmp', exist_ok=True)
+        for sink in [TarSink('./tmp/a.tar'), ZipSink('./tmp/a.zip')]:
+            def produce(number):
+                file_path = os.path.join(
+                    sink.root, 'g', 'p{}'.format(number), 'r.csv'
+                )
+                with sink.open(file_path) as f:
+                    f.write('ano;total\n{};1\n'.format(number).encode())
+
+            with sink:
+                threads = [threading.Thread(target=produce, args=(n,))
+                           for n in range(8)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                sink.link(os.path.join(sink.root, 'g', 'p0', 'r.csv'),
+                          os.path.join(sink.root, 'h', 'p0', 'r.csv'))
+                file_path = os.path.join(sink.root, 'shard.json')
+                with open(file_path, 'w') as f:
+                    f.write('{}')
+                sink.add_file(file_path)
+                self.assertFalse(os.path.exists(file_path))
+            self.assertFalse(os.path.exists(sink.root))
+
+        with tarfile.open('./tmp/a.tar') as tar:
+            self.assertEqual(len(tar.getnames()), 10)
+            self.assertEqual(tar.getmember('h/p0/r.csv').linkname,
+                             'g/p0/r.csv')
+            self.assertEqual(tar.extractfile('g/p3/r.csv').read(),
+                             b'ano;total\n3;1\n')
+        with zipfile.ZipFile('./tmp/a.zip') as archive:
+            self.assertEqual(len(archive.namelist()), 10)
+            self.assertEqual(archive.read('h/p0/r.csv'), b'ano;total\n0;1\n')
+        with self.assertRaises(TypeError):
+            StorageSink('./tmp')
+        if os.path.exists('./tmp'):
+            shutil.rmtree('./tmp')
+
+    def test_sinks_with_local_server(self):
+        """Verifica, sem rede, se os downloads são gravados direto no tar e
+        no zip, retomando falhas de conexão, e se sync é recusado."""
+        server = LocalServer()
+        content = b'ano;valor\n' + b'2019;1\n' * 200
+        server.add_package('telefones', {'Telefones': content})
+        server.truncate.add('/telefones/0.csv')
+        ufrn_data = server.use(self.ufrn_data)
+        ufrn_data.configure_session(retries=1)
+        ufrn_data.chunk_size = 256
+        path = tempfile.mkdtemp()
+
+        with TarSink(os.path.join(path, 'a.tar')) as sink:
+            with self.assertRaises(ValueError):
+                ufrn_data.download_package('telefones', sync=True, sink=sink)
+            summary = ufrn_data.download_package('telefones', sink=sink)
+            self.assertEqual(os.listdir(os.path.join(sink.root, 'telefones')),
+                             [])
+        server.truncate.add('/telefones/0.csv')
+        with ZipSink(os.path.join(path, 'a.zip')) as sink:
+            ufrn_data.download_package('telefones', sink=sink,
+                                       compression='gzip')
+        server.close()
+
+        self.assertEqual(len(summary['downloaded']), 1)
+        with tarfile.open(os.path.join(path, 'a.tar')) as tar:
+            self.assertEqual(
+                tar.extractfile('telefones/Telefones.csv').read(), content
+            )
+        with zipfile.ZipFile(os.path.join(path, 'a.zip')) as archive:
+            self.assertEqual(
+                gzip.decompress(archive.read('telefones/Telefones.csv.gz')),
+                content
+            )
+        shutil.rmtree(path)
+
+    def test_text_index(self):
+        """Verifica se o índice de texto busca pelos metadados e é
+        atualizado apenas quando o pacote muda."""
+        index = TextIndex()
+        index.add('discentes', {
+            'title': 'Discentes', 'notes': 'Alunos de graduação',
+            'tags': ['ensino'], 'metadata_modified': '1',
+            'resources': [{'name': 'Discentes 2019'}]
+        })
+        index.add('docentes', {
+            'title': 'Docentes', 'notes': 'Professores da UFRN',
+            'tags': [{'name': 'ensino'}], 'metadata_modified': '1',
+            'resources': [{'name': 'Docentes 2019'}]
+        })
+        self.assertEqual(index.search('graduacao'), ['discentes'])
+        self.assertEqual(index.search('ENSINO 2019'),
+                         ['discentes', 'docentes'])
+        self.assertEqual(index.search('profes'), ['docentes'])
+        self.assertEqual(index.resources('docentes'), ['Docentes 2019'])
+        self.assertFalse(index.add('docentes', {'metadata_modified': '1'}))
+        self.assertTrue(index.add('docentes', {'metadata_modified': '2'}))
+        self.assertEqual(index.search('profes'), [])
+        index.remove('discentes')
+        self.assertEqual(index.names, {'docentes'})
+        self.assertEqual(index.search('graduacao'), [])
+
+    def test_text_index_keeps_packages_without_catalog(self):
+        """Verifica se a falha na consulta ao catálogo não esvazia o
+        índice compartilhado."""
+        server = LocalServer()
+        server.add_package('pa', {'A 2019': b'a\n1\n'})
+        server.lists['package_list'] = ['pa']
+        ufrn_data = server.use(self.ufrn_data)
+        ufrn_data.configure_session(retries=0)
+        ufrn_data.load_packages()
+        self.assertEqual(ufrn_data.text_index().names, {'pa'})
+
+        server.errors['/api/action/package_list'] = (500, b'<html></html>')
+        ufrn_data.load_packages()
+        self.assertEqual(ufrn_data.text_index().names, {'pa'})
+
+        del server.errors['/api/action/package_list']
+        server.lists['package_list'] = []
+        ufrn_data.load_packages()
+        self.assertEqual(ufrn_data.text_index().names, set())
+        server.close()
+
+    def test_search_similar_batch(self):
+        """Verifica se a busca em lote retorna, para cada palavra, os nomes
+        da busca simples sem repetições e com a maior razão."""
+        names = ['discentes', 'docentes', 'dados-de-discentes',
+                 'cursos-de-graduacao', 'discente-discentes', 'obras']
+        keywords = ['discent', 'docente', 'graduacao', 'obra', 'x']
+        ratio = self.ufrn_data.levenshtein
+        result = self.ufrn_data.search_similar_batch(keywords, names)
+        self.assertEqual(sorted(result), sorted(keywords))
+        for keyword in keywords:
+            expected = []
+            for name in names:
+                scores = [ratio(list(keyword), list(word))
+                          for word in name.split('-')]
+                if max(scores) > 0.87:
+                    expected.append((name, max(scores)))
+            self.assertEqual(result[keyword], expected)
+
+    def test_search_index_cache_is_thread_safe(self):
+        """Verifica se o cache de índices de busca aceita consultas de
+        várias threads e mantém os índices usados recentemente."""
+        lists = [['lista{}-{}'.format(n, m) for m in range(50)]
+                 for n in range(12)]
+        errors = []
+
+        def search(items):
+            try:
+                for _ in range(20):
+                    self.ufrn_data.search_similar('lista1', items)
+            except Exception as ex:
+                errors.append(ex)
+
+        threads = [threading.Thread(target=search, args=(items,))
+                   for items in lists]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(self.ufrn_data._search_indexes), 8)
+
+        recent = self.ufrn_data.search_index(lists[0])
+        for items in lists[1:8]:
+            self.ufrn_data.search_index(items)
+        self.assertIs(self.ufrn_data.search_index(lists[0]), recent)
@@ -29,6 +29,17 @@ class Tag(unittest.TestCase):
                     'cursos-ufrn', 'estruturas-curriculares']
         self.assertTrue(sorted(packages) == sorted(expected))
 
+    def test_search_by_tag_uses_memory_cache(self):
+        """Verifica se as etiquetas já consultadas não são consultadas
+        novamente e se não há pacotes repetidos."""
+        packages = self.ufrn_data.search_by_tag('graduacao')
+        self.assertEqual(len(packages), len(set(packages)))
+        requests_made = self.ufrn_data.connection_stats()['requests']
+        self.assertEqual(self.ufrn_data.search_by_tag('graduacao'), packages)
+        self.assertEqual(
+            self.ufrn_data.connection_stats()['requests'], requests_made
+        )
+
     def test_can_download_tags(self):
         """Verifica se baixa-se arquivos de tags."""
         self.ufrn_data.download_packages_by_tag('materiais', './tmp')
@@ -1,8 +1,13 @@
+import hashlib
 import io
+import json
 import os
 import sys
 import shutil
+import socketserver
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from os.path import dirname, join, abspath
 sys.path.insert(0, abspath(join(dirname(__file__), '..')))
 from odufrn_downloader import ODUFRNDownloader
@@ -22,3 +27,130 @@ def assert_console(fun):
     que verifica se foi printado."""
     unit = unittest.TestCase()
     return unit.assertTrue(len(input_value(fun)) > 0)
+
+
+class LocalServer:
+    """Servidor HTTP local que simula a API e os arquivos dos dados
+    abertos, para os testes que não dependem da rede.
+
+    Os arquivos respondem com ETag, aceitam Range (com If-Range) e
+    If-None-Match, e os caminhos em truncate são enviados pela metade uma
+    vez, com a conexão fechada em seguida. Os caminhos em errors
+    respondem com o (status, corpo) indicado.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.packages = {}
+        self.groups = {}
+        self.lists = {}
+        self.truncate = set()
+        self.errors = {}
+        self.requests = []
+        self.server = _ThreadingServer(('127.0.0.1', 0), _handler(self))
+        self.url = 'http://127.0.0.1:{}/'.format(self.server.server_port)
+        threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        ).start()
+
+    def use(self, ufrn_data):
+        """Aponta as consultas da instância para o servidor."""
+        ufrn_data.url_base = self.url
+        ufrn_data.url_action = self.url + 'api/action/'
+        ufrn_data.url_package = self.url + 'api/rest/dataset/'
+        ufrn_data.url_group = self.url + 'api/rest/group/'
+        ufrn_data.listeners = []
+        return ufrn_data
+
+    def add_package(self, name, files):
+        """Publica um pacote com os arquivos {nome: conteúdo} em CSV."""
+        resources = []
+        for resource_name, content in files.items():
+            path = '/{}/{}.csv'.format(name, len(self.files))
+            self.files[path] = content
+            resources.append({
+                'name': resource_name, 'format': 'CSV',
+                'url': self.url + path[1:], 'size': len(content)
+            })
+        self.packages[name] = {'name': name, 'resources': resources}
+        return resources
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _ThreadingServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def _handler(local):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_HEAD(self):
+            self.do_GET(body=False)
+
+        def do_GET(self, body=True):
+            local.requests.append((self.command, self.path, self.headers))
+            if self.path in local.errors:
+                return self._send(*local.errors[self.path], body=body)
+            if self.path.startswith('/api/rest/dataset/'):
+                name = self.path[len('/api/rest/dataset/'):]
+                if name not in local.packages:
+                    return self._send(404, b'{}', body=body)
+                return self._send(
+                    200, json.dumps(local.packages[name]).encode(),
+                    body=body
+                )
+            if self.path.startswith('/api/rest/group/'):
+                name = self.path[len('/api/rest/group/'):]
+                if name not in local.groups:
+                    return self._send(404, b'{}', body=body)
+                return self._send(200, json.dumps({
+                    'name': name, 'packages': local.groups[name]
+                }).encode(), body=body)
+            if self.path.startswith('/api/action/'):
+                option = self.path[len('/api/action/'):]
+                return self._send(200, json.dumps({
+                    'result': local.lists.get(option, [])
+                }).encode(), body=body)
+            if self.path not in local.files:
+                return self._send(404, b'', body=body)
+
+            content = local.files[self.path]
+            etag = '"{}"'.format(hashlib.sha1(content).hexdigest())
+            if self.headers.get('If-None-Match') == etag:
+                return self._send(304, b'', {'ETag': etag}, body=False)
+
+            status, start = 200, 0
+            headers = {'ETag': etag, 'Accept-Ranges': 'bytes'}
+            range_header = self.headers.get('Range')
+            if range_header and \
+                    self.headers.get('If-Range', etag) == etag:
+                status = 206
+                start = int(range_header.split('=')[1].split('-')[0])
+                headers['Content-Range'] = 'bytes {}-{}/{}'.format(
+                    start, len(content) - 1, len(content)
+                )
+            truncate = self.path in local.truncate and body
+            local.truncate.discard(self.path)
+            self._send(status, content[start:], headers, body, truncate)
+
+        def _send(self, status, content, headers=None, body=True,
+                  truncate=False):
+            self.send_response(status)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            if truncate:
+                self.wfile.write(content[:len(content) // 2])
+                self.close_connection = True
+            elif body:
+                self.wfile.write(content)
+
+    return Handler